@@ -4,14 +4,18 @@
 
 import os
 import json
+import csv
+import hashlib
 import re
+import math
 from pathlib import Path
-from typing import Dict, List, Optional, Any, Tuple
+from typing import Dict, List, Optional, Any, Tuple, Iterator
 import logging
 from datetime import datetime
 import warnings
 import unicodedata
 from difflib import SequenceMatcher
+from collections import Counter, defaultdict
 warnings.filterwarnings('ignore')
 
 # Librerías para procesamiento de PDF
@@ -22,9 +26,10 @@ from pdfminer.high_level import extract_text as pdfminer_extract
 from pdfminer.layout import LAParams
 import tabula
 import easyocr
+from easyocr.utils import get_paragraph
 import numpy as np
-from PIL import Image
-import io
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 
 # Configuración de logging (solo consola)
 logging.basicConfig(
@@ -34,10 +39,736 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+OCR_READERS: Dict[Tuple[Tuple[str, ...], bool], Any] = {}  # Lectores de EasyOCR por (idiomas, gpu)
+
+
+def get_ocr_reader(languages: Tuple[str, ...] = ('es',), gpu: bool = False):
+    """
+    Lector de EasyOCR del proceso. Se carga la primera vez que se pide y después lo
+    reutilizan todas las instancias de ReglamentoProcessor y los procesos del pool de OCR
+    (uno por proceso). ejecutar_metadatos.py reemplaza OCR_READERS de cada script que
+    carga por un mismo diccionario, así los scripts que corren en ese proceso comparten
+    el lector.
+    """
+    key = (tuple(languages), gpu)
+    if key not in OCR_READERS:
+        logger.info("Inicializando EasyOCR...")
+        OCR_READERS[key] = easyocr.Reader(list(languages), gpu=gpu)
+        logger.info("EasyOCR inicializado correctamente")
+    return OCR_READERS[key]
+
+
+OCR_ZOOM = 2  # Factor de zoom para mejor calidad (2 = 144 DPI)
+OCR_ZOOM_INITIAL = 1.5  # Primera pasada de OCR; igualarlo a OCR_ZOOM desactiva el OCR adaptativo
+OCR_MIN_CONFIDENCE = 0.6  # Confianza media de EasyOCR (0-1) por debajo de la cual se repite con OCR_ZOOM
+OCR_MAX_SKEW = 5.0  # Grados; la inclinación de la página se busca dentro de ±este ángulo
+OCR_SKEW_STEP = 0.25  # Resolución de la búsqueda de la inclinación, en grados
+OCR_BATCH_PAGES = 4  # Páginas que se pasan juntas a EasyOCR (readtext_batched); 1 = una por una
+
+
+def _page_to_ocr_array(page, zoom: float = OCR_ZOOM) -> np.ndarray:
+    """Convierte una página de PyMuPDF en el array que recibe EasyOCR
+
+    La página se genera directamente en escala de grises (EasyOCR reconoce
+    sobre gris) y las muestras del pixmap se usan tal cual como array, sin
+    codificar y decodificar un PNG de por medio. Si los renglones están
+    inclinados (hasta ±OCR_MAX_SKEW grados), la página se endereza.
+    """
+    # Convertir página a imagen con la resolución indicada
+    mat = fitz.Matrix(zoom, zoom)
+    pix = page.get_pixmap(matrix=mat, colorspace=fitz.csGRAY, alpha=False)
+
+    # Array numpy (alto x ancho, uint8) sobre los bytes del pixmap, sin copiarlos otra vez
+    gray = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width)
+
+    # Enderezar las páginas escaneadas chuecas antes de reconocerlas
+    angle = _estimate_skew(gray)
+    return _deskew(gray, angle) if angle != 0 else gray
+
+
+def _estimate_skew(gray: np.ndarray) -> float:
+    """
+    Ángulo en grados en que están inclinados los renglones de la página (0 si no se detecta).
+    Perfil de proyección: los píxeles oscuros de una versión reducida de la página se
+    proyectan sobre el eje vertical con cada ángulo candidato; con el ángulo correcto los
+    renglones caen en pocas filas y la suma de cuadrados del histograma es máxima.
+    Todos los ángulos se evalúan con una sola bincount.
+    """
+    reduced = gray[::2, ::2]
+    ys, xs = np.nonzero(reduced < 128)
+    if len(ys) < 100:
+        return 0.0  # Página casi en blanco: no hay renglones que alinear
+
+    angles = np.arange(-OCR_MAX_SKEW, OCR_MAX_SKEW + OCR_SKEW_STEP / 2, OCR_SKEW_STEP)
+    tangents = np.tan(np.radians(angles)).astype(np.float32)
+    offset = int(np.ceil(reduced.shape[1] * np.tan(np.radians(OCR_MAX_SKEW)))) + 1
+    bins = reduced.shape[0] + 2 * offset
+
+    # Fila proyectada de cada píxel para cada ángulo (ángulos x píxeles), cada ángulo en su propio tramo
+    rows = np.rint(ys[None, :] - xs[None, :] * tangents[:, None]).astype(np.int64) + offset
+    rows += np.arange(len(angles), dtype=np.int64)[:, None] * bins
+    histograms = np.bincount(rows.ravel(), minlength=len(angles) * bins).reshape(len(angles), bins)
+    scores = (histograms.astype(np.float64) ** 2).sum(axis=1)
+    return float(angles[int(np.argmax(scores))])
+
+
+def _deskew(gray: np.ndarray, angle: float) -> np.ndarray:
+    """
+    Endereza la página el ángulo estimado por _estimate_skew (fondo blanco).
+    Para ángulos de pocos grados basta desplazar cada columna verticalmente (cizalla),
+    que es casi idéntico a girar; las columnas con el mismo desplazamiento son
+    contiguas y se copian como un solo bloque.
+    """
+    height, width = gray.shape
+    shifts = np.rint((np.arange(width) - width / 2) * np.tan(np.radians(angle))).astype(np.int64)
+    cuts = np.flatnonzero(np.diff(shifts)) + 1
+    result = np.full_like(gray, 255)
+    for start, end in zip(np.r_[0, cuts], np.r_[cuts, width]):
+        shift = int(shifts[start])
+        if abs(shift) >= height:
+            continue
+        if shift >= 0:
+            result[:height - shift, start:end] = gray[shift:, start:end]
+        else:
+            result[-shift:, start:end] = gray[:height + shift, start:end]
+    return result
+
+
+def _mean_ocr_confidence(results) -> Optional[float]:
+    """Confianza media (0-1) de las detecciones de EasyOCR, o None si no detectó texto"""
+    confidences = [result[2] for result in results if result[1].strip()]
+    return sum(confidences) / len(confidences) if confidences else None
+
+
+OCR_CACHE_DIR = str(Path.home() / '.cache' / 'edos-ocr')  # Caché de OCR por página, compartida con los scripts de extracción
+OCR_CACHE_MAX_MB = 1024  # Al superarlo se borran las páginas usadas hace más tiempo
+OCR_CACHE_VERSION = "1"  # Formato de las entradas (el mismo que VERSION_CACHE_OCR de los scripts de extracción)
+OCR_CACHE_ENGINE = 'easyocr'
+OCR_CACHE_LANG = 'es'
+# Páginas que los scripts de extracción ya reconocieron con Tesseract, (motor, DPI) en orden
+# de preferencia; dejarla vacía para reconocer siempre con EasyOCR
+STAGE2_OCR_ENTRIES = (('tesseract-preprocesado', 300), ('tesseract', 300),
+                      ('tesseract-preprocesado', 200), ('tesseract', 200))
+STAGE2_OCR_LANG = 'spa+eng'
+
+
+class OCRCache:
+    """
+    Caché en disco del OCR de cada página, con tamaño máximo; mismo formato y carpeta que
+    CacheOCR de los scripts de extracción. Cada entrada guarda el texto y las cajas
+    reconocidas de una página, indexada por (SHA-256 del PDF, página desde 1, DPI, motor,
+    idiomas), en su propio archivo (<directorio>/<versión>/<clave[:2]>/<clave>.json)
+    escrito de forma atómica. Leer una entrada actualiza su fecha de modificación y,
+    cuando el total pasa del máximo, se borran las usadas hace más tiempo (LRU) hasta
+    dejarlo en el 90%; con varios procesos el límite es aproximado.
+    """
+
+    def __init__(self, directory, max_mb: int = OCR_CACHE_MAX_MB):
+        self.base_directory = str(directory)
+        self.directory = Path(directory) / OCR_CACHE_VERSION
+        self.max_mb = max_mb
+        self._current_size = None  # Bytes ocupados; se miden al guardar la primera entrada
+
+    def _path(self, fields: Tuple) -> Path:
+        key = hashlib.sha256(json.dumps(list(fields)).encode('utf-8')).hexdigest()
+        return self.directory / key[:2] / f"{key}.json"
+
+    def contains(self, fields: Tuple) -> bool:
+        return self._path(fields).exists()
+
+    def get(self, fields: Tuple) -> Optional[Dict]:
+        """Entrada de la página ({'clave', 'texto', 'cajas'}), o None si no se ha reconocido"""
+        path = self._path(fields)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            os.utime(path)  # Recién usada: será de las últimas en borrarse
+        except (OSError, ValueError):
+            return None
+        return entry if entry.get('clave') == list(fields) else None
+
+    def put(self, fields: Tuple, text: str, boxes):
+        path = self._path(fields)
+        temporary = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(temporary, 'w', encoding='utf-8') as f:
+                # Las coordenadas y confianzas de EasyOCR pueden venir como tipos de NumPy
+                json.dump({'clave': list(fields), 'texto': text, 'cajas': boxes}, f,
+                          ensure_ascii=False, separators=(',', ':'), default=lambda value: value.tolist())
+            os.replace(temporary, path)
+            if self._current_size is None:
+                self._current_size = sum(size for _, size, _ in self._entries())
+            else:
+                self._current_size += path.stat().st_size
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning(f"No se pudo guardar el OCR en caché: {e}")
+            return
+        if self._current_size > self.max_mb * 1024 * 1024:
+            self._evict()
+
+    def _entries(self) -> List[Tuple[float, int, str]]:
+        """(fecha de último uso, tamaño, ruta) de cada entrada guardada"""
+        entries = []
+        for subdirectory in os.scandir(self.directory):
+            if not subdirectory.is_dir():
+                continue
+            for file in os.scandir(subdirectory.path):
+                if file.name.endswith('.json'):
+                    try:
+                        info = file.stat()
+                    except OSError:
+                        continue  # Otro proceso la acaba de borrar
+                    entries.append((info.st_mtime, info.st_size, file.path))
+        return entries
+
+    def _evict(self):
+        """Borra las entradas usadas hace más tiempo hasta dejar la caché en el 90% del máximo"""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        limit = self.max_mb * 1024 * 1024 * 0.9
+        for _, size, path in entries:
+            if total <= limit:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+        self._current_size = total
+
+
+_ocr_cache = None  # Caché de OCR de este proceso (None = desactivada); ver configure_ocr_cache
+
+
+def configure_ocr_cache(directory: Optional[str]):
+    """Activa en este proceso la caché de OCR por página (con directory None la desactiva)"""
+    global _ocr_cache
+    _ocr_cache = OCRCache(directory) if directory else None
+
+
+def _pdf_sha256(pdf_path) -> Optional[str]:
+    """SHA-256 de los bytes del PDF, para las claves de la caché de OCR (None si está desactivada)"""
+    if _ocr_cache is None:
+        return None
+    sha = hashlib.sha256()
+    with open(pdf_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def _ocr_cache_fields(pdf_hash: Optional[str], page, zoom: float) -> Optional[Tuple]:
+    """Clave de la página en la caché de OCR con ese zoom, o None si no hay caché"""
+    if _ocr_cache is None or pdf_hash is None:
+        return None
+    return (pdf_hash, page.number + 1, round(72 * zoom), OCR_CACHE_ENGINE, OCR_CACHE_LANG)
+
+
+def _stage2_ocr_text(pdf_hash: Optional[str], page) -> Optional[str]:
+    """Texto de la página que ya reconoció Tesseract en los scripts de extracción, o None"""
+    if _ocr_cache is None or pdf_hash is None:
+        return None
+    for engine, dpi in STAGE2_OCR_ENTRIES:
+        entry = _ocr_cache.get((pdf_hash, page.number + 1, dpi, engine, STAGE2_OCR_LANG))
+        if entry is not None:
+            return entry['texto']
+    return None
+
+
+def _paragraphs_text(results) -> str:
+    """Texto de las detecciones agrupado en párrafos, igual que readtext(paragraph=True)"""
+    paragraphs = get_paragraph(results) if results else []
+    return '\n'.join([result[1] for result in paragraphs])
+
+
+def _readtext_pages(reader, images: List[np.ndarray]) -> List[list]:
+    """
+    readtext de EasyOCR para varias páginas, en el mismo orden. Las imágenes del mismo
+    tamaño (lo normal entre las páginas de un documento) se reconocen juntas con
+    readtext_batched, que pasa todas por el detector de texto en una sola llamada;
+    readtext_batched no admite tamaños distintos, así que cada tamaño va aparte.
+    """
+    results = [None] * len(images)
+    groups = {}
+    for i, image in enumerate(images):
+        groups.setdefault(image.shape, []).append(i)
+
+    for indexes in groups.values():
+        if len(indexes) == 1:
+            batch = [reader.readtext(images[indexes[0]])]
+        else:
+            batch = reader.readtext_batched([images[i] for i in indexes])
+        for i, page_results in zip(indexes, batch):
+            results[i] = page_results
+    return results
+
+
+def _read_pages(get_reader, pages: list, zoom: float, pdf_hash: Optional[str]) -> List[list]:
+    """
+    Detecciones de EasyOCR (caja, texto, confianza) de cada página con ese zoom, en el mismo
+    orden. Las páginas que ya se reconocieron se toman de la caché de OCR; las demás se
+    reconocen juntas con _readtext_pages y se guardan.
+    """
+    fields = [_ocr_cache_fields(pdf_hash, page, zoom) for page in pages]
+    entries = [_ocr_cache.get(page_fields) if page_fields is not None else None for page_fields in fields]
+    results = [entry['cajas'] if entry is not None else None for entry in entries]
+
+    pending = [i for i, entry in enumerate(entries) if entry is None]
+    if pending:
+        images = [_page_to_ocr_array(pages[i], zoom) for i in pending]
+        for i, page_results in zip(pending, _readtext_pages(get_reader(), images)):
+            results[i] = page_results
+            if fields[i] is not None:
+                _ocr_cache.put(fields[i], _paragraphs_text(page_results), page_results)
+    return results
+
+
+def _ocr_pages_adaptive(get_reader, pages: list, pdf_hash: Optional[str] = None) -> List[Tuple[str, bool]]:
+    """
+    Aplica EasyOCR a varias páginas, primero con OCR_ZOOM_INITIAL; las que quedan con una
+    confianza media por debajo de OCR_MIN_CONFIDENCE se repiten con OCR_ZOOM y cada una se
+    queda con la pasada de mejor confianza. En cada pasada las páginas se reconocen
+    juntas (_read_pages). El texto se agrupa en párrafos igual que con
+    readtext(paragraph=True), que no devuelve la confianza.
+    Con la caché de OCR (pdf_hash), las pasadas ya hechas se toman de ella, y una página
+    que EasyOCR no ha visto pero que ya reconocieron los scripts de extracción se queda
+    con el texto de Tesseract. get_reader devuelve el lector de EasyOCR y solo se llama si
+    hay que reconocer algo, así un documento que ya está en la caché no carga el modelo.
+    Retorna, por página y en el mismo orden: (texto de la página, si se repitió con OCR_ZOOM)
+    """
+    outcomes = [None] * len(pages)
+    pending = []
+    for i, page in enumerate(pages):
+        fields = _ocr_cache_fields(pdf_hash, page, OCR_ZOOM_INITIAL)
+        if fields is not None and not _ocr_cache.contains(fields):
+            stage2_text = _stage2_ocr_text(pdf_hash, page)
+            if stage2_text is not None:
+                outcomes[i] = (stage2_text, False)
+                continue
+        pending.append(i)
+
+    retry = []  # (posición, detecciones, confianza) de las páginas con confianza baja
+    first_pass = _read_pages(get_reader, [pages[i] for i in pending], OCR_ZOOM_INITIAL, pdf_hash)
+    for i, results in zip(pending, first_pass):
+        confidence = _mean_ocr_confidence(results) if OCR_ZOOM_INITIAL < OCR_ZOOM else None
+        if confidence is not None and confidence < OCR_MIN_CONFIDENCE:
+            retry.append((i, results, confidence))
+        else:
+            outcomes[i] = (_paragraphs_text(results), False)
+
+    second_pass = _read_pages(get_reader, [pages[i] for i, _, _ in retry], OCR_ZOOM, pdf_hash)
+    for (i, results, confidence), results_high in zip(retry, second_pass):
+        if (_mean_ocr_confidence(results_high) or 0) >= confidence:
+            results = results_high
+        outcomes[i] = (_paragraphs_text(results), True)
+
+    return outcomes
+
+
+def _ocr_page_adaptive(get_reader, page, pdf_hash: Optional[str] = None) -> Tuple[str, bool]:
+    """Igual que _ocr_pages_adaptive, para una sola página"""
+    return _ocr_pages_adaptive(get_reader, [page], pdf_hash)[0]
+
+
+def _init_ocr_worker(torch_threads: int, ocr_cache_dir: Optional[str] = None):
+    """Prepara cada proceso del pool de OCR: hilos de torch y caché de OCR"""
+    try:
+        import torch
+        # Repartir los núcleos entre los procesos en lugar de que cada uno los use todos
+        torch.set_num_threads(torch_threads)
+    except ImportError:
+        pass
+    configure_ocr_cache(ocr_cache_dir)
+
+
+def _ocr_page_worker(pdf_path: str, page_num: int, pdf_hash: Optional[str] = None) -> Tuple[str, bool]:
+    """Aplica EasyOCR a una página del PDF (trabajo del pool de OCR)
+
+    Cada proceso abre el PDF y genera la imagen de su página, así las imágenes
+    no tienen que viajar entre procesos.
+    Retorna: (texto de la página, si se repitió con OCR_ZOOM)
+    """
+    pdf_document = fitz.open(pdf_path)
+    try:
+        return _ocr_page_adaptive(get_ocr_reader, pdf_document[page_num], pdf_hash)
+    finally:
+        pdf_document.close()
+
+
+TABLE_MIN_RULINGS = 2  # Trazos horizontales y verticales mínimos de una página para buscar tablas con bordes en ella
+TABULA_FALLBACK = False  # Buscar tablas con tabula-py (Java, vuelve a leer todo el PDF) si PyMuPDF no encuentra ninguna
+IMAGE_PAGE_COVERAGE = 0.8  # Fracción de la página cubierta por imágenes a partir de la cual es una página escaneada
+OCR_MAX_PAGES = 50  # Páginas de un documento que pasan por OCR, como mucho (es lento)
+METADATA_TEXT_CHARS = 15000  # Caracteres del inicio del documento que se extraen para fechas y status (la ventana más grande que leen)
+
+
+TITLE_MATCH_THRESHOLD = 0.92  # Similitud mínima (SequenceMatcher) para aceptar un título que no es idéntico
+TITLE_MAX_LENGTH_DIFF = 0.25  # Diferencia de longitud máxima entre un título y los parecidos
+VERSION_WORDS = {'parte', 'tomo', 'volumen', 'seccion', 'libro', 'i', 'ii', 'iii', 'iv', 'v', '1', '2', '3', '4', '5'}  # Palabras que indican versiones/partes diferentes
+MATCH_REPORT_NAME = 'matching.csv'  # Reporte del matching de títulos de process_all_pdfs, en la carpeta de salida
+
+
+def _trigrams(text: str) -> Counter:
+    """Trigramas de caracteres del texto, con sus repeticiones"""
+    return Counter(text[i:i + 3] for i in range(len(text) - 2))
+
+
+def _has_version_words(normalized: str) -> bool:
+    """Si el título normalizado tiene palabras de versión/parte (VERSION_WORDS)"""
+    return bool(set(normalized.split()) & VERSION_WORDS)
+
+
+class TitleIndex:
+    """
+    Índice de los títulos de un JSON (contenidos, URLs o metadatos) para buscar el
+    registro de un documento sin comparar su título contra todos.
+
+    Los títulos se normalizan una sola vez, al cargar el JSON. La búsqueda da el mismo
+    resultado que recorrer el JSON en orden: el primer título normalizado idéntico y,
+    si no hay, el de mayor similitud por encima de TITLE_MATCH_THRESHOLD (el primero
+    del JSON si hay empate), con la regla de longitud y la de palabras de versión.
+    SequenceMatcher solo se calcula para los títulos que pueden superar el umbral.
+
+    Con assign() todos los PDFs se emparejan de una vez, uno a uno, y desde entonces
+    find_exact y best_match devuelven, con el título de cada PDF, su asignación.
+    """
+
+    def __init__(self, items: Optional[List[Dict[str, Any]]], get_title, normalize):
+        self.entries = []  # (registro, título, título normalizado), en el orden del JSON
+        self.exact = defaultdict(list)  # título normalizado -> posiciones
+        self.assigned = {}  # título del PDF -> (posición, similitud) o None, de assign()
+        self.trigrams = []  # Trigramas de cada título normalizado
+        self.by_length = defaultdict(list)  # longitud normalizada -> posiciones
+        self.postings = defaultdict(list)  # trigrama -> posiciones de los títulos que lo tienen
+
+        for item in items or []:
+            title = get_title(item)
+            if not title:
+                continue
+            normalized = normalize(title)
+            pos = len(self.entries)
+            self.entries.append((item, title, normalized))
+            self.exact[normalized].append(pos)
+            self.trigrams.append(_trigrams(normalized))
+            self.by_length[len(normalized)].append(pos)
+            for gram in self.trigrams[pos]:
+                self.postings[gram].append(pos)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def find_exact(self, normalized: str, title: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Registro del primer título normalizado idéntico, o None. Si assign() emparejó
+        el PDF con título `title`, solo su registro asignado, si es idéntico.
+        """
+        if title in self.assigned:
+            match = self.assigned[title]
+            if match and self.entries[match[0]][2] == normalized:
+                return self.entries[match[0]][0]
+            return None
+
+        positions = self.exact.get(normalized)
+        return self.entries[positions[0]][0] if positions else None
+
+    def candidates(self, normalized: str) -> List[int]:
+        """
+        Posiciones, en orden, de los títulos que pueden superar TITLE_MATCH_THRESHOLD.
+
+        ratio() de SequenceMatcher es 2M/T, con M caracteres coincidentes en k bloques
+        y T la suma de las longitudes. Así que hace falta una longitud que cumpla
+        2·min(longitudes)/T > umbral. Además, dos bloques seguidos están separados por
+        algún carácter sin pareja (k - 1 <= T - 2M), y los bloques comparten al menos
+        M - 2k trigramas: un título que pasa el umbral comparte más de
+        (2.5·umbral - 2)·T - 2 trigramas con el buscado.
+        """
+        len_a = len(normalized)
+        query = _trigrams(normalized)
+
+        lengths = set()
+        for len_b in self.by_length:
+            # Rechazar si la diferencia de longitud es mayor al 25%
+            if abs(len_a - len_b) / max(len_a, len_b) > TITLE_MAX_LENGTH_DIFF:
+                continue
+            if 2 * min(len_a, len_b) / (len_a + len_b) <= TITLE_MATCH_THRESHOLD:
+                continue
+            lengths.add(len_b)
+        if not lengths:
+            return []
+
+        min_shared = lambda len_b: (2.5 * TITLE_MATCH_THRESHOLD - 2) * (len_a + len_b) - 2
+        needed = math.ceil(min_shared(min(lengths)))
+        if needed <= 0:
+            # Títulos tan cortos que los trigramas no descartan ninguno
+            return sorted(pos for len_b in lengths for pos in self.by_length[len_b])
+
+        # Un título con `needed` trigramas en común comparte alguno de los más raros del
+        # buscado (los primeros sum - needed + 1): solo se recorren las listas de esos
+        remaining = sum(query.values()) - needed + 1
+        found = set()
+        for gram in sorted(query, key=lambda gram: len(self.postings.get(gram, ()))):
+            if remaining <= 0:
+                break
+            found.update(self.postings.get(gram, ()))
+            remaining -= query[gram]
+
+        # Trigramas en común, contando cada repetición del buscado como posible: una
+        # cota que solo deja de más, y las intersecciones de conjuntos son rápidas
+        query_grams = query.keys()
+        repeated = sum(query.values()) - len(query)
+        positions = []
+        for pos in found:
+            len_b = len(self.entries[pos][2])
+            if len_b not in lengths:
+                continue
+            if len(query_grams & self.trigrams[pos].keys()) + repeated >= min_shared(len_b):
+                positions.append(pos)
+        return sorted(positions)
+
+    def best_match(self, normalized: str, title: Optional[str] = None) -> Optional[Tuple[Dict[str, Any], str, float]]:
+        """
+        (registro, título, similitud) del título más parecido por encima de
+        TITLE_MATCH_THRESHOLD, o None. Se rechazan los que tienen palabras de versión
+        (VERSION_WORDS) y el buscado no, o al revés. Si assign() emparejó el PDF con
+        título `title`, solo su registro asignado, si no es idéntico.
+        """
+        if title in self.assigned:
+            match = self.assigned[title]
+            if match and self.entries[match[0]][2] != normalized:
+                pos, ratio = match
+                return self.entries[pos][0], self.entries[pos][1], ratio
+            return None
+
+        if not normalized:
+            return None
+
+        best = None
+        best_ratio = 0
+        tiene_version_titulo = _has_version_words(normalized)
+
+        for pos in self.candidates(normalized):
+            item, title, candidate = self.entries[pos]
+            matcher = SequenceMatcher(None, normalized, candidate)
+            # quick_ratio() es una cota de ratio() que no hace falta superar si no llega
+            if matcher.quick_ratio() <= max(best_ratio, TITLE_MATCH_THRESHOLD):
+                continue
+
+            # Calcular similaridad para encontrar el mejor match
+            ratio = matcher.ratio()
+            if ratio > best_ratio and ratio > TITLE_MATCH_THRESHOLD:
+                # Si uno tiene palabras de versión y el otro no, rechazar el match
+                if _has_version_words(candidate) != tiene_version_titulo:
+                    continue
+                best_ratio = ratio
+                best = (item, title, ratio)
+
+        return best
+
+    def assign(self, titles: Dict[str, str]) -> Dict[str, Optional[Tuple[int, float]]]:
+        """
+        Empareja uno a uno los PDFs ({título del PDF: título normalizado}, en orden) con
+        los registros del índice, para que dos PDFs no tomen el mismo registro aunque sus
+        títulos se normalicen igual. Los pares posibles son los de find_exact y
+        best_match (idénticos, o por encima del umbral con las mismas reglas), y se
+        asignan en orden: primero los idénticos, luego de mayor a menor similitud y, con
+        empate, el primer PDF y el primer registro. Un PDF cuyo mejor registro ya se
+        asignó toma el siguiente que le quede: el segundo PDF con el mismo título
+        normalizado toma el segundo registro idéntico, si el JSON lo tiene.
+        Retorna: {título del PDF: (posición del registro, similitud) o None}
+        """
+        pdf_titles = list(titles)
+        pairs = []  # (0 idéntico / 1 parecido, -similitud, orden del PDF, posición)
+        similar = {}  # título normalizado -> [(similitud, posición)], calculado una vez
+
+        for order, title in enumerate(pdf_titles):
+            normalized = titles[title]
+            # Un PDF con registros idénticos solo toma uno de ellos: los idénticos se
+            # asignan primero y ningún otro título es idéntico a los mismos registros
+            if normalized in self.exact:
+                for pos in self.exact[normalized]:
+                    pairs.append((0, -1.0, order, pos))
+                continue
+            if not normalized:
+                continue
+
+            if normalized not in similar:
+                similar[normalized] = []
+                tiene_version_titulo = _has_version_words(normalized)
+                for pos in self.candidates(normalized):
+                    candidate = self.entries[pos][2]
+                    if candidate == normalized:
+                        continue
+                    matcher = SequenceMatcher(None, normalized, candidate)
+                    if matcher.quick_ratio() <= TITLE_MATCH_THRESHOLD:
+                        continue
+                    ratio = matcher.ratio()
+                    if ratio > TITLE_MATCH_THRESHOLD and _has_version_words(candidate) == tiene_version_titulo:
+                        similar[normalized].append((ratio, pos))
+            for ratio, pos in similar[normalized]:
+                pairs.append((1, -ratio, order, pos))
+
+        self.assigned = dict.fromkeys(pdf_titles)
+        taken = set()
+        for _, negative_ratio, order, pos in sorted(pairs):
+            if self.assigned[pdf_titles[order]] is None and pos not in taken:
+                self.assigned[pdf_titles[order]] = (pos, -negative_ratio)
+                taken.add(pos)
+        return self.assigned
+
+
+class PdfDocument:
+    """
+    Un PDF abierto una sola vez con PyMuPDF para todo process_single_pdf.
+
+    Lo que usan los detectores (número de páginas, metadatos, texto de cada página,
+    imágenes, cobertura de imagen y trazos de tablas) se calcula la primera vez que
+    se pide y se guarda, así que cada dato sale de una sola lectura del archivo. El
+    archivo se abre con el primer acceso, y los errores de apertura aparecen en el
+    detector que lo pidió, igual que cuando cada uno abría el PDF por su cuenta.
+    """
+
+    def __init__(self, pdf_path):
+        self.path = Path(pdf_path)
+        self._document = None
+        self._pages = {}
+        self._texts = {}
+        self._image_counts = {}
+        self._image_coverages = {}
+        self._rulings = {}
+        self._sha256 = None
+
+    @property
+    def document(self):
+        """Documento de PyMuPDF (fitz.Document)"""
+        if self._document is None:
+            self._document = fitz.open(str(self.path))
+        return self._document
+
+    def close(self):
+        """Cierra el archivo, si se llegó a abrir"""
+        if self._document is not None:
+            self._pages.clear()
+            self._document.close()
+            self._document = None
+
+    @property
+    def page_count(self) -> int:
+        return self.document.page_count
+
+    @property
+    def metadata(self) -> Dict[str, Any]:
+        """Metadatos del PDF (creationDate, modDate, author, ...)"""
+        return self.document.metadata or {}
+
+    def page(self, page_num: int):
+        """Página de PyMuPDF (base 0); se carga una sola vez"""
+        if page_num not in self._pages:
+            self._pages[page_num] = self.document[page_num]
+        return self._pages[page_num]
+
+    def page_text(self, page_num: int) -> str:
+        """Capa de texto de la página (page.get_text())"""
+        if page_num not in self._texts:
+            self._texts[page_num] = self.page(page_num).get_text()
+        return self._texts[page_num]
+
+    def page_nums(self, max_pages: Optional[int] = None) -> range:
+        """Páginas (base 0) del documento, o solo las primeras max_pages"""
+        return range(min(self.page_count, max_pages) if max_pages else self.page_count)
+
+    def text(self, max_chars: Optional[int] = None) -> str:
+        """
+        Capa de texto del documento; con max_chars, solo las páginas necesarias para
+        reunir esos caracteres (las siguientes no se leen)
+        """
+        page_texts = []
+        length = 0
+        for page_num in self.page_nums():
+            if max_chars and length >= max_chars:
+                break
+            page_texts.append(self.page_text(page_num))
+            length += len(page_texts[-1])
+        return ''.join(page_texts)
+
+    def is_scanned_page(self, page_num: int) -> bool:
+        """
+        Página sin capa de texto: menos de 100 caracteres y alguna imagen, el criterio
+        de detect_if_scanned
+        """
+        return len(self.page_text(page_num).strip()) < 100 and self.image_count(page_num) > 0
+
+    def image_count(self, page_num: int) -> int:
+        """Número de imágenes de la página (page.get_images())"""
+        if page_num not in self._image_counts:
+            self._image_counts[page_num] = len(self.page(page_num).get_images())
+        return self._image_counts[page_num]
+
+    def image_coverage(self, page_num: int) -> float:
+        """Fracción del área de la página cubierta por imágenes (0-1)"""
+        if page_num not in self._image_coverages:
+            page = self.page(page_num)
+            covered = 0.0
+            for info in page.get_image_info():
+                covered += abs(fitz.Rect(info['bbox']) & page.rect)
+            self._image_coverages[page_num] = min(1.0, covered / abs(page.rect)) if abs(page.rect) else 0.0
+        return self._image_coverages[page_num]
+
+    def ruling_lines(self, page_num: int) -> Tuple[int, int]:
+        """
+        (horizontales, verticales): trazos rectos de la página, los que forman los bordes
+        de una tabla. Cada rectángulo cuenta como sus cuatro lados, salvo los muy
+        delgados, que se dibujan como una línea.
+        """
+        if page_num not in self._rulings:
+            horizontal = vertical = 0
+            for path in self.page(page_num).get_drawings():
+                for item in path['items']:
+                    if item[0] == 'l':
+                        start, end = item[1], item[2]
+                        if abs(end.y - start.y) <= abs(end.x - start.x):
+                            horizontal += 1
+                        else:
+                            vertical += 1
+                    elif item[0] in ('re', 'qu'):
+                        rect = item[1] if item[0] == 're' else item[1].rect
+                        if rect.height <= 1:
+                            horizontal += 1
+                        elif rect.width <= 1:
+                            vertical += 1
+                        else:
+                            horizontal += 2
+                            vertical += 2
+            self._rulings[page_num] = (horizontal, vertical)
+        return self._rulings[page_num]
+
+    def table_count(self, page_num: int) -> int:
+        """
+        Tablas de la página según page.find_tables() de PyMuPDF (el algoritmo de
+        pdfplumber). Una tabla con bordes necesita al menos TABLE_MIN_RULINGS trazos en
+        cada dirección, así que las páginas con menos no se analizan.
+        """
+        horizontal, vertical = self.ruling_lines(page_num)
+        if horizontal < TABLE_MIN_RULINGS or vertical < TABLE_MIN_RULINGS:
+            return 0
+        return len(self.page(page_num).find_tables().tables)
+
+    def is_image_only(self) -> bool:
+        """Si todas las páginas están cubiertas por imágenes (PDF escaneado sin capa de texto útil)"""
+        return all(self.image_coverage(page_num) >= IMAGE_PAGE_COVERAGE for page_num in range(self.page_count))
+
+    def sha256(self) -> Optional[str]:
+        """SHA-256 del archivo para la caché de OCR (_pdf_sha256), calculado una vez"""
+        if self._sha256 is None:
+            self._sha256 = _pdf_sha256(self.path)
+        return self._sha256
+
+
 class ReglamentoProcessor:
     """Procesador especializado para Reglamentos y Leyes Federales Mexicanas"""
     
-    def __init__(self, input_folder: str, output_folder: str):
+    def __init__(self, input_folder: str, output_folder: str, ocr_workers: int = 1,
+                 ocr_cache_dir: Optional[str] = None, use_contenido_text: bool = False):
         """
         Inicializa el procesador con las rutas especificadas
 
@@ -52,12 +783,31 @@ class ReglamentoProcessor:
         self.output_folder.mkdir(parents=True, exist_ok=True)
         logger.info(f"Carpeta de salida: {self.output_folder}")
         
-        # Inicializar EasyOCR (solo si se necesita)
+        # Lector de EasyOCR compartido por todo el proceso (se pide solo si se necesita)
         self.ocr_reader = None
 
+        # Procesos de OCR en paralelo para PDFs escaneados (1 = secuencial); el pool
+        # se crea al primer escaneado y se comparte entre todos los documentos
+        self.ocr_workers = max(1, ocr_workers)
+        self.ocr_pool = None
+
+        # Caché de OCR por página, compartida con los scripts de extracción (None = sin caché)
+        self.ocr_cache_dir = ocr_cache_dir
+        configure_ocr_cache(ocr_cache_dir)
+
+        # Tomar el texto para fechas y status del contenido de la extracción en lugar de
+        # volver a extraer el PDF completo (ver process_single_pdf)
+        self.use_contenido_text = use_contenido_text
+
+        # Estadísticas del OCR adaptativo en esta corrida
+        self.ocr_pages_done = 0
+        self.ocr_pages_upgraded = 0
+
         # Ruta del JSON con contenidos
         self.contenido_json_path = Path(r"C:\Users\julii\Documents\Practicas\drive\AGUAS\contenido\Convenio\Convenio-contenido.json")#contenidos de los PDFs
         self.contenido_data = None
+        self.contenido_index = None  # Índice de los títulos de contenido_data (TitleIndex)
+        self.contenido_matches = {}  # Registro de contenido encontrado para cada título (find_contenido_record)
         
         # Patrones regex para extraer información específica
         self.patterns = {
@@ -70,18 +820,19 @@ class ReglamentoProcessor:
         }
     
     def init_ocr(self):
-        """Inicializa EasyOCR solo cuando es necesario"""
+        """Devuelve el lector de EasyOCR del proceso (get_ocr_reader), que se carga solo cuando es necesario"""
         if self.ocr_reader is None:
-            logger.info("Inicializando EasyOCR...")
-            self.ocr_reader = easyocr.Reader(['es'], gpu=False)
-            logger.info("EasyOCR inicializado correctamente")
+            self.ocr_reader = get_ocr_reader()
+        return self.ocr_reader
 
     def load_contenido_data(self):
         """Carga el JSON con los contenidos de los reglamentos"""
+        self.contenido_matches = {}
         try:
             if self.contenido_json_path.exists():
                 with open(self.contenido_json_path, 'r', encoding='utf-8') as f:
                     self.contenido_data = json.load(f)
+                self.contenido_index = TitleIndex(self.contenido_data, lambda item: item.get('TITULO') or item.get('titulo') or item.get('Titulo', ''), self.normalize_text)
                 logger.info(f"Cargados {len(self.contenido_data)} contenidos desde {self.contenido_json_path.name}")
                 return True
             else:
@@ -121,65 +872,47 @@ class ReglamentoProcessor:
         """
         Busca el contenido correspondiente al título del documento en juridico_docs.json
         Retorna el contenido si encuentra match, None si no
+        process_single_pdf lo usa para el texto y process_all_pdfs para el campo Contenido
         """
-        if not self.contenido_data or not titulo:
+        item = self.find_contenido_record(titulo)
+        if item is None:
             return None
+        # Buscar el campo "contenido" (cualquier variación)
+        return item.get('contenido') or item.get('Contenido') or item.get('CONTENIDO')
 
-        titulo_normalizado = self.normalize_text(titulo)
-        best_match = None
-        best_ratio = 0
-        best_contenido = None
-
-        for item in self.contenido_data:
-            # Obtener el título del JSON de contenidos - Buscar con "TITULO" (mayúsculas o minúsculas)
-            titulo_json = item.get('TITULO') or item.get('titulo') or item.get('Titulo', '')
-            if not titulo_json:
-                continue
-
-            titulo_json_normalizado = self.normalize_text(titulo_json)
-
-            # Primero intentar match exacto
-            if titulo_normalizado == titulo_json_normalizado:
-                logger.info(f"Match exacto de contenido encontrado: {titulo[:50]}...")
-                # Buscar el campo "contenido" (cualquier variación)
-                return item.get('contenido') or item.get('Contenido') or item.get('CONTENIDO')
-
-            # Calcular diferencia de longitud entre títulos
-            len_diff = abs(len(titulo_normalizado) - len(titulo_json_normalizado))
-            len_ratio = len_diff / max(len(titulo_normalizado), len(titulo_json_normalizado))
-
-            # Rechazar si la diferencia de longitud es mayor al 25%
-            if len_ratio > 0.25:
-                continue
-
-            # Calcular similaridad para encontrar el mejor match
-            ratio = SequenceMatcher(None, titulo_normalizado, titulo_json_normalizado).ratio()
-
-            # Aumentar umbral a 92% para mayor precisión
-            if ratio > best_ratio and ratio > 0.92:
-                # Verificar que no tenga palabras únicas problemáticas
-                palabras_titulo = set(titulo_normalizado.split())
-                palabras_json = set(titulo_json_normalizado.split())
-
-                # Palabras que indican versiones/partes diferentes
-                palabras_version = {'parte', 'tomo', 'volumen', 'seccion', 'libro', 'i', 'ii', 'iii', 'iv', 'v', '1', '2', '3', '4', '5'}
-
-                # Verificar si hay palabras de versión en uno pero no en el otro
-                tiene_version_titulo = bool(palabras_titulo & palabras_version)
-                tiene_version_json = bool(palabras_json & palabras_version)
+    def find_contenido_record(self, titulo: str) -> Optional[Dict[str, Any]]:
+        """
+        Registro de la extracción (Titulo, contenido, paginas_ocr) que corresponde al título,
+        o None. La búsqueda se hace una vez por título
+        """
+        if titulo not in self.contenido_matches:
+            self.contenido_matches[titulo] = self.search_contenido(titulo)
+        return self.contenido_matches[titulo]
 
-                # Si uno tiene palabras de versión y el otro no, rechazar el match
-                if tiene_version_titulo != tiene_version_json:
-                    continue
+    def search_contenido(self, titulo: str) -> Optional[Dict[str, Any]]:
+        """
+        Búsqueda de find_contenido_record en el índice de títulos (contenido_index):
+        match exacto o, si no, el más parecido por encima del 92% de similitud
+        """
+        if not self.contenido_index or not titulo:
+            return None
 
-                best_ratio = ratio
-                best_match = titulo_json
-                # Buscar el campo "contenido" (cualquier variación)
-                best_contenido = item.get('contenido') or item.get('Contenido') or item.get('CONTENIDO')
+        titulo_normalizado = self.normalize_text(titulo)
 
-        if best_contenido:
-            logger.info(f"Mejor match de contenido encontrado (similaridad {best_ratio:.2%}): {titulo[:50]}... -> {best_match[:50]}...")
-            return best_contenido
+        # Primero intentar match exacto
+        item = self.contenido_index.find_exact(titulo_normalizado, titulo)
+        if item is not None:
+            logger.info(f"Match exacto de contenido encontrado: {titulo[:50]}...")
+            return item
+
+        # Si no, el más parecido entre los títulos que pueden superar el umbral (TitleIndex)
+        match = self.contenido_index.best_match(titulo_normalizado, titulo)
+        if match:
+            item, best_match, best_ratio = match
+            # Solo cuenta si tiene el campo "contenido" (cualquier variación)
+            if item.get('contenido') or item.get('Contenido') or item.get('CONTENIDO'):
+                logger.info(f"Mejor match de contenido encontrado (similaridad {best_ratio:.2%}): {titulo[:50]}... -> {best_match[:50]}...")
+                return item
 
         logger.warning(f"No se encontró contenido para: {titulo[:50]}...")
         return None
@@ -547,99 +1280,87 @@ class ReglamentoProcessor:
         logger.info("No se encontró indicación de 'TEXTO VIGENTE'")
         return False
     
-    def detect_if_scanned(self, pdf_path: Path) -> bool:
+    def detect_if_scanned(self, document: PdfDocument) -> bool:
         """
         Detecta si un PDF es escaneado con múltiples criterios mejorados
+        Todos los criterios leen la capa de texto y las imágenes del documento ya abierto
         """
         try:
             # Criterios para determinar si es escaneado
             text_threshold = 200  # Mínimo de caracteres para considerar que tiene texto
             words_threshold = 30   # Mínimo de palabras para considerar que tiene texto
             
-            # Método 1: Verificar con PyPDF2
-            with open(pdf_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                
-                # Revisar las primeras 5 páginas (más páginas = más precisión)
-                pages_to_check = min(5, len(pdf_reader.pages))
-                total_text = ""
-                readable_pages = 0
+            # Método 1: Cantidad de texto
+            # Revisar las primeras 5 páginas (más páginas = más precisión)
+            pages_to_check = min(5, document.page_count)
+            total_text = ""
+            readable_pages = 0
+            
+            for i in range(pages_to_check):
+                page_text = document.page_text(i)
+                if page_text:
+                    total_text += page_text
+                    # Contar palabras reales (no solo caracteres)
+                    words = len(page_text.split())
+                    if words > 20:  # Si una página tiene más de 20 palabras
+                        readable_pages += 1
+            
+            # Análisis del texto extraído
+            total_chars = len(total_text.strip())
+            total_words = len(total_text.split())
+            
+            # Es escaneado si:
+            # 1. Tiene muy pocos caracteres
+            # 2. Tiene muy pocas palabras
+            # 3. Menos del 40% de las páginas tienen texto legible
+            if total_chars < text_threshold or total_words < words_threshold:
+                logger.info(f"PDF escaneado detectado: {total_chars} caracteres, {total_words} palabras")
+                return True
+            
+            if pages_to_check > 0 and (readable_pages / pages_to_check) < 0.4:
+                logger.info(f"PDF escaneado detectado: solo {readable_pages}/{pages_to_check} páginas legibles")
+                return True
+            
+            # Método 2: Verificar calidad del texto
+            if document.page_count:
+                # Revisar primeras 2 páginas
+                check_pages = min(2, document.page_count)
+                text_quality_score = 0
                 
-                for i in range(pages_to_check):
-                    page = pdf_reader.pages[i]
-                    page_text = page.extract_text()
+                for i in range(check_pages):
+                    page_text = document.page_text(i)
                     if page_text:
-                        total_text += page_text
-                        # Contar palabras reales (no solo caracteres)
-                        words = len(page_text.split())
-                        if words > 20:  # Si una página tiene más de 20 palabras
-                            readable_pages += 1
-                
-                # Análisis del texto extraído
-                total_chars = len(total_text.strip())
-                total_words = len(total_text.split())
-                
-                # Es escaneado si:
-                # 1. Tiene muy pocos caracteres
-                # 2. Tiene muy pocas palabras
-                # 3. Menos del 40% de las páginas tienen texto legible
-                if total_chars < text_threshold or total_words < words_threshold:
-                    logger.info(f"PDF escaneado detectado: {total_chars} caracteres, {total_words} palabras")
-                    return True
+                        # Verificar si el texto tiene estructura coherente
+                        # (no solo símbolos o caracteres aleatorios)
+                        lines = page_text.split('\n')
+                        coherent_lines = 0
+                        for line in lines:
+                            # Una línea coherente tiene al menos 3 palabras
+                            if len(line.split()) >= 3:
+                                coherent_lines += 1
+                        
+                        if coherent_lines > 5:
+                            text_quality_score += 1
                 
-                if pages_to_check > 0 and (readable_pages / pages_to_check) < 0.4:
-                    logger.info(f"PDF escaneado detectado: solo {readable_pages}/{pages_to_check} páginas legibles")
+                # Si ninguna página tiene texto coherente, es escaneado
+                if text_quality_score == 0:
+                    logger.info("PDF escaneado detectado: texto sin estructura coherente")
                     return True
             
-            # Método 2: Verificar calidad del texto con pdfplumber
-            with pdfplumber.open(pdf_path) as pdf:
-                if pdf.pages:
-                    # Revisar primeras 2 páginas con pdfplumber
-                    check_pages = min(2, len(pdf.pages))
-                    text_quality_score = 0
-                    
-                    for i in range(check_pages):
-                        page_text = pdf.pages[i].extract_text()
-                        if page_text:
-                            # Verificar si el texto tiene estructura coherente
-                            # (no solo símbolos o caracteres aleatorios)
-                            lines = page_text.split('\n')
-                            coherent_lines = 0
-                            for line in lines:
-                                # Una línea coherente tiene al menos 3 palabras
-                                if len(line.split()) >= 3:
-                                    coherent_lines += 1
-                            
-                            if coherent_lines > 5:
-                                text_quality_score += 1
-                    
-                    # Si ninguna página tiene texto coherente, es escaneado
-                    if text_quality_score == 0:
-                        logger.info("PDF escaneado detectado: texto sin estructura coherente")
-                        return True
-            
-            # Método 3: Verificar con PyMuPDF para más precisión
-            pdf_document = fitz.open(str(pdf_path))
-            
-            # Verificar si las páginas contienen imágenes principalmente
+            # Método 3: Verificar si las páginas contienen imágenes principalmente
             image_pages = 0
             text_pages = 0
             
-            for page_num in range(min(3, pdf_document.page_count)):
-                page = pdf_document[page_num]
-                
+            for page_num in range(min(3, document.page_count)):
                 # Contar imágenes vs texto
-                image_list = page.get_images()
-                text = page.get_text()
+                text = document.page_text(page_num)
                 
                 # Si hay imágenes grandes y poco texto, probablemente es escaneado
-                if len(image_list) > 0 and len(text.strip()) < 100:
+                if document.image_count(page_num) > 0 and len(text.strip()) < 100:
                     image_pages += 1
                 elif len(text.strip()) > 100:
                     text_pages += 1
             
-            pdf_document.close()
-            
             # Si hay más páginas con imágenes que con texto, es escaneado
             if image_pages > text_pages:
                 logger.info(f"PDF escaneado detectado: {image_pages} páginas con imágenes vs {text_pages} con texto")
@@ -653,7 +1374,7 @@ class ReglamentoProcessor:
             # En caso de error, asumir que no es escaneado
             return False
     
-    def detect_tables(self, pdf_path: Path) -> Dict[str, Any]:
+    def detect_tables(self, document: PdfDocument) -> Dict[str, Any]:
         """
         Detecta si el PDF contiene tablas usando múltiples métodos
         """
@@ -665,20 +1386,19 @@ class ReglamentoProcessor:
         }
         
         try:
-            # Método 1: pdfplumber
-            with pdfplumber.open(pdf_path) as pdf:
-                for i, page in enumerate(pdf.pages):
-                    tables = page.extract_tables()
-                    if tables:
-                        tables_info['has_tables'] = True
-                        tables_info['table_count'] += len(tables)
-                        tables_info['pages_with_tables'].append(i + 1)
-                        tables_info['table_extraction_method'] = 'pdfplumber'
+            # Método 1: PyMuPDF (find_tables) solo en las páginas con trazos de tabla
+            for i in range(document.page_count):
+                table_count = document.table_count(i)
+                if table_count:
+                    tables_info['has_tables'] = True
+                    tables_info['table_count'] += table_count
+                    tables_info['pages_with_tables'].append(i + 1)
+                    tables_info['table_extraction_method'] = 'PyMuPDF'
             
-            # Método 2: tabula-py (si no se encontraron con pdfplumber)
-            if not tables_info['has_tables']:
+            # Método 2: tabula-py (si se activa y no se encontraron con PyMuPDF)
+            if TABULA_FALLBACK and not tables_info['has_tables']:
                 try:
-                    dfs = tabula.read_pdf(pdf_path, pages='all', silent=True)
+                    dfs = tabula.read_pdf(str(document.path), pages='all', silent=True)
                     if dfs:
                         tables_info['has_tables'] = True
                         tables_info['table_count'] = len(dfs)
@@ -691,78 +1411,163 @@ class ReglamentoProcessor:
         
         return tables_info
     
-    def extract_text_with_ocr(self, pdf_path: Path) -> str:
+    def extract_text_with_ocr(self, document: PdfDocument, max_chars: Optional[int] = None) -> str:
         """
-        Extrae texto usando OCR (EasyOCR) para PDFs escaneados
+        Extrae texto usando OCR (EasyOCR) para PDFs escaneados: todas las páginas (hasta
+        OCR_MAX_PAGES) pasan por OCR, y con max_chars solo las necesarias para reunir
+        esos caracteres
         """
-        text = ""
-        try:
-            self.init_ocr()  # Inicializar OCR solo cuando se necesita
-            
-            pdf_document = fitz.open(str(pdf_path))
-            
-            # Limitar páginas para OCR (es lento)
-            max_pages = min(pdf_document.page_count, 50)
-            
-            for page_num in range(max_pages):
-                try:
-                    logger.info(f"Procesando página {page_num + 1}/{max_pages} con OCR...")
-                    page = pdf_document[page_num]
-                    
-                    # Convertir página a imagen con buena resolución
-                    mat = fitz.Matrix(2, 2)  # Factor de zoom para mejor calidad
-                    pix = page.get_pixmap(matrix=mat)
-                    img_data = pix.tobytes("png")
-                    
-                    # Convertir a array numpy para EasyOCR
-                    img = Image.open(io.BytesIO(img_data))
-                    img_array = np.array(img)
-                    
-                    # Aplicar OCR
-                    results = self.ocr_reader.readtext(img_array, paragraph=True)
-                    
-                    # Extraer texto de los resultados
-                    if results:
-                        page_text = '\n'.join([result[1] for result in results])
-                        text += f"\n--- Página {page_num + 1} ---\n{page_text}"
-                
-                except Exception as page_error:
-                    logger.warning(f"Error procesando página {page_num + 1}: {page_error}")
-                    continue
-            
-            pdf_document.close()
-            
-        except Exception as e:
-            logger.error(f"Error crítico en OCR: {e}")
-            logger.info("Intentando método alternativo sin OCR...")
+        return self.extract_text_hybrid(document, max_chars, ocr_all=True)[0]
+
+    def iter_page_texts(self, document: PdfDocument, ocr_all: bool = False) -> Iterator[Tuple[int, str, bool]]:
+        """
+        Recorre el documento en orden y entrega (página base 0, texto, si pasó por OCR)
+        a medida que se piden las páginas: la capa de texto donde existe y OCR para las
+        páginas que son solo imagen (o para todas, con ocr_all), hasta OCR_MAX_PAGES.
+        El OCR se hace al llegar a una de esas páginas, en un lote con las que también
+        lo necesitan entre las siguientes OCR_BATCH_PAGES, así que las páginas que no se
+        llegan a pedir no se leen ni se reconocen.
+        """
+        batch_size = max(OCR_BATCH_PAGES, self.ocr_workers)
+        needs_ocr = lambda page_num: ocr_all or document.is_scanned_page(page_num)
+        ocr_texts = {}
+        ocr_count = 0
+
+        for page_num in document.page_nums():
+            if page_num not in ocr_texts and ocr_count < OCR_MAX_PAGES and needs_ocr(page_num):
+                # Lote: esta página y las que también necesitan OCR entre las siguientes
+                window = range(page_num, min(page_num + batch_size, document.page_count))
+                batch_nums = [n for n in window if n not in ocr_texts and needs_ocr(n)][:OCR_MAX_PAGES - ocr_count]
+                ocr_count += len(batch_nums)
+                # Las páginas que fallan quedan con su capa de texto
+                ocr_texts.update((n, '') for n in batch_nums)
+                ocr_texts.update(self.ocr_pages(document, batch_nums))
+
+            if page_num in ocr_texts:
+                ocr_text = ocr_texts.pop(page_num)
+                if ocr_text:
+                    yield page_num, f"\n--- Página {page_num + 1} ---\n{ocr_text}\n", True
+                else:
+                    yield page_num, document.page_text(page_num), True
+            else:
+                yield page_num, document.page_text(page_num), False
+
+    def ocr_pages(self, document: PdfDocument, page_nums: List[int]) -> List[Tuple[int, str]]:
+        """
+        Aplica OCR a las páginas indicadas (base 0, en orden) y devuelve (página, texto)
+        en ese mismo orden; se reconocen de OCR_BATCH_PAGES en OCR_BATCH_PAGES, y con
+        ocr_workers > 1 se reparten entre el pool de OCR.
+        Las páginas que fallan se omiten.
+        """
+        if self.ocr_workers > 1:
+            return self.ocr_pages_parallel(document, page_nums)
+
+        pdf_hash = document.sha256()  # Clave del documento en la caché de OCR
+        pages_text = []
+        for start in range(0, len(page_nums), OCR_BATCH_PAGES):
+            batch_nums = page_nums[start:start + OCR_BATCH_PAGES]
+            logger.info(f"Procesando páginas {', '.join(str(n + 1) for n in batch_nums)} con OCR "
+                        f"({start + len(batch_nums)}/{len(page_nums)})...")
+            try:
+                # Aplicar OCR a las páginas del lote juntas (con más resolución las de
+                # confianza baja); EasyOCR se inicializa solo si alguna no está en la caché
+                outcomes = _ocr_pages_adaptive(self.init_ocr, [document.page(n) for n in batch_nums], pdf_hash)
+            except Exception as batch_error:
+                # Repetir el lote página por página para perder solo las que fallen
+                logger.warning(f"Error en el lote de OCR, se procesa página por página: {batch_error}")
+                outcomes = []
+                for page_num in batch_nums:
+                    try:
+                        outcomes.append(_ocr_page_adaptive(self.init_ocr, document.page(page_num), pdf_hash))
+                    except Exception as page_error:
+                        logger.warning(f"Error procesando página {page_num + 1}: {page_error}")
+                        outcomes.append(None)
+
+            for page_num, outcome in zip(batch_nums, outcomes):
+                if outcome is not None:
+                    page_text, upgraded = outcome
+                    self.count_ocr_page(upgraded)
+                    pages_text.append((page_num, page_text))
         
-        return text
+        return pages_text
+
+    def count_ocr_page(self, upgraded: bool):
+        """Registra una página procesada con OCR para las estadísticas de la corrida"""
+        self.ocr_pages_done += 1
+        if upgraded:
+            self.ocr_pages_upgraded += 1
+            logger.info(f"Confianza baja: página repetida con zoom {OCR_ZOOM}")
+
+    def init_ocr_pool(self) -> ProcessPoolExecutor:
+        """Crea el pool de OCR la primera vez y lo reutiliza para los siguientes documentos"""
+        if self.ocr_pool is None:
+            logger.info(f"Inicializando pool de OCR con {self.ocr_workers} procesos...")
+            torch_threads = max(1, (os.cpu_count() or 1) // self.ocr_workers)
+            self.ocr_pool = ProcessPoolExecutor(max_workers=self.ocr_workers,
+                                                initializer=_init_ocr_worker,
+                                                initargs=(torch_threads, self.ocr_cache_dir))
+        return self.ocr_pool
+
+    def close_ocr_pool(self):
+        """Termina los procesos del pool de OCR, si se llegó a crear"""
+        if self.ocr_pool is not None:
+            self.ocr_pool.shutdown(wait=True)
+            self.ocr_pool = None
+
+    def ocr_pages_parallel(self, document: PdfDocument, page_nums: List[int]) -> List[Tuple[int, str]]:
+        """
+        Igual que ocr_pages, pero repartiendo las páginas entre el pool de OCR;
+        los textos se devuelven en el orden de page_nums
+        """
+        pages_text = []
+        pool = self.init_ocr_pool()
+        pdf_hash = document.sha256()
+        futures = [pool.submit(_ocr_page_worker, str(document.path), page_num, pdf_hash) for page_num in page_nums]
+
+        for i, (page_num, future) in enumerate(zip(page_nums, futures), 1):
+            try:
+                page_text, upgraded = future.result()
+                self.count_ocr_page(upgraded)
+                pages_text.append((page_num, page_text))
+                logger.info(f"Página {page_num + 1} procesada con OCR ({i}/{len(page_nums)})")
+            except BrokenProcessPool as pool_error:
+                # El pool quedó inutilizable: descartarlo para que el siguiente documento cree otro
+                logger.error(f"El pool de OCR se detuvo: {pool_error}")
+                for pending in futures:
+                    pending.cancel()
+                self.ocr_pool.shutdown(wait=False)
+                self.ocr_pool = None
+                break
+            except Exception as page_error:
+                logger.warning(f"Error procesando página {page_num + 1}: {page_error}")
+                continue
+
+        return pages_text
     
-    def extract_text_combined(self, pdf_path: Path) -> Tuple[str, str]:
+    def extract_text_combined(self, document: PdfDocument, max_chars: Optional[int] = None) -> Tuple[str, str]:
         """
-        Extrae texto usando múltiples métodos y combina los resultados
+        Extrae texto usando múltiples métodos y combina los resultados (de todo el
+        documento o, con max_chars, de las páginas necesarias para reunir esos caracteres)
+        Los métodos 2 y 3 vuelven a leer el archivo con otra biblioteca, así que no se
+        intentan si todas las páginas son imágenes: tampoco encontrarían texto
         Retorna: (texto_extraido, metodo_usado)
         """
         text = ""
         method = "combined"
         
         try:
-            # Método 1: PyMuPDF (fitz) - Generalmente el más rápido
-            pdf_document = fitz.open(str(pdf_path))
-            fitz_text = ""
-            for page in pdf_document:
-                fitz_text += page.get_text()
-            pdf_document.close()
+            # Método 1: PyMuPDF (fitz) - Generalmente el más rápido; texto ya leído
+            fitz_text = document.text(max_chars)
             
             if len(fitz_text.strip()) > 100:
                 text = fitz_text
                 method = "PyMuPDF"
             
             # Método 2: PDFMiner - Mejor conservación de layout
-            if not text or len(text.strip()) < 100:
+            if (not text or len(text.strip()) < 100) and not document.is_image_only():
                 try:
                     laparams = LAParams(line_overlap=0.5, char_margin=2.0, line_margin=0.5)
-                    miner_text = pdfminer_extract(str(pdf_path), laparams=laparams)
+                    miner_text = pdfminer_extract(str(document.path), laparams=laparams)
                     if len(miner_text.strip()) > len(text.strip()):
                         text = miner_text
                         method = "PDFMiner"
@@ -770,14 +1575,19 @@ class ReglamentoProcessor:
                     pass
             
             # Método 3: pdfplumber - Bueno para estructura
-            if not text or len(text.strip()) < 100:
+            if (not text or len(text.strip()) < 100) and not document.is_image_only():
                 try:
-                    with pdfplumber.open(pdf_path) as pdf:
-                        plumber_text = ""
+                    with pdfplumber.open(document.path) as pdf:
+                        plumber_pages = []
+                        length = 0
                         for page in pdf.pages:
+                            if max_chars and length >= max_chars:
+                                break
                             page_text = page.extract_text()
                             if page_text:
-                                plumber_text += page_text + "\n"
+                                plumber_pages.append(page_text + "\n")
+                                length += len(plumber_pages[-1])
+                        plumber_text = ''.join(plumber_pages)
                         
                         if len(plumber_text.strip()) > len(text.strip()):
                             text = plumber_text
@@ -790,7 +1600,34 @@ class ReglamentoProcessor:
         
         return text, method
     
-    def get_pdf_metadata(self, pdf_path: Path) -> Dict[str, Any]:
+    def extract_text_hybrid(self, document: PdfDocument, max_chars: Optional[int] = None,
+                            ocr_all: bool = False) -> Tuple[str, List[int]]:
+        """
+        Extrae el texto página por página (iter_page_texts): conserva la capa de texto
+        donde existe y aplica OCR solo a las páginas que son solo imagen (a todas, con
+        ocr_all). Con max_chars se detiene en cuanto reúne esos caracteres, así que solo
+        se leen las primeras páginas.
+        Retorna: (texto_extraido, páginas a las que se aplicó OCR, contadas desde 1)
+        """
+        page_texts = []
+        ocr_page_nums = []
+        length = 0
+        
+        try:
+            for page_num, page_text, used_ocr in self.iter_page_texts(document, ocr_all):
+                page_texts.append(page_text)
+                length += len(page_text)
+                if used_ocr:
+                    ocr_page_nums.append(page_num + 1)
+                if max_chars and length >= max_chars:
+                    break
+        
+        except Exception as e:
+            logger.error(f"Error extrayendo texto por página: {e}")
+        
+        return ''.join(page_texts), ocr_page_nums
+    
+    def get_pdf_metadata(self, document: PdfDocument) -> Dict[str, Any]:
         """
         Obtiene metadatos completos del PDF
         """
@@ -806,14 +1643,13 @@ class ReglamentoProcessor:
         
         try:
             # Tamaño del archivo
-            file_size = os.path.getsize(pdf_path)
+            file_size = os.path.getsize(document.path)
             metadata['file_size_mb'] = round(file_size / (1024 * 1024), 2)
             
             # Metadatos con PyMuPDF
-            pdf_document = fitz.open(str(pdf_path))
-            metadata['num_pages'] = pdf_document.page_count
+            metadata['num_pages'] = document.page_count
             
-            pdf_metadata = pdf_document.metadata
+            pdf_metadata = document.metadata
             if pdf_metadata:
                 metadata['creation_date'] = pdf_metadata.get('creationDate')
                 metadata['modification_date'] = pdf_metadata.get('modDate')
@@ -821,13 +1657,11 @@ class ReglamentoProcessor:
                 metadata['subject'] = pdf_metadata.get('subject')
                 metadata['producer'] = pdf_metadata.get('producer')
             
-            pdf_document.close()
-            
         except Exception as e:
             logger.error(f"Error obteniendo metadatos: {e}")
             # Intentar con PyPDF2 como respaldo
             try:
-                with open(pdf_path, 'rb') as file:
+                with open(document.path, 'rb') as file:
                     pdf_reader = PyPDF2.PdfReader(file)
                     metadata['num_pages'] = len(pdf_reader.pages)
             except:
@@ -841,6 +1675,9 @@ class ReglamentoProcessor:
         """
         logger.info(f"{'='*60}")
         logger.info(f"Procesando: {pdf_path.name}")
+
+        # El PDF se abre una sola vez y todos los detectores leen de este documento
+        document = PdfDocument(pdf_path)
         
         # IMPORTANTE: Usar el nombre del archivo limpio como título principal
         titulo_base = self.clean_filename_to_title(pdf_path.stem)
@@ -853,13 +1690,14 @@ class ReglamentoProcessor:
             'fuente_oficial': 'DIARIO OFICIAL DE LA FEDERACION',  # Fuente oficial
             'Fecha de Publicación': None,  # Se extraerá del PDF
             'es_escaneado': False,
+            'paginas_ocr': [],  # Páginas (desde 1) a las que se aplicó OCR
             'tiene_tablas': False
         }
         
         try:
             # 1. Obtener metadatos básicos
             try:
-                metadata = self.get_pdf_metadata(pdf_path)
+                metadata = self.get_pdf_metadata(document)
                 result['numero_paginas'] = metadata['num_pages']
             except Exception as e:
                 logger.warning(f"Error obteniendo metadatos de {pdf_path.name}: {e}")
@@ -867,7 +1705,7 @@ class ReglamentoProcessor:
             
             # 2. Detectar si es escaneado
             try:
-                result['es_escaneado'] = self.detect_if_scanned(pdf_path)
+                result['es_escaneado'] = self.detect_if_scanned(document)
                 logger.info(f"Es escaneado: {result['es_escaneado']}")
             except Exception as e:
                 logger.warning(f"Error detectando si es escaneado: {e}")
@@ -875,7 +1713,7 @@ class ReglamentoProcessor:
             
             # 3. Detectar tablas
             try:
-                tables_info = self.detect_tables(pdf_path)
+                tables_info = self.detect_tables(document)
                 result['tiene_tablas'] = tables_info['has_tables']
                 logger.info(f"Tiene tablas: {result['tiene_tablas']}")
             except Exception as e:
@@ -885,18 +1723,35 @@ class ReglamentoProcessor:
             # 4. Extraer texto con manejo robusto de errores
             text = ""
             try:
-                if result['es_escaneado']:
-                    logger.info("PDF escaneado detectado, usando OCR...")
-                    text = self.extract_text_with_ocr(pdf_path)
-                    # Si OCR falla o devuelve poco texto, intentar método estándar
+                # Con use_contenido_text, el texto completo ya está en el contenido de la
+                # extracción, si el documento tiene uno: no hace falta volver a extraer el PDF
+                contenido = self.find_matching_contenido(titulo_base) if self.use_contenido_text else None
+                if contenido:
+                    logger.info("Texto tomado del contenido de la extracción")
+                    text = contenido
+                    # Las páginas que la extracción pasó por OCR vienen en su registro
+                    # (sin abrir ninguna página del PDF)
+                    result['paginas_ocr'] = list(self.find_contenido_record(titulo_base).get('paginas_ocr') or [])
+                else:
+                    # Sin contenido: las fechas y el status solo leen el inicio del documento,
+                    # así que las páginas se extraen en orden hasta reunir METADATA_TEXT_CHARS
+                    # caracteres; se conserva la capa de texto donde existe y solo las páginas
+                    # que son solo imagen, y que se llegan a leer, pasan por OCR
+                    logger.info("Extrayendo el inicio del texto por página (OCR solo en páginas sin texto)...")
+                    text, result['paginas_ocr'] = self.extract_text_hybrid(document, METADATA_TEXT_CHARS)
+                    logger.info(f"Páginas con OCR: {result['paginas_ocr'] or 'ninguna'}")
+                    
+                    # Escaneado sin páginas de imagen reconocibles: OCR de cada página leída
+                    if result['es_escaneado'] and not result['paginas_ocr']:
+                        logger.info("PDF escaneado detectado, usando OCR...")
+                        text, result['paginas_ocr'] = self.extract_text_hybrid(document, METADATA_TEXT_CHARS, ocr_all=True)
+                    
+                    # Si devuelve poco texto, intentar método estándar
                     if len(text.strip()) < 100:
-                        logger.info("OCR devolvió poco texto, intentando método estándar...")
-                        text_alt, method = self.extract_text_combined(pdf_path)
+                        logger.info("Poco texto extraído, intentando método estándar...")
+                        text_alt, method = self.extract_text_combined(document, METADATA_TEXT_CHARS)
                         if len(text_alt) > len(text):
                             text = text_alt
-                else:
-                    logger.info("Extrayendo texto con métodos estándar...")
-                    text, method = self.extract_text_combined(pdf_path)
             except Exception as e:
                 logger.error(f"Error extrayendo texto: {e}")
                 text = ""
@@ -932,6 +1787,8 @@ class ReglamentoProcessor:
                 'tiene_tablas': False,
                 'error': str(e)
             }
+        finally:
+            document.close()
     
     def sanitize_filename(self, titulo: str) -> str:
         """
@@ -956,6 +1813,69 @@ class ReglamentoProcessor:
 
         return filename
 
+    def match_titles(self, titulos: List[str]) -> List[Dict[str, Any]]:
+        """
+        Matching de todos los PDFs antes de procesarlos: empareja cada PDF, uno a uno,
+        con los registros de cada JSON cargado (TitleIndex.assign), así que dos PDFs no
+        toman el mismo registro. Las búsquedas de cada PDF (find_matching_contenido, ...)
+        devuelven después esa asignación.
+        Las búsquedas van por título, así que un PDF con el mismo título que otro anterior
+        no se empareja: es un duplicado (su JSON de salida también es el del primero).
+        Guarda el reporte (MATCH_REPORT_NAME) en la carpeta de salida: cada PDF con su
+        registro y similitud, sin match o duplicado, y los registros que no tomó ningún PDF.
+        """
+        normalizados = {}
+        for titulo in titulos:
+            if titulo not in normalizados:
+                normalizados[titulo] = self.normalize_text(titulo)
+        filas = []
+
+        for fuente in ('contenido', 'url', 'metadatos'):
+            index = getattr(self, f'{fuente}_index', None)
+            if not index:
+                continue
+
+            asignados = index.assign(normalizados)
+            usados = set()
+            vistos = set()  # Títulos de los PDFs ya reportados
+            con_registro = set()  # Títulos normalizados de los PDFs que tomaron un registro
+            for titulo in titulos:
+                normalizado = normalizados[titulo]
+                match = asignados[titulo] if titulo not in vistos else None
+                if match is None:
+                    # Duplicado: otro PDF anterior con el mismo título, o con el mismo
+                    # título normalizado, ya tomó el registro
+                    tipo = 'duplicado' if titulo in vistos or normalizado in con_registro else 'sin match'
+                    vistos.add(titulo)
+                    filas.append({'fuente': fuente, 'tipo': tipo, 'similitud': '', 'titulo': titulo, 'registro': ''})
+                    continue
+                vistos.add(titulo)
+                con_registro.add(normalizado)
+                pos, ratio = match
+                usados.add(pos)
+                _, registro, registro_normalizado = index.entries[pos]
+                tipo = 'exacto' if registro_normalizado == normalizado else 'parecido'
+                filas.append({'fuente': fuente, 'tipo': tipo, 'similitud': f"{ratio:.4f}", 'titulo': titulo, 'registro': registro})
+
+            sin_pdf = [registro for pos, (_, registro, _) in enumerate(index.entries) if pos not in usados]
+            for registro in sin_pdf:
+                filas.append({'fuente': fuente, 'tipo': 'registro sin PDF', 'similitud': '', 'titulo': '', 'registro': registro})
+            logger.info(f"Matching de {fuente}: {len(usados)}/{len(titulos)} PDFs con registro, "
+                        f"{len(sin_pdf)} registros sin PDF")
+
+        if filas:
+            report_path = self.output_folder / MATCH_REPORT_NAME
+            try:
+                with open(report_path, 'w', encoding='utf-8-sig', newline='') as f:
+                    writer = csv.DictWriter(f, fieldnames=['fuente', 'tipo', 'similitud', 'titulo', 'registro'])
+                    writer.writeheader()
+                    writer.writerows(filas)
+                logger.info(f"Reporte de matching guardado: {report_path}")
+            except Exception as e:
+                logger.error(f"Error guardando el reporte de matching: {e}")
+
+        return filas
+
     def process_all_pdfs(self) -> List[Dict[str, Any]]:
         """
         Procesa todos los PDFs en orden alfabético/numérico y guarda cada documento como un JSON individual
@@ -992,6 +1912,9 @@ class ReglamentoProcessor:
             logger.info(f"  ... y {len(pdf_files) - 10} archivos más")
         logger.info(f"{'='*60}\n")
         
+        # Emparejar de una vez los títulos de todos los PDFs con los JSON cargados
+        self.match_titles([self.clean_filename_to_title(pdf_file.stem) for pdf_file in pdf_files])
+        
         # Lista para almacenar todos los documentos procesados
         documentos = []
         
@@ -1012,6 +1935,7 @@ class ReglamentoProcessor:
                     'fuente_oficial': result['fuente_oficial'],
                     'Fecha de Publicación': result['Fecha de Publicación'],  # Extraída del PDF
                     'es_escaneado': result['es_escaneado'],
+                    'paginas_ocr': result.get('paginas_ocr', []),
                     'tiene_tablas': result['tiene_tablas']
                 }
 
@@ -1108,10 +2032,17 @@ class ReglamentoProcessor:
         logger.info(f"✓ Errores: {total_errores}")
         logger.info(f"✓ Archivos escaneados: {total_escaneados}")
         logger.info(f"✓ Archivos con tablas: {total_con_tablas}")
+        if self.ocr_pages_done > 0:
+            logger.info(f"✓ Páginas con OCR: {self.ocr_pages_done} "
+                        f"(repetidas con zoom {OCR_ZOOM} por baja confianza: {self.ocr_pages_upgraded}, "
+                        f"{self.ocr_pages_upgraded / self.ocr_pages_done * 100:.1f}%)")
         logger.info(f"✓ Contenidos encontrados: {total_con_contenido}/{len(documentos)}")
         if total_sin_contenido > 0:
             logger.info(f"⚠ Sin Contenido: {total_sin_contenido} documentos")
         
+        # Liberar los procesos de OCR
+        self.close_ocr_pool()
+
         return documentos
 
 
@@ -1121,12 +2052,17 @@ def main():
     # Rutas configuradas según lo especificado
     INPUT_FOLDER = r"C:\Users\julii\Documents\AGUASCALIENTES DOF\Convenio" # Carpeta con los PDFs
     OUTPUT_FOLDER = r"C:\Users\julii\Documents\Practicas\drive\AGUAS\json\Convenio"  # Misma carpeta que el script
+    OCR_WORKERS = 1  # Procesos de OCR en paralelo para PDFs escaneados (1 = secuencial)
+    OCR_CACHE_FOLDER = OCR_CACHE_DIR  # Caché de OCR por página compartida con la extracción (None = sin caché)
+    USE_CONTENIDO_TEXT = False  # True = fechas y status desde el contenido de la extracción, sin volver a extraer cada PDF (sin encabezados ni pies de página)
     
     print("="*60)
     print("PROCESADOR DE REGLAMENTOS Y LEYES FEDERALES")
     print("="*60)
     print(f"Carpeta de entrada: {INPUT_FOLDER}")
     print(f"Carpeta de salida: {OUTPUT_FOLDER}")
+    print(f"Caché de OCR: {OCR_CACHE_FOLDER}")
+    print(f"Texto desde el contenido: {'sí' if USE_CONTENIDO_TEXT else 'no'}")
     print()
     
     # Verificar que existe la carpeta de entrada
@@ -1136,7 +2072,8 @@ def main():
         return
     
     # Crear instancia del procesador
-    processor = ReglamentoProcessor(INPUT_FOLDER, OUTPUT_FOLDER)
+    processor = ReglamentoProcessor(INPUT_FOLDER, OUTPUT_FOLDER, ocr_workers=OCR_WORKERS,
+                                    ocr_cache_dir=OCR_CACHE_FOLDER, use_contenido_text=USE_CONTENIDO_TEXT)
     
     # Opción para procesar un solo archivo o todos
     import sys
@@ -1164,6 +2101,7 @@ def main():
                 'fuente_oficial': result['fuente_oficial'],
                 'Fecha de Publicación': result['Fecha de Publicación'],  # Extraída del PDF
                 'es_escaneado': result['es_escaneado'],
+                'paginas_ocr': result.get('paginas_ocr', []),
                 'tiene_tablas': result['tiene_tablas']
             }
             
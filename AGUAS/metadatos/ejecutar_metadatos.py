@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Ejecuta los scripts de metadatos de esta carpeta uno tras otro en un solo proceso.
+Así todos comparten el lector de EasyOCR (get_ocr_reader): el modelo se carga una vez,
+con el primer PDF escaneado, en lugar de una vez por script. El registro de lectores
+(OCR_READERS) lo crea este script y se lo pasa a cada script que carga.
+
+Cada script se importa como el módulo metadatos_<nombre>, registrado en sys.modules.
+Los procesos de OCR en paralelo (OCR_WORKERS > 1) importan ese mismo módulo por su
+nombre para ejecutar sus funciones: _BuscadorScripts lo encuentra también en ellos.
+
+Uso:
+    python ejecutar_metadatos.py                      # todos los de SCRIPTS, en orden
+    python ejecutar_metadatos.py Acuerdo.py Base.py   # solo los indicados
+"""
+
+import sys
+import importlib
+import importlib.util
+from pathlib import Path
+
+CARPETA = Path(__file__).resolve().parent
+PREFIJO_MODULO = 'metadatos_'
+
+# Scripts de metadatos de esta carpeta, en el orden en que se ejecutan
+SCRIPTS = [
+    'Acuerdo.py',
+    'Base.py',
+    'Constitución.py',
+    'Convenio.py',
+    'Código.py',
+    'Declaratoria.py',
+    'Decreto.py',
+    'Disposición.py',
+    'Estatuto.py',
+    'Ley.py',
+    'Lineamiento.py',
+    'Manual.py',
+    'Monto.py',
+    'Plan.py',
+    'Protocolo.py',
+    'Regla.py',
+    'Reglamento.py',
+]
+
+
+class _BuscadorScripts:
+    """Importa el módulo metadatos_<nombre> desde el script <nombre>.py de esta carpeta
+
+    Está en sys.meta_path también en los procesos de OCR: en Windows arrancan de
+    cero e importan este script antes de recibir la primera página, así que pueden
+    importar el módulo del script que los creó (con fork ya lo heredan de sys.modules).
+    """
+
+    @staticmethod
+    def find_spec(nombre, path=None, target=None):
+        if not nombre.startswith(PREFIJO_MODULO):
+            return None
+        ruta = CARPETA / f"{nombre[len(PREFIJO_MODULO):]}.py"
+        if not ruta.is_file():
+            return None
+        return importlib.util.spec_from_file_location(nombre, ruta)
+
+
+sys.meta_path.append(_BuscadorScripts)
+
+
+def cargar_script(ruta: Path, lectores_ocr: dict):
+    """Importa un script de metadatos como módulo, sin ejecutar su main()
+
+    El módulo queda en sys.modules como metadatos_<nombre>, así que las funciones
+    que se envían a los procesos de OCR se pueden serializar. El script usa
+    lectores_ocr como registro de lectores de EasyOCR (OCR_READERS), el mismo para
+    todos los scripts de la corrida.
+    """
+    modulo = importlib.import_module(f"{PREFIJO_MODULO}{ruta.stem}")
+    modulo.OCR_READERS = lectores_ocr
+    return modulo
+
+
+def main():
+    """Ejecuta main() de cada script; si uno falla o termina con sys.exit() se sigue con el siguiente"""
+    scripts = sys.argv[1:] or SCRIPTS
+    argv = sys.argv
+    lectores_ocr = {}  # Registro de lectores de EasyOCR compartido por todos los scripts
+    ejecutados = 0
+    fallidos = []
+
+    try:
+        for nombre in scripts:
+            print("\n" + "="*60)
+            print(f"EJECUTANDO {nombre}")
+            print("="*60)
+            try:
+                modulo = cargar_script(CARPETA / nombre, lectores_ocr)
+                # Sin argumentos, main() de cada script procesa toda su carpeta de entrada
+                sys.argv = [nombre]
+                try:
+                    modulo.main()
+                finally:
+                    sys.argv = argv
+            except SystemExit as e:
+                # sys.exit() dentro de un script termina solo ese script
+                if e.code not in (None, 0):
+                    print(f"ERROR en {nombre}: terminó con sys.exit({e.code!r})")
+                    fallidos.append(nombre)
+            except Exception as e:
+                print(f"ERROR en {nombre}: {e}")
+                fallidos.append(nombre)
+            ejecutados += 1
+    finally:
+        # También con Ctrl+C: indicar hasta dónde se llegó
+        print("\n" + "="*60)
+        print(f"Scripts ejecutados: {ejecutados - len(fallidos)}/{len(scripts)}")
+        if fallidos:
+            print(f"Con errores: {', '.join(fallidos)}")
+        if ejecutados < len(scripts):
+            print(f"Sin terminar: {', '.join(scripts[ejecutados:])}")
+        print("="*60)
+
+
+if __name__ == "__main__":
+    main()
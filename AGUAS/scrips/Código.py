@@ -1,12 +1,19 @@
 # -*- coding: utf-8 -*-
 import os
 import json
+import hashlib
 import pdfplumber
 import re
 from pathlib import Path
-from typing import List, Dict, Tuple
+from typing import Callable, Iterable, Iterator, List, Dict, Tuple, Optional
+from bisect import bisect_left, bisect_right
+from collections import deque
+from functools import partial
 import sys
 import io
+import argparse
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
 
 # Configurar la salida estándar para usar UTF-8
 sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
@@ -14,7 +21,7 @@ sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='repla
 # Imports para OCR
 try:
     import pytesseract
-    from pdf2image import convert_from_path
+    from pdf2image import convert_from_path, pdfinfo_from_path
     from PIL import Image
     OCR_DISPONIBLE = True
 except ImportError:
@@ -23,6 +30,14 @@ except ImportError:
     print("   También necesitas Tesseract-OCR: https://github.com/tesseract-ocr/tesseract")
     print("   Y poppler-utils para pdf2image")
 
+# Motor de Tesseract dentro del proceso (opcional): evita lanzar tesseract y
+# recargar el idioma en cada página. Sin él se usa pytesseract.
+try:
+    import tesserocr
+    TESSEROCR_DISPONIBLE = True
+except ImportError:
+    TESSEROCR_DISPONIBLE = False
+
 # Imports para Word (DOCX/DOC)
 try:
     from docx import Document
@@ -187,6 +202,46 @@ def detectar_y_eliminar_texto_fragmentado(texto: str) -> str:
 
     return '\n'.join(lineas_limpias)
 
+
+# Patrones que indican inicio de nuevo bloque estructural
+PATRONES_INICIO_BLOQUE = [
+    r'^(Artículo|ARTÍCULO|Art\.|ART\.)\s+\d+',
+    r'^(Fracción|FRACCIÓN|Fracc\.|FRACC\.)',
+    r'^(Capítulo|CAPÍTULO|Cap\.|CAP\.)\s+[IVX\d]+',
+    r'^(Título|TÍTULO|Tít\.|TÍT\.)\s+[IVX\d]+',
+    r'^(Sección|SECCIÓN|Secc\.|SECC\.)',
+    r'^[IVX]+\.',  # Números romanos con punto (I. II. III.)
+    r'^[IVXLCDM]+\)',  # Números romanos con paréntesis (I) II) III))
+    r'^\d+\.',  # Números arábigos con punto (1. 2. 3.)
+    r'^\d+\)',  # Números arábigos con paréntesis (1) 2) 3))
+    r'^[a-z]\)',  # Incisos (a) b) c))
+    r'^[A-Z]\)',  # Incisos mayúsculas (A) B) C))
+]
+
+# Una sola expresión compilada: coincide si coincide cualquiera de los patrones
+_INICIO_BLOQUE = re.compile('|'.join(f'(?:{patron})' for patron in PATRONES_INICIO_BLOQUE))
+
+# Limpiezas finales del texto reconstruido
+# (se aplican en este orden: tras la primera ya no quedan espacios consecutivos;
+# los patrones con prefijo literal se buscan mucho más rápido que ' +' o '\n{3,}')
+_ESPACIOS_MULTIPLES = re.compile(r'  +')
+_ESPACIO_ANTES_PUNTUACION = re.compile(r' ([.,;:?!)\]}>])')
+_ESPACIO_DESPUES_APERTURA = re.compile(r'([\[({<])\s+')
+_SALTOS_MULTIPLES = re.compile(r'\n\n\n+')
+
+
+def _indices_siguiente_no_vacia(lineas_stripped: List[str]) -> List[int]:
+    """Para cada posición, índice de la primera línea no vacía en ella o después (len si no hay)"""
+    total = len(lineas_stripped)
+    indices = [total] * (total + 1)
+    siguiente = total
+    for j in range(total - 1, -1, -1):
+        if lineas_stripped[j]:
+            siguiente = j
+        indices[j] = siguiente
+    return indices
+
+
 def corregir_saltos_linea(texto: str) -> str:
     """Une líneas inteligentemente para reconstruir párrafos sin cortar palabras
 
@@ -207,85 +262,48 @@ def corregir_saltos_linea(texto: str) -> str:
     - Línea termina sin puntuación final y la siguiente es minúscula
     - Línea termina con coma (,)
     - Hay guión de separación de palabra (ej: "inte-\ngración")
+
+    Recorre el texto una sola vez: cada línea se limpia una vez y la siguiente
+    línea no vacía se obtiene de un índice precalculado.
     """
     if not texto:
         return texto
 
     lineas = texto.split('\n')
+    total_lineas = len(lineas)
+    lineas_stripped = [linea.strip() for linea in lineas]
+    siguiente_no_vacia_desde = _indices_siguiente_no_vacia(lineas_stripped)
     bloques = []
     bloque_actual = []
 
-    # Patrones que indican inicio de nuevo bloque estructural
-    patrones_inicio_bloque = [
-        r'^(Artículo|ARTÍCULO|Art\.|ART\.)\s+\d+',
-        r'^(Fracción|FRACCIÓN|Fracc\.|FRACC\.)',
-        r'^(Capítulo|CAPÍTULO|Cap\.|CAP\.)\s+[IVX\d]+',
-        r'^(Título|TÍTULO|Tít\.|TÍT\.)\s+[IVX\d]+',
-        r'^(Sección|SECCIÓN|Secc\.|SECC\.)',
-        r'^[IVX]+\.',  # Números romanos con punto (I. II. III.)
-        r'^[IVXLCDM]+\)',  # Números romanos con paréntesis (I) II) III))
-        r'^\d+\.',  # Números arábigos con punto (1. 2. 3.)
-        r'^\d+\)',  # Números arábigos con paréntesis (1) 2) 3))
-        r'^[a-z]\)',  # Incisos (a) b) c))
-        r'^[A-Z]\)',  # Incisos mayúsculas (A) B) C))
-    ]
-
-    def es_inicio_bloque(linea: str) -> bool:
-        """Detecta si una línea es el inicio de un nuevo bloque estructural"""
-        for patron in patrones_inicio_bloque:
-            if re.match(patron, linea.strip()):
-                return True
-        return False
-
-    def tiene_puntuacion_final(linea: str) -> bool:
-        """Detecta si termina con puntuación que cierra bloque"""
-        linea_stripped = linea.strip()
-        if not linea_stripped:
-            return False
-        return linea_stripped[-1] in '.;:!?'
-
-    def siguiente_linea_es_continuacion(siguiente: str) -> bool:
-        """Verifica si la siguiente línea es claramente una continuación"""
-        if not siguiente:
-            return False
-        # Eliminar espacios y obtener el primer carácter real
-        siguiente_stripped = siguiente.strip()
-        if not siguiente_stripped:
-            return False
-        primer_char = siguiente_stripped[0]
-        # Es continuación si empieza con minúscula o número
-        return primer_char.islower() or primer_char.isdigit()
-
-    def es_titulo_mayusculas(linea: str) -> bool:
+    def es_titulo_mayusculas(linea_stripped: str) -> bool:
         """Detecta si una línea es un título en MAYÚSCULAS"""
-        linea_stripped = linea.strip()
-        if not linea_stripped or len(linea_stripped) < 3:
+        if len(linea_stripped) < 3:
             return False
         # Al menos 80% de caracteres alfabéticos en mayúsculas
-        letras = [c for c in linea_stripped if c.isalpha()]
+        letras = ''.join(filter(str.isalpha, linea_stripped))
         if not letras:
             return False
-        mayusculas = sum(1 for c in letras if c.isupper())
+        mayusculas = sum(map(str.isupper, letras))
         return (mayusculas / len(letras)) >= 0.8
 
     i = 0
-    while i < len(lineas):
-        linea = lineas[i]
-        linea_stripped = linea.strip()
+    while i < total_lineas:
+        linea_stripped = lineas_stripped[i]
 
-        # Si es línea vacía, terminar bloque actual si existe
+        # Si es línea vacía, terminar bloque actual si existe y saltar hasta la siguiente con texto
         if not linea_stripped:
             if bloque_actual:
                 bloques.append(' '.join(bloque_actual))
                 bloque_actual = []
-            i += 1
+            i = siguiente_no_vacia_desde[i]
             continue
 
         # CASO ESPECIAL: Línea termina con guión (palabra cortada)
         # Ejemplo: "integra-" + "ción" = "integración"
-        if linea_stripped.endswith('-') and i + 1 < len(lineas):
-            siguiente = lineas[i + 1].strip()
-            if siguiente and not es_inicio_bloque(siguiente):
+        if linea_stripped.endswith('-') and i + 1 < total_lineas:
+            siguiente = lineas_stripped[i + 1]
+            if siguiente and not _INICIO_BLOQUE.match(siguiente):
                 # Quitar el guión y unir directamente SIN espacio
                 linea_stripped = linea_stripped[:-1] + siguiente
                 i += 2  # Saltar la siguiente línea porque ya la procesamos
@@ -295,7 +313,7 @@ def corregir_saltos_linea(texto: str) -> str:
             i += 1
 
         # Si esta línea es inicio de nuevo bloque Y ya tenemos contenido, guardar bloque anterior
-        if es_inicio_bloque(linea_stripped) and bloque_actual:
+        if bloque_actual and _INICIO_BLOQUE.match(linea_stripped):
             bloques.append(' '.join(bloque_actual))
             bloque_actual = []
 
@@ -305,20 +323,16 @@ def corregir_saltos_linea(texto: str) -> str:
         # Decidir si debemos CERRAR o CONTINUAR el bloque
         debe_cerrar_bloque = False
 
-        # Buscar la siguiente línea no vacía
-        siguiente_no_vacia = None
-        if i < len(lineas):
-            for j in range(i, len(lineas)):
-                if lineas[j].strip():
-                    siguiente_no_vacia = lineas[j].strip()
-                    break
+        # Buscar la siguiente línea no vacía (precalculada)
+        siguiente_indice = siguiente_no_vacia_desde[i]
+        siguiente_no_vacia = lineas_stripped[siguiente_indice] if siguiente_indice < total_lineas else None
 
         # REGLA 1: Si NO hay más líneas, CERRAR
         if siguiente_no_vacia is None:
             debe_cerrar_bloque = True
 
         # REGLA 2: Si termina con puntuación final, CERRAR
-        elif tiene_puntuacion_final(linea_stripped):
+        elif linea_stripped[-1] in '.;:!?':
             debe_cerrar_bloque = True
 
         # REGLA 3: Si la siguiente línea es un título en MAYÚSCULAS, CERRAR
@@ -326,12 +340,13 @@ def corregir_saltos_linea(texto: str) -> str:
             debe_cerrar_bloque = True
 
         # REGLA 4: Si la siguiente línea es inicio de bloque estructural, CERRAR
-        elif es_inicio_bloque(siguiente_no_vacia):
+        elif _INICIO_BLOQUE.match(siguiente_no_vacia):
             debe_cerrar_bloque = True
 
         # REGLA 5: Si la línea NO termina con puntuación Y la siguiente NO es continuación, CERRAR
+        # (es continuación si empieza con minúscula o número)
         # Esto evita unir párrafos diferentes
-        elif not siguiente_linea_es_continuacion(siguiente_no_vacia):
+        elif not (siguiente_no_vacia[0].islower() or siguiente_no_vacia[0].isdigit()):
             # Si la línea actual no tiene puntuación de continuación (como coma)
             # y la siguiente empieza con mayúscula, probablemente es nuevo párrafo
             if not linea_stripped.endswith(','):
@@ -350,16 +365,16 @@ def corregir_saltos_linea(texto: str) -> str:
     texto_final = '\n'.join(bloques)
 
     # Limpiar espacios múltiples dentro de las líneas
-    texto_final = re.sub(r'  +', ' ', texto_final)
+    texto_final = _ESPACIOS_MULTIPLES.sub(' ', texto_final)
 
     # Limpiar espacios antes de puntuación
-    texto_final = re.sub(r' +([.,;:?!)\]}>])', r'\1', texto_final)
+    texto_final = _ESPACIO_ANTES_PUNTUACION.sub(r'\1', texto_final)
 
     # Limpiar espacios después de paréntesis/corchetes de apertura
-    texto_final = re.sub(r'([\[({<])\s+', r'\1', texto_final)
+    texto_final = _ESPACIO_DESPUES_APERTURA.sub(r'\1', texto_final)
 
     # Limpiar múltiples saltos de línea (máximo 2 seguidos)
-    texto_final = re.sub(r'\n{3,}', '\n\n', texto_final)
+    texto_final = _SALTOS_MULTIPLES.sub('\n\n', texto_final)
 
     return texto_final.strip()
 
@@ -442,6 +457,40 @@ def convertir_tabla_a_json_string(tabla: List[List], numero_tabla: int) -> str:
     # Convertir a JSON string compacto (sin espacios ni saltos de línea)
     return json.dumps(tabla_estructura, ensure_ascii=False, separators=(',', ':'))
 
+
+# Tablas embebidas como JSON en el texto y el marcador que las sustituye mientras
+# se corrigen los saltos de línea
+_PATRON_TABLA_JSON = re.compile(r'\{"tabla_\d+":.*?\}\}')
+_MARCADOR_TABLA = re.compile(r'TABLA_PLACEHOLDER(\d+)_')
+
+
+def proteger_tablas_json(texto: str) -> Tuple[str, List[str]]:
+    """Sustituye cada tabla JSON por un marcador TABLA_PLACEHOLDER<n>_ en una sola pasada
+
+    Returns:
+        (texto con marcadores, tablas en el orden de sus marcadores)
+    """
+    tablas = []
+
+    def a_marcador(match):
+        tablas.append(match.group())
+        return f"TABLA_PLACEHOLDER{len(tablas) - 1}_"
+
+    return _PATRON_TABLA_JSON.sub(a_marcador, texto), tablas
+
+
+def restaurar_tablas_json(texto: str, tablas: List[str]) -> str:
+    """Vuelve a poner las tablas en lugar de sus marcadores, también en una sola pasada"""
+    if not tablas:
+        return texto
+
+    def a_tabla(match):
+        indice = int(match.group(1))
+        return tablas[indice] if indice < len(tablas) else match.group()
+
+    return _MARCADOR_TABLA.sub(a_tabla, texto)
+
+
 def extraer_contenido_word(ruta_word: str) -> Dict[str, str]:
     """Extrae el contenido de un archivo Word (.docx o .doc) incluyendo tablas como JSON"""
     if not DOCX_DISPONIBLE:
@@ -496,23 +545,13 @@ def extraer_contenido_word(ruta_word: str) -> Dict[str, str]:
         contenido_final = detectar_y_eliminar_texto_fragmentado(contenido_final)
 
         # Proteger tablas JSON durante corrección de saltos
-        tablas_encontradas = []
-        marcador_base = "TABLA_PLACEHOLDER"
-        patron_tabla = r'\{"tabla_\d+":.*?\}\}'
-
-        for match in re.finditer(patron_tabla, contenido_final):
-            tabla_json = match.group()
-            marcador = f"{marcador_base}{len(tablas_encontradas)}_"
-            tablas_encontradas.append(tabla_json)
-            contenido_final = contenido_final.replace(tabla_json, marcador, 1)
+        contenido_final, tablas_encontradas = proteger_tablas_json(contenido_final)
 
         # Aplicar corrección de saltos de línea
         contenido_final = corregir_saltos_linea(contenido_final)
 
         # Restaurar las tablas JSON
-        for i, tabla_json in enumerate(tablas_encontradas):
-            marcador = f"{marcador_base}{i}_"
-            contenido_final = contenido_final.replace(marcador, tabla_json)
+        contenido_final = restaurar_tablas_json(contenido_final, tablas_encontradas)
 
         # Limpieza final
         contenido_final = re.sub(r'[ \t]+', ' ', contenido_final)
@@ -645,23 +684,13 @@ def extraer_contenido_doc_antiguo(ruta_doc: str) -> Dict[str, str]:
         contenido_final = detectar_y_eliminar_texto_fragmentado(contenido_final)
 
         # Proteger tablas JSON durante corrección de saltos
-        tablas_encontradas = []
-        marcador_base = "TABLA_PLACEHOLDER"
-        patron_tabla = r'\{"tabla_\d+":.*?\}\}'
-
-        for match in re.finditer(patron_tabla, contenido_final):
-            tabla_json = match.group()
-            marcador = f"{marcador_base}{len(tablas_encontradas)}_"
-            tablas_encontradas.append(tabla_json)
-            contenido_final = contenido_final.replace(tabla_json, marcador, 1)
+        contenido_final, tablas_encontradas = proteger_tablas_json(contenido_final)
 
         # Aplicar corrección de saltos de línea
         contenido_final = corregir_saltos_linea(contenido_final)
 
         # Restaurar tablas
-        for i, tabla_json in enumerate(tablas_encontradas):
-            marcador = f"{marcador_base}{i}_"
-            contenido_final = contenido_final.replace(marcador, tabla_json)
+        contenido_final = restaurar_tablas_json(contenido_final, tablas_encontradas)
 
         # Limpieza final
         contenido_final = re.sub(r'[ \t]+', ' ', contenido_final)
@@ -687,11 +716,126 @@ def extraer_contenido_doc_antiguo(ruta_doc: str) -> Dict[str, str]:
             "contenido": f"Error al procesar: {str(e)}"
         }
 
-def extraer_tablas_ocr(imagen) -> List[List]:
-    """Intenta detectar y extraer tablas de una imagen usando OCR"""
+IDIOMAS_OCR = 'spa+eng'
+CONFIG_TESSERACT = '--psm 3 --oem 3'  # PSM 3 = segmentación automática de página (mejor para documentos)
+
+_COLUMNAS_DATOS_OCR = ('level', 'page_num', 'block_num', 'par_num', 'line_num', 'word_num',
+                       'left', 'top', 'width', 'height', 'conf', 'text')
+
+
+def _tsv_a_datos_ocr(tsv: str) -> Dict[str, List]:
+    """Convierte el TSV de Tesseract al diccionario de pytesseract.image_to_data (Output.DICT)"""
+    datos = {columna: [] for columna in _COLUMNAS_DATOS_OCR}
+    # split('\n') y no splitlines(): el texto reconocido puede traer \x0c u otros separadores
+    for linea in tsv.split('\n'):
+        campos = linea.split('\t', 11)
+        if len(campos) < 11:
+            continue
+        for columna, valor in zip(_COLUMNAS_DATOS_OCR[:11], campos):
+            datos[columna].append(int(float(valor)))  # conf puede traer decimales
+        datos['text'].append(campos[11] if len(campos) > 11 else '')
+    return datos
+
+
+class MotorTesserocr:
+    """Tesseract dentro del proceso (tesserocr)
+
+    El modelo de idioma se carga una sola vez al crear el motor y queda listo
+    para todas las páginas que procese este proceso.
+    """
+
+    nombre = 'tesserocr'
+
+    def __init__(self):
+        # PSM.AUTO y OEM.DEFAULT equivalen a CONFIG_TESSERACT
+        self._api = tesserocr.PyTessBaseAPI(lang=IDIOMAS_OCR, psm=tesserocr.PSM.AUTO,
+                                            oem=tesserocr.OEM.DEFAULT)
+
+    def datos_imagen(self, imagen) -> Dict[str, List]:
+        """Cajas de palabras de la imagen, en el formato de image_to_data"""
+        self._api.SetImage(imagen)
+        return _tsv_a_datos_ocr(self._api.GetTSVText(0))
+
+
+class MotorPytesseract:
+    """Tesseract como programa externo (pytesseract)
+
+    Cada llamada lanza tesseract y vuelve a cargar el idioma; se usa cuando
+    tesserocr no está instalado o no pudo iniciarse.
+    """
+
+    nombre = 'pytesseract'
+
+    def datos_imagen(self, imagen) -> Dict[str, List]:
+        """Cajas de palabras de la imagen, en el formato de image_to_data"""
+        return pytesseract.image_to_data(imagen, lang=IDIOMAS_OCR, config=CONFIG_TESSERACT,
+                                         output_type=pytesseract.Output.DICT)
+
+
+_motor_ocr = None  # Motor de OCR de este proceso (cada proceso de un pool tiene el suyo)
+
+
+def obtener_motor_ocr():
+    """Motor de OCR del proceso actual, creado la primera vez que se usa
+
+    Prefiere tesserocr, que mantiene el modelo cargado entre páginas y
+    documentos; si no está disponible o falla al iniciar, usa pytesseract.
+    """
+    global _motor_ocr
+    if _motor_ocr is None:
+        if TESSEROCR_DISPONIBLE:
+            try:
+                _motor_ocr = MotorTesserocr()
+            except Exception as e:
+                print(f"    ⚠ tesserocr no pudo iniciarse ({str(e)}), se usará pytesseract")
+        if _motor_ocr is None:
+            _motor_ocr = MotorPytesseract()
+    return _motor_ocr
+
+
+def texto_desde_datos_ocr(datos_ocr: Dict) -> str:
+    """Reconstruye el texto de la página a partir del resultado de image_to_data
+
+    Aproxima el texto de image_to_string sobre la misma imagen: palabras de una
+    línea separadas por espacios, una línea por renglón y una línea en blanco
+    entre párrafos. No es el renderizador de texto de Tesseract, así que los
+    espacios y saltos de línea pueden diferir en algunos casos. A cambio basta
+    una sola pasada de Tesseract por página para obtener el texto y las cajas
+    de palabras que usa extraer_tablas_ocr.
+    """
+    lineas = []
+    linea_actual = []
+    clave_anterior = None
+    for i, palabra in enumerate(datos_ocr['text']):
+        if not palabra.strip():
+            continue
+        clave = (datos_ocr['block_num'][i], datos_ocr['par_num'][i], datos_ocr['line_num'][i])
+        if clave != clave_anterior:
+            if linea_actual:
+                lineas.append(' '.join(linea_actual))
+                linea_actual = []
+                # Nuevo párrafo o bloque: línea en blanco de separación
+                if clave[:2] != clave_anterior[:2]:
+                    lineas.append('')
+            clave_anterior = clave
+        linea_actual.append(palabra)
+    if linea_actual:
+        lineas.append(' '.join(linea_actual))
+    return '\n'.join(lineas)
+
+
+def extraer_tablas_ocr(imagen, datos_ocr: Optional[Dict] = None) -> List[List]:
+    """Intenta detectar y extraer tablas de una imagen usando OCR
+
+    Si ya se tiene el resultado de image_to_data de la página (datos_ocr), se
+    usa ese en lugar de volver a pasar la imagen por Tesseract.
+    """
     try:
-        # Usar pytesseract con configuración para detectar estructura de tabla
-        texto_tsv = pytesseract.image_to_data(imagen, lang='spa+eng', output_type=pytesseract.Output.DICT)
+        # Cajas de palabras de Tesseract (con el motor de OCR del proceso)
+        if datos_ocr is not None:
+            texto_tsv = datos_ocr
+        else:
+            texto_tsv = obtener_motor_ocr().datos_imagen(imagen)
 
         # Agrupar texto por líneas basándose en coordenadas Y
         lineas = {}
@@ -744,27 +888,458 @@ def extraer_tablas_ocr(imagen) -> List[List]:
         print(f"    ⚠ No se pudieron detectar tablas en OCR: {str(e)}")
         return []
 
+MINIMO_CARACTERES_PAGINA = 50  # Una página con imágenes y menos texto que esto se trata como escaneada
+
+
+def _es_pagina_escaneada(pagina, texto_pagina: Optional[str]) -> bool:
+    """Detecta si una página no tiene capa de texto útil pero sí imágenes (página escaneada)
+
+    Las páginas en blanco (sin texto ni imágenes) no cuentan: no hay nada que reconocer.
+    """
+    return len((texto_pagina or "").strip()) < MINIMO_CARACTERES_PAGINA and bool(pagina.images)
+
+
+class DocumentoPDF:
+    """PDF abierto una sola vez para la detección de escaneado y la extracción
+
+    Abrir un PDF con pdfplumber analiza la cabecera y la tabla xref, y
+    extraer el texto de una página analiza su contenido. Compartiendo el mismo
+    documento (y el texto de las páginas ya leídas) entre es_escaneado() y la
+    extracción digital, cada PDF se abre y analiza una sola vez.
+    """
+
+    PAGINAS_DETECCION = 3  # Páginas revisadas para decidir si es escaneado
+    MINIMO_CARACTERES = 50  # Menos texto que esto en esas páginas = escaneado
+
+    def __init__(self, ruta_pdf: str):
+        self.ruta_pdf = ruta_pdf
+        self._pdf = None
+        self._error_apertura = None
+        self._textos = {}  # Texto ya extraído, por índice de página
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.cerrar()
+
+    @property
+    def pdf(self):
+        """Documento de pdfplumber; se abre en el primer acceso"""
+        if self._pdf is None:
+            if self._error_apertura is not None:
+                raise self._error_apertura
+            try:
+                self._pdf = pdfplumber.open(self.ruta_pdf)
+            except Exception as e:
+                self._error_apertura = e
+                raise
+        return self._pdf
+
+    def cerrar(self):
+        """Cierra el PDF y libera el texto en caché"""
+        if self._pdf is not None:
+            self._pdf.close()
+            self._pdf = None
+        self._textos.clear()
+
+    def texto_pagina(self, indice: int) -> str:
+        """Texto de una página, extraído una sola vez"""
+        if indice not in self._textos:
+            self._textos[indice] = self.pdf.pages[indice].extract_text() or ""
+        return self._textos[indice]
+
+    def texto_en_cache(self, indice: int) -> Optional[str]:
+        """Entrega (y libera) el texto ya extraído de una página, o None si aún no se extrajo"""
+        return self._textos.pop(indice, None)
+
+    def es_escaneado(self) -> bool:
+        """Detecta si el PDF es escaneado (sin texto seleccionable)"""
+        try:
+            # Revisar las primeras 3 páginas (o todas si hay menos)
+            paginas_a_revisar = min(self.PAGINAS_DETECCION, len(self.pdf.pages))
+            texto_total = "".join(self.texto_pagina(i) for i in range(paginas_a_revisar))
+
+            # Si hay muy poco texto o ninguno, probablemente es escaneado
+            return len(texto_total.strip()) < self.MINIMO_CARACTERES
+        except Exception:
+            return False
+
+
 def es_pdf_escaneado(ruta_pdf: str) -> bool:
     """Detecta si un PDF es escaneado (sin texto seleccionable)"""
+    with DocumentoPDF(ruta_pdf) as documento:
+        return documento.es_escaneado()
+
+
+# Caché de OCR por página, compartida por todos los scripts de extracción y de metadatos
+DIR_CACHE_OCR = str(Path.home() / '.cache' / 'edos-ocr')
+TAMANO_MAXIMO_CACHE_OCR_MB = 1024  # Al superarlo se borran las páginas usadas hace más tiempo
+VERSION_CACHE_OCR = "1"  # Formato de las entradas (el mismo que OCR_CACHE_VERSION de los scripts de metadatos)
+MOTOR_CACHE_OCR = 'tesseract'  # Motor y preprocesamiento de las páginas; cambiarlo al modificar cualquiera de los dos
+
+
+class CacheOCR:
+    """Caché en disco del OCR de cada página, con tamaño máximo
+
+    Cada entrada guarda el texto reconocido y las cajas de palabras de una página,
+    indexada por (SHA-256 del PDF, página desde 1, DPI, motor, idiomas): una página
+    ya reconocida no vuelve a pasar por el OCR aunque el PDF se renombre, cambie el
+    resto de la extracción o la pida otro script. Los scripts de metadatos (EasyOCR)
+    usan el mismo formato y la misma carpeta, y aprovechan el texto que deja aquí
+    Tesseract.
+
+    Cada entrada ocupa su propio archivo (<directorio>/<versión>/<clave[:2]>/<clave>.json)
+    escrito de forma atómica. Leer una entrada actualiza su fecha de modificación y,
+    cuando el total pasa del máximo, se borran las usadas hace más tiempo (LRU) hasta
+    dejarlo en el 90%. Cada proceso lleva su propia cuenta del tamaño, así que con
+    varios procesos el límite es aproximado.
+    """
+
+    def __init__(self, directorio, tamano_maximo_mb: int = TAMANO_MAXIMO_CACHE_OCR_MB):
+        self.directorio_base = str(directorio)
+        self.directorio = Path(directorio) / VERSION_CACHE_OCR
+        self.tamano_maximo_mb = tamano_maximo_mb
+        self._tamano_actual = None  # Bytes ocupados; se miden al guardar la primera entrada
+
+    def _ruta(self, campos: Tuple) -> Path:
+        clave = hashlib.sha256(json.dumps(list(campos)).encode('utf-8')).hexdigest()
+        return self.directorio / clave[:2] / f"{clave}.json"
+
+    def contiene(self, campos: Tuple) -> bool:
+        return self._ruta(campos).exists()
+
+    def obtener(self, campos: Tuple) -> Optional[Dict]:
+        """Entrada de la página ({'clave', 'texto', 'cajas'}), o None si no se ha reconocido"""
+        ruta = self._ruta(campos)
+        try:
+            with open(ruta, 'r', encoding='utf-8') as f:
+                entrada = json.load(f)
+            os.utime(ruta)  # Recién usada: será de las últimas en borrarse
+        except (OSError, ValueError):
+            return None
+        return entrada if entrada.get('clave') == list(campos) else None
+
+    def guardar(self, campos: Tuple, texto: str, cajas):
+        ruta = self._ruta(campos)
+        temporal = ruta.with_name(f"{ruta.name}.{os.getpid()}.tmp")
+        try:
+            ruta.parent.mkdir(parents=True, exist_ok=True)
+            with open(temporal, 'w', encoding='utf-8') as f:
+                json.dump({'clave': list(campos), 'texto': texto, 'cajas': cajas}, f,
+                          ensure_ascii=False, separators=(',', ':'))
+            os.replace(temporal, ruta)
+            if self._tamano_actual is None:
+                self._tamano_actual = sum(tamano for _, tamano, _ in self._entradas())
+            else:
+                self._tamano_actual += ruta.stat().st_size
+        except OSError as e:
+            print(f"    ⚠ No se pudo guardar el OCR en caché: {str(e)}")
+            return
+        if self._tamano_actual > self.tamano_maximo_mb * 1024 * 1024:
+            self._liberar_espacio()
+
+    def _entradas(self) -> List[Tuple[float, int, str]]:
+        """(fecha de último uso, tamaño, ruta) de cada entrada guardada"""
+        entradas = []
+        for subdirectorio in os.scandir(self.directorio):
+            if not subdirectorio.is_dir():
+                continue
+            for archivo in os.scandir(subdirectorio.path):
+                if archivo.name.endswith('.json'):
+                    try:
+                        info = archivo.stat()
+                    except OSError:
+                        continue  # Otro proceso la acaba de borrar
+                    entradas.append((info.st_mtime, info.st_size, archivo.path))
+        return entradas
+
+    def _liberar_espacio(self):
+        """Borra las entradas usadas hace más tiempo hasta dejar la caché en el 90% del máximo"""
+        entradas = sorted(self._entradas())
+        total = sum(tamano for _, tamano, _ in entradas)
+        limite = self.tamano_maximo_mb * 1024 * 1024 * 0.9
+        for _, tamano, ruta in entradas:
+            if total <= limite:
+                break
+            try:
+                os.remove(ruta)
+                total -= tamano
+            except OSError:
+                pass
+        self._tamano_actual = total
+
+
+_cache_ocr = None  # Caché de OCR de este proceso (None = desactivada); ver configurar_cache_ocr
+_hashes_pdf = {}  # (ruta, tamaño, fecha de modificación) -> SHA-256, para no releer el PDF en cada página
+
+
+def configurar_cache_ocr(directorio: Optional[str], tamano_maximo_mb: int = TAMANO_MAXIMO_CACHE_OCR_MB):
+    """Activa en este proceso la caché de OCR por página (con directorio None la desactiva)
+
+    Los procesos de los pools se crean con _crear_pool_procesos, que les
+    configura la misma caché.
+    """
+    global _cache_ocr
+    _cache_ocr = CacheOCR(directorio, tamano_maximo_mb) if directorio else None
+
+
+def _crear_pool_procesos(workers: int) -> ProcessPoolExecutor:
+    """Pool de procesos que usan la misma caché de OCR que este proceso"""
+    argumentos = (None,) if _cache_ocr is None else (_cache_ocr.directorio_base, _cache_ocr.tamano_maximo_mb)
+    return ProcessPoolExecutor(max_workers=workers, initializer=configurar_cache_ocr, initargs=argumentos)
+
+
+def _campos_cache_ocr(ruta_pdf: str, num_pagina: int, dpi: int) -> Optional[Tuple]:
+    """Clave de una página en la caché de OCR, o None si la caché está desactivada"""
+    if _cache_ocr is None:
+        return None
+    info = os.stat(ruta_pdf)
+    llave = (str(ruta_pdf), info.st_size, info.st_mtime_ns)
+    if llave not in _hashes_pdf:
+        _hashes_pdf[llave] = CacheExtraccion.hash_archivo(ruta_pdf)
+    return (_hashes_pdf[llave], num_pagina, dpi, MOTOR_CACHE_OCR, IDIOMAS_OCR)
+
+
+def _pagina_en_cache_ocr(ruta_pdf: str, num_pagina: int, dpi: int) -> bool:
+    campos = _campos_cache_ocr(ruta_pdf, num_pagina, dpi)
+    return campos is not None and _cache_ocr.contiene(campos)
+
+
+PAGINAS_POR_RASTERIZADO = 2  # Páginas que se convierten a imagen a la vez durante el OCR
+
+
+def _rasterizar_paginas(ruta_pdf: str, dpi: int) -> Iterator[Tuple[int, int, object]]:
+    """Convierte el PDF a imágenes en tandas de pocas páginas, en orden
+
+    Entrega (número de página, total de páginas, imagen). Solo hay en memoria
+    PAGINAS_POR_RASTERIZADO imágenes a la vez (más la que se está procesando),
+    en lugar de todo el documento, así que el consumo no crece con el número
+    de páginas de un escaneado grande.
+
+    Las páginas que ya están en la caché de OCR a ese dpi no se convierten: se
+    entregan con imagen None.
+    """
+    total_paginas = pdfinfo_from_path(ruta_pdf)["Pages"]
+    primera = 1
+    while primera <= total_paginas:
+        if _pagina_en_cache_ocr(ruta_pdf, primera, dpi):
+            yield primera, total_paginas, None
+            primera += 1
+            continue
+        # Tanda de hasta PAGINAS_POR_RASTERIZADO páginas seguidas que no están en la caché
+        ultima = primera
+        while (ultima < min(primera + PAGINAS_POR_RASTERIZADO - 1, total_paginas)
+               and not _pagina_en_cache_ocr(ruta_pdf, ultima + 1, dpi)):
+            ultima += 1
+        imagenes = convert_from_path(ruta_pdf, dpi=dpi, first_page=primera, last_page=ultima)
+        for desplazamiento in range(len(imagenes)):
+            imagen = imagenes[desplazamiento]
+            imagenes[desplazamiento] = None  # Que la imagen se libere en cuanto se termine con ella
+            yield primera + desplazamiento, total_paginas, imagen
+            del imagen
+        primera = ultima + 1
+
+_pool_ocr = None  # Pool de procesos de OCR, compartido por todos los documentos de la corrida
+_workers_ocr = 1
+
+
+def configurar_pool_ocr(workers: int):
+    """Fija cuántos procesos aplican OCR en paralelo a las páginas de los PDFs escaneados
+
+    El pool se crea la primera vez que un documento lo necesita y se reutiliza
+    para los siguientes, así los escaneados pequeños no pagan cada vez el
+    arranque de los procesos. cerrar_pool_ocr() lo libera al terminar.
+    """
+    global _workers_ocr
+    cerrar_pool_ocr()
+    _workers_ocr = max(1, workers)
+
+
+def _obtener_pool_ocr() -> Optional[ProcessPoolExecutor]:
+    """Pool de OCR compartido (None si el OCR es secuencial)"""
+    global _pool_ocr
+    if _workers_ocr <= 1:
+        return None
+    if _pool_ocr is None:
+        _pool_ocr = _crear_pool_procesos(_workers_ocr)
+    return _pool_ocr
+
+
+def cerrar_pool_ocr():
+    """Termina los procesos del pool de OCR, si se llegó a crear"""
+    global _pool_ocr
+    if _pool_ocr is not None:
+        _pool_ocr.shutdown(wait=True)
+        _pool_ocr = None
+
+
+def _ocr_pagina_en_proceso(ruta_pdf: str, num_pagina: int, dpi: int) -> Tuple[str, List[List], bool]:
+    """Convierte a imagen una sola página del PDF y le aplica OCR (trabajo del pool de OCR)
+
+    Cada proceso genera la imagen de su página, así las imágenes no tienen
+    que viajar entre procesos. Si la página está en la caché de OCR, no se
+    llega a convertir.
+    """
+    return _ocr_pagina_escaneada(None, ruta_pdf, num_pagina, dpi)
+
+
+def _ocr_paginas_en_paralelo(ruta_pdf: str, dpi: int, pool: ProcessPoolExecutor,
+                             paginas: Optional[List[int]] = None) -> Iterator[Tuple[int, int, Tuple[str, List[List], bool]]]:
+    """Reparte las páginas del PDF entre el pool de OCR y las entrega en orden de página
+
+    Entrega (número de página, total de páginas, resultado de _ocr_pagina_escaneada).
+    Con paginas (números de página desde 1, en orden) solo se procesan esas.
+    """
+    if paginas is None:
+        paginas = list(range(1, pdfinfo_from_path(ruta_pdf)["Pages"] + 1))
+    total_paginas = len(paginas)
+    futuros = [pool.submit(_ocr_pagina_en_proceso, ruta_pdf, num_pagina, dpi)
+               for num_pagina in paginas]
     try:
-        with pdfplumber.open(ruta_pdf) as pdf:
-            # Revisar las primeras 3 páginas (o todas si hay menos)
-            paginas_a_revisar = min(3, len(pdf.pages))
-            texto_total = ""
+        for num_pagina, futuro in zip(paginas, futuros):
+            yield num_pagina, total_paginas, _resultado_pool_ocr(futuro, pool)
+    finally:
+        # Si el documento se abandona a medias, no seguir procesando sus páginas
+        for futuro in futuros:
+            futuro.cancel()
 
-            for i in range(paginas_a_revisar):
-                texto = pdf.pages[i].extract_text()
-                if texto:
-                    texto_total += texto
 
-            # Si hay muy poco texto o ninguno, probablemente es escaneado
-            # Umbral: menos de 50 caracteres en las primeras páginas
-            return len(texto_total.strip()) < 50
-    except:
-        return False
+def _resultado_pool_ocr(futuro, pool: ProcessPoolExecutor) -> Tuple[str, List[List], bool]:
+    """Espera el OCR de una página enviada al pool; si el pool se rompió, lo descarta"""
+    global _pool_ocr
+    try:
+        return futuro.result()
+    except BrokenProcessPool:
+        # El pool quedó inutilizable: el siguiente documento creará uno nuevo
+        if _pool_ocr is pool:
+            _pool_ocr = None
+        pool.shutdown(wait=False)
+        raise
+
+
+PAGINAS_ADELANTO_OCR = 2  # Páginas por proceso de OCR que se clasifican por delante de la extracción
+
+
+def _clasificar_paginas(documento: DocumentoPDF, ruta_pdf: str) -> Iterator[Tuple[int, object, str, Optional[Callable]]]:
+    """Recorre las páginas del PDF y decide al llegar a cada una si necesita OCR
+
+    Entrega (índice de página, página de pdfplumber, texto digital, ocr), donde ocr
+    es None para las páginas con capa de texto y, para las escaneadas
+    (_es_pagina_escaneada), una función sin argumentos que devuelve el resultado
+    de _ocr_pagina_escaneada. Sin pool de OCR la página se convierte y procesa al
+    llamarla; con el pool de --workers-ocr se clasifican hasta
+    PAGINAS_ADELANTO_OCR páginas por proceso por delante, para que el OCR de las
+    escaneadas corra en paralelo. Solo se guarda el texto de esas páginas, nunca
+    el del documento entero.
+    """
+    pool = _obtener_pool_ocr() if OCR_DISPONIBLE else None
+    adelanto = PAGINAS_ADELANTO_OCR * _workers_ocr if pool is not None else 0
+    pendientes = deque()
+    futuros = []
+    try:
+        for num_pagina, pagina in enumerate(documento.pdf.pages):
+            texto_pagina = documento.texto_en_cache(num_pagina)
+            if texto_pagina is None:
+                texto_pagina = pagina.extract_text() or ""
+            ocr = None
+            if OCR_DISPONIBLE and _es_pagina_escaneada(pagina, texto_pagina):
+                # Si el pool se rompió en una página anterior, seguir sin él
+                if pool is not None and pool is _pool_ocr:
+                    futuro = pool.submit(_ocr_pagina_en_proceso, ruta_pdf, num_pagina + 1, DPI_OCR_INICIAL)
+                    futuros.append(futuro)
+                    ocr = partial(_resultado_pool_ocr, futuro, pool)
+                else:
+                    ocr = partial(_ocr_pagina_en_proceso, ruta_pdf, num_pagina + 1, DPI_OCR_INICIAL)
+            pendientes.append((num_pagina, pagina, texto_pagina, ocr))
+            if len(pendientes) > adelanto:
+                yield pendientes.popleft()
+        while pendientes:
+            yield pendientes.popleft()
+    finally:
+        # Si el documento se abandona a medias, no seguir procesando sus páginas
+        for futuro in futuros:
+            futuro.cancel()
 
-def extraer_texto_con_ocr(ruta_pdf: str) -> str:
-    """Extrae texto de un PDF escaneado usando OCR, incluyendo detección de tablas"""
+
+DPI_OCR = 300  # 300 DPI = alta calidad (páginas de baja confianza)
+DPI_OCR_INICIAL = 200  # Primera pasada de OCR; igualarla a DPI_OCR desactiva el OCR adaptativo
+CONFIANZA_MINIMA_OCR = 75  # Confianza media de Tesseract (0-100) por debajo de la cual se repite a DPI_OCR
+
+
+def _confianza_media_ocr(datos_ocr: Dict) -> Optional[float]:
+    """Confianza media (0-100) de las palabras reconocidas por Tesseract, o None si no reconoció ninguna"""
+    confianzas = [conf for conf, palabra in zip(datos_ocr['conf'], datos_ocr['text'])
+                  if conf >= 0 and palabra.strip()]
+    return sum(confianzas) / len(confianzas) if confianzas else None
+
+
+def _datos_ocr_pagina(imagen, ruta_pdf: str, num_pagina: int, dpi: int) -> Dict[str, List]:
+    """Cajas de palabras de una página convertida a dpi, en el formato de image_to_data
+
+    Si la página ya se reconoció (en esta corrida, en una anterior o desde otro
+    script) se toman de la caché de OCR sin convertirla a imagen. Si no, se
+    convierte (cuando imagen es None), se le aplica el motor de OCR y el
+    resultado se guarda en la caché.
+    """
+    campos = _campos_cache_ocr(ruta_pdf, num_pagina, dpi)
+    if campos is not None:
+        entrada = _cache_ocr.obtener(campos)
+        if entrada is not None:
+            return entrada['cajas']
+
+    if imagen is None:
+        imagen = convert_from_path(ruta_pdf, dpi=dpi, first_page=num_pagina, last_page=num_pagina)[0]
+    datos_ocr = obtener_motor_ocr().datos_imagen(imagen)
+    if campos is not None:
+        _cache_ocr.guardar(campos, texto_desde_datos_ocr(datos_ocr), datos_ocr)
+    return datos_ocr
+
+
+def _ocr_pagina_escaneada(imagen, ruta_pdf: str, num_pagina: int, dpi: int) -> Tuple[str, List[List], bool]:
+    """Aplica OCR a la imagen de una página
+
+    La imagen viene convertida a dpi (normalmente DPI_OCR_INICIAL), o es None si
+    la página ya está en la caché de OCR (ver _datos_ocr_pagina). Si la
+    confianza media de Tesseract queda por debajo de CONFIANZA_MINIMA_OCR, la
+    página se vuelve a convertir a DPI_OCR y se procesa otra vez; se conserva
+    la pasada con mejor confianza.
+
+    Returns:
+        (texto de la página, tablas detectadas, si se repitió a DPI_OCR). Las
+        tablas se devuelven sin numerar: las numera quien une las páginas, en orden.
+    """
+    # Extraer texto de la página (una sola pasada de Tesseract: de las
+    # cajas de palabras salen tanto el texto como las tablas)
+    datos_ocr = _datos_ocr_pagina(imagen, ruta_pdf, num_pagina, dpi)
+
+    # Confianza baja: repetir la página con más resolución
+    repetida = False
+    confianza = _confianza_media_ocr(datos_ocr) if dpi < DPI_OCR else None
+    if confianza is not None and confianza < CONFIANZA_MINIMA_OCR:
+        datos_ocr_alta = _datos_ocr_pagina(None, ruta_pdf, num_pagina, DPI_OCR)
+        repetida = True
+        if (_confianza_media_ocr(datos_ocr_alta) or 0) >= confianza:
+            datos_ocr = datos_ocr_alta
+
+    texto_pagina = texto_desde_datos_ocr(datos_ocr)
+
+    # Intentar detectar tablas en la imagen
+    tablas_detectadas = extraer_tablas_ocr(None, datos_ocr)
+
+    return texto_pagina, tablas_detectadas, repetida
+
+
+
+def extraer_texto_con_ocr(ruta_pdf: str, paginas_ocr: Optional[List[int]] = None,
+                          paginas_dpi_alto: Optional[List[int]] = None) -> str:
+    """Extrae texto de un PDF escaneado usando OCR, incluyendo detección de tablas
+
+    Si está configurado el pool de OCR (configurar_pool_ocr), las páginas se
+    reparten entre sus procesos. Si se pasa la lista paginas_ocr, se le agregan
+    los números de las páginas procesadas, y a paginas_dpi_alto los de las que
+    se repitieron a DPI_OCR por baja confianza.
+    """
     if not OCR_DISPONIBLE:
         return "Error: OCR no está disponible. Instala pytesseract y pdf2image."
 
@@ -774,28 +1349,31 @@ def extraer_texto_con_ocr(ruta_pdf: str) -> str:
     try:
         print("  🔍 PDF escaneado detectado. Aplicando OCR (esto puede tardar)...")
 
-        # Convertir PDF a imágenes
-        imagenes = convert_from_path(ruta_pdf, dpi=200)  # DPI más alto = mejor calidad OCR
-
-        total_paginas = len(imagenes)
-        for i, imagen in enumerate(imagenes, 1):
-            print(f"    OCR: Página {i}/{total_paginas}...")
-
-            # Extraer texto de la página
-            texto_pagina = pytesseract.image_to_string(imagen, lang='spa+eng')
-
-            # Intentar detectar tablas en la imagen
-            tablas_detectadas = extraer_tablas_ocr(imagen)
-
-            # Si se detectaron tablas, procesarlas
-            if tablas_detectadas:
-                # Para cada tabla detectada, insertarla en el texto
-                for tabla in tablas_detectadas:
-                    contador_tablas_global += 1
-                    tabla_json = convertir_tabla_a_json_string(tabla, contador_tablas_global)
-                    if tabla_json:
-                        # Insertar la tabla al final del texto de la página
-                        texto_pagina += f" {tabla_json} "
+        pool = _obtener_pool_ocr()
+        if pool is not None:
+            # Cada proceso del pool convierte y procesa sus propias páginas
+            paginas = _ocr_paginas_en_paralelo(ruta_pdf, DPI_OCR_INICIAL, pool)
+        else:
+            # Convertir PDF a imágenes a DPI_OCR_INICIAL (las páginas de baja confianza
+            # se repiten a DPI_OCR), unas pocas páginas a la vez para no tener el
+            # documento entero en memoria
+            paginas = ((i, total_paginas, _ocr_pagina_escaneada(imagen, ruta_pdf, i, DPI_OCR_INICIAL))
+                       for i, total_paginas, imagen in _rasterizar_paginas(ruta_pdf, dpi=DPI_OCR_INICIAL))
+
+        for i, total_paginas, (texto_pagina, tablas_detectadas, repetida) in paginas:
+            print(f"    OCR: Página {i}/{total_paginas}..." + (f" (repetida a {DPI_OCR} DPI)" if repetida else ""))
+            if paginas_ocr is not None:
+                paginas_ocr.append(i)
+            if repetida and paginas_dpi_alto is not None:
+                paginas_dpi_alto.append(i)
+
+            # Para cada tabla detectada, insertarla en el texto
+            for tabla in tablas_detectadas:
+                contador_tablas_global += 1
+                tabla_json = convertir_tabla_a_json_string(tabla, contador_tablas_global)
+                if tabla_json:
+                    # Insertar la tabla al final del texto de la página
+                    texto_pagina += f" {tabla_json} "
 
             if texto_pagina.strip():
                 texto_completo.append(texto_pagina)
@@ -913,110 +1491,267 @@ def detectar_encabezado_pie(paginas_texto: List[str]) -> Tuple[List[str], List[s
     return encabezados_comunes, pies_comunes
 
 
-def eliminar_encabezados_pies_contextual(paginas_texto: List[str], encabezados: List[str], pies: List[str], margenes_laterales: List[str] = None) -> List[str]:
-    """Elimina encabezados, pies de página y márgenes laterales de forma AGRESIVA
+# Patrones GENÉRICOS y MUY AGRESIVOS de encabezados/pies/márgenes a eliminar
+PATRONES_ENCABEZADO_PIE = [
+    # Patrones de texto fragmentado (cintas laterales)
+    r'^[A-ZÁÉÍÓÚÑ]\s+[A-ZÁÉÍÓÚÑ]\s+[A-ZÁÉÍÓÚÑ]',  # Letras separadas: L Í T
+    r'^[A-ZÁÉÍÓÚÑ]{1,2}\s*$',  # 1-2 letras solas
+    r'^\d\s*$',  # Un solo dígito
+
+    # Patrones específicos de EDOMEX
+    r'CONSTITUCIÓN\s+POLÍTICA\s+DEL\s+ESTADO',
+    r'ESTADO\s+LIBRE\s+Y\s+SOBERANO',
+    r'LIBRE\s+Y\s+SOBERANO\s+DE\s+MÉXICO',
+    r'DE\s+MÉXICO',
+    r'CC\s+OO\s+N\s+S',  # Texto muy espaciado
+    r'[A-Z]\s+[A-Z]\s+[A-Z]\s+[A-Z]',  # 4+ letras espaciadas
+
+    # Patrones de Diario Oficial
+    r'DIARIO OFICIAL',
+    r'Diario Oficial',
+    r'(Primera|Segunda|Tercera|Cuarta|Quinta|Sexta|Séptima|Octava)\s+(Sección|SECCIÓN|Seccion)',
+
+    # Fechas en encabezados (más patrones)
+    r'(Lunes|Martes|Miércoles|Jueves|Viernes|Sábado|Domingo)\s+\d+\s+de\s+\w+\s+de\s+\d{4}',
+    r'DOF\s+\d{2}[-/]\d{2}[-/]\d{4}',
+    r'\d{2}\s+de\s+\w+\s+de\s+\d{4}',
+    r'\d{1,2}[-/]\d{1,2}[-/]\d{2,4}',
+    r'(Enero|Febrero|Marzo|Abril|Mayo|Junio|Julio|Agosto|Septiembre|Octubre|Noviembre|Diciembre)\s+de\s+\d{4}',
+
+    # Números de página (más variantes)
+    r'^\d+\s*$',  # Solo números
+    r'^-\s*\d+\s*-$',  # -1-, -2-
+    r'^Página\s+\d+',
+    r'^Page\s+\d+',
+    r'^Pág\.\s*\d+',
+    r'^\d+\s+de\s+\d+\s*$',  # "1 de 21"
+    r'^\d+\s*/\s*\d+\s*$',  # "1/21"
+    r'^\d+\s+\(\w+\s+(Sección|SECCIÓN)\)',
+
+    # Patrones de instituciones (más completos)
+    r'CÁMARA DE DIPUTADOS',
+    r'CÁMARA DE SENADORES',
+    r'CONGRESO DE LA UNIÓN',
+    r'H\.\s*CONGRESO',
+    r'HONORABLE CONGRESO',
+    r'^Secretaría\s+(General|de\s+\w+)',
+    r'^Secretaría\s+de\s+Servicios',
+    r'PODER EJECUTIVO',
+    r'PODER LEGISLATIVO',
+    r'PODER JUDICIAL',
+    r'GOBIERNO\s+(FEDERAL|DEL ESTADO|DE\s+)',
+    r'GACETA\s+(OFICIAL|PARLAMENTARIA)',
+
+    # Patrones de leyes/reglamentos en encabezados
+    r'^(Nuevo\s+)?Reglamento\s+DOF',
+    r'REGLAMENTO\s+(DE\s+LA\s+)?LEY',
+    r'^LEY\s+FEDERAL\s+DE',
+    r'^CÓDIGO\s+(CIVIL|PENAL|FEDERAL)',
+    r'GUBERNAMENTAL\s*$',
+    r'TRANSPARENCIA\s+Y\s+ACCESO',
+    r'ÚLTIMA\s+REFORMA',
+    r'PUBLICADA?\s+EN\s+EL\s+DOF',
+    r'PUBLICADA?\s+EN\s+(LA\s+)?GACETA',
+
+    # Patrones de títulos largos en mayúsculas
+    r'^[A-ZÁÉÍÓÚÑ\s]{45,}$',  # Líneas de solo mayúsculas muy largas
+
+    # Patrones de márgenes laterales / cintas identificativas
+    r'^[A-ZÁÉÍÓÚÑ]{1,3}\s*$',  # 1-3 letras mayúsculas solas (posible cinta)
+    r'^\d{1,4}\s*$',  # Solo números cortos (año en margen)
+    r'^[IVXLCDM]+\s*$',  # Números romanos solos
+
+    # Patrones específicos de encabezados repetitivos
+    r'^Al margen un sello',
+    r'^TEXTO VIGENTE',
+    r'^Nueva Ley publicada',
+    r'^\d+\s+\(.*?(Sección|Edición)\)',
+
+    # URLs y referencias web (a veces en pies)
+    r'www\.',
+    r'http[s]?://',
+    r'\.gob\.mx',
+    r'\.com\.mx',
+
+    # Firmas y sellos (típicos en pies)
+    r'Firma\s+electrónica',
+    r'Sello\s+digital',
+    r'Cadena\s+original',
+]
+
+
+# re.IGNORECASE compara cada letra por su minúscula simple y además equipara
+# 'ı' con 'i' y 'ſ' con 's'; 'İ' se pliega a 'i' (str.lower() la convierte en dos caracteres)
+_PLIEGUE_IGNORECASE = str.maketrans({'İ': 'i', 'ı': 'i', 'ſ': 's'})
+
+# Contenido de un grupo formado solo por alternativas literales, p. ej. Enero|Febrero
+_ALTERNATIVAS_LITERALES = re.compile(r'[^\\()\[\]?*+{}.^$|]+(?:\|[^\\()\[\]?*+{}.^$|]+)*')
+
+
+def _plegar(texto: str) -> str:
+    """Pasa el texto a minúsculas de la misma forma en que re.IGNORECASE compara letras"""
+    plegado = texto.lower()
+    if 'ı' in plegado or 'ſ' in plegado or '\u0307' in plegado:
+        plegado = texto.translate(_PLIEGUE_IGNORECASE).lower()
+    return plegado
+
+
+def _cierre_grupo(patron: str, inicio: int) -> int:
+    """Posición del paréntesis que cierra el grupo abierto en patron[inicio]"""
+    profundidad = 0
+    i = inicio
+    while True:
+        c = patron[i]
+        if c == '\\':
+            i += 2
+            continue
+        if c == '(':
+            profundidad += 1
+        elif c == ')':
+            profundidad -= 1
+            if profundidad == 0:
+                return i
+        i += 1
 
-    Elimina:
-    - Encabezados detectados automáticamente
-    - Pies de página detectados automáticamente
-    - Márgenes laterales y cintas identificativas
-    - Patrones comunes: DIARIO OFICIAL, fechas, números de página, instituciones, etc.
+
+def _literales_obligatorios(patron: str) -> List[str]:
+    """Textos (plegados) de los que toda coincidencia del patrón contiene al menos uno
+
+    Solo se analiza el nivel superior del patrón: tramos de texto literal y
+    grupos formados únicamente por alternativas literales, p. ej. (Enero|Febrero).
+    Devuelve la opción más selectiva, o [] si no hay ninguna de 3+ caracteres.
     """
-    if margenes_laterales is None:
-        margenes_laterales = []
-
-    paginas_limpiadas = []
-
-    # Patrones GENÉRICOS y MUY AGRESIVOS de encabezados/pies/márgenes a eliminar
-    patrones_eliminar = [
-        # Patrones de texto fragmentado (cintas laterales)
-        r'^[A-ZÁÉÍÓÚÑ]\s+[A-ZÁÉÍÓÚÑ]\s+[A-ZÁÉÍÓÚÑ]',  # Letras separadas: L Í T
-        r'^[A-ZÁÉÍÓÚÑ]{1,2}\s*$',  # 1-2 letras solas
-        r'^\d\s*$',  # Un solo dígito
-
-        # Patrones específicos de EDOMEX
-        r'CONSTITUCIÓN\s+POLÍTICA\s+DEL\s+ESTADO',
-        r'ESTADO\s+LIBRE\s+Y\s+SOBERANO',
-        r'LIBRE\s+Y\s+SOBERANO\s+DE\s+MÉXICO',
-        r'DE\s+MÉXICO',
-        r'CC\s+OO\s+N\s+S',  # Texto muy espaciado
-        r'[A-Z]\s+[A-Z]\s+[A-Z]\s+[A-Z]',  # 4+ letras espaciadas
-
-        # Patrones de Diario Oficial
-        r'DIARIO OFICIAL',
-        r'Diario Oficial',
-        r'(Primera|Segunda|Tercera|Cuarta|Quinta|Sexta|Séptima|Octava)\s+(Sección|SECCIÓN|Seccion)',
-
-        # Fechas en encabezados (más patrones)
-        r'(Lunes|Martes|Miércoles|Jueves|Viernes|Sábado|Domingo)\s+\d+\s+de\s+\w+\s+de\s+\d{4}',
-        r'DOF\s+\d{2}[-/]\d{2}[-/]\d{4}',
-        r'\d{2}\s+de\s+\w+\s+de\s+\d{4}',
-        r'\d{1,2}[-/]\d{1,2}[-/]\d{2,4}',
-        r'(Enero|Febrero|Marzo|Abril|Mayo|Junio|Julio|Agosto|Septiembre|Octubre|Noviembre|Diciembre)\s+de\s+\d{4}',
-
-        # Números de página (más variantes)
-        r'^\d+\s*$',  # Solo números
-        r'^-\s*\d+\s*-$',  # -1-, -2-
-        r'^Página\s+\d+',
-        r'^Page\s+\d+',
-        r'^Pág\.\s*\d+',
-        r'^\d+\s+de\s+\d+\s*$',  # "1 de 21"
-        r'^\d+\s*/\s*\d+\s*$',  # "1/21"
-        r'^\d+\s+\(\w+\s+(Sección|SECCIÓN)\)',
-
-        # Patrones de instituciones (más completos)
-        r'CÁMARA DE DIPUTADOS',
-        r'CÁMARA DE SENADORES',
-        r'CONGRESO DE LA UNIÓN',
-        r'H\.\s*CONGRESO',
-        r'HONORABLE CONGRESO',
-        r'^Secretaría\s+(General|de\s+\w+)',
-        r'^Secretaría\s+de\s+Servicios',
-        r'PODER EJECUTIVO',
-        r'PODER LEGISLATIVO',
-        r'PODER JUDICIAL',
-        r'GOBIERNO\s+(FEDERAL|DEL ESTADO|DE\s+)',
-        r'GACETA\s+(OFICIAL|PARLAMENTARIA)',
-
-        # Patrones de leyes/reglamentos en encabezados
-        r'^(Nuevo\s+)?Reglamento\s+DOF',
-        r'REGLAMENTO\s+(DE\s+LA\s+)?LEY',
-        r'^LEY\s+FEDERAL\s+DE',
-        r'^CÓDIGO\s+(CIVIL|PENAL|FEDERAL)',
-        r'GUBERNAMENTAL\s*$',
-        r'TRANSPARENCIA\s+Y\s+ACCESO',
-        r'ÚLTIMA\s+REFORMA',
-        r'PUBLICADA?\s+EN\s+EL\s+DOF',
-        r'PUBLICADA?\s+EN\s+(LA\s+)?GACETA',
-
-        # Patrones de títulos largos en mayúsculas
-        r'^[A-ZÁÉÍÓÚÑ\s]{45,}$',  # Líneas de solo mayúsculas muy largas
-
-        # Patrones de márgenes laterales / cintas identificativas
-        r'^[A-ZÁÉÍÓÚÑ]{1,3}\s*$',  # 1-3 letras mayúsculas solas (posible cinta)
-        r'^\d{1,4}\s*$',  # Solo números cortos (año en margen)
-        r'^[IVXLCDM]+\s*$',  # Números romanos solos
-
-        # Patrones específicos de encabezados repetitivos
-        r'^Al margen un sello',
-        r'^TEXTO VIGENTE',
-        r'^Nueva Ley publicada',
-        r'^\d+\s+\(.*?(Sección|Edición)\)',
-
-        # URLs y referencias web (a veces en pies)
-        r'www\.',
-        r'http[s]?://',
-        r'\.gob\.mx',
-        r'\.com\.mx',
-
-        # Firmas y sellos (típicos en pies)
-        r'Firma\s+electrónica',
-        r'Sello\s+digital',
-        r'Cadena\s+original',
-    ]
+    candidatos = []
+    tramo = ''
+    i = 0
+    while i < len(patron):
+        c = patron[i]
+        if c == '\\':
+            # Clase o carácter escapado: corta el tramo literal
+            candidatos.append([tramo])
+            tramo = ''
+            i += 2
+            continue
+        if c == '[':
+            candidatos.append([tramo])
+            tramo = ''
+            i = patron.index(']', i + 1)
+        elif c == '(':
+            candidatos.append([tramo])
+            tramo = ''
+            fin = _cierre_grupo(patron, i)
+            contenido = patron[i + 1:fin]
+            # El grupo es obligatorio si no lo sigue un cuantificador que permita omitirlo
+            if patron[fin + 1:fin + 2] not in ('?', '*', '{') and _ALTERNATIVAS_LITERALES.fullmatch(contenido):
+                candidatos.append(contenido.split('|'))
+            i = fin
+        elif c == '|':
+            # Alternativas en el nivel superior: ningún literal es obligatorio
+            return []
+        elif c in '?*{':
+            # El carácter anterior es opcional o se repite
+            candidatos.append([tramo[:-1]])
+            tramo = ''
+            if c == '{':
+                i = patron.index('}', i)
+        elif c in '.^$+':
+            candidatos.append([tramo])
+            tramo = ''
+        else:
+            tramo += c
+        i += 1
+    candidatos.append([tramo])
 
-    for pagina in paginas_texto:
+    candidatos = [list(dict.fromkeys(_plegar(t) for t in alternativas))
+                  for alternativas in candidatos if all(alternativas)]
+    if not candidatos:
+        return []
+    mejor = max(candidatos, key=lambda alternativas: min(len(t) for t in alternativas))
+    return mejor if min(len(t) for t in mejor) >= 3 else []
+
+
+def _compilar_alternativa(patrones: List[str]):
+    """Une varios patrones en una sola expresión regular compilada (o None si no hay patrones)"""
+    if not patrones:
+        return None
+    return re.compile('|'.join(f'(?:{patron})' for patron in patrones), re.IGNORECASE)
+
+
+def _compilar_literales(textos: List[str]):
+    """Compila textos literales en una alternancia para buscarlos todos a la vez"""
+    if not textos:
+        return None
+    return re.compile('|'.join(re.escape(texto) for texto in dict.fromkeys(textos)))
+
+
+class _PatronesCombinados:
+    """Evalúa una lista de patrones (con re.IGNORECASE) como si fuera uno solo
+
+    El motor de re prueba cada alternativa en cada posición de la línea, así
+    que una alternancia grande cuesta casi lo mismo que los patrones por
+    separado. Por eso los patrones con un literal obligatorio se agrupan por
+    ese literal y solo se evalúan si aparece en la línea plegada (búsqueda con
+    `in`). Los demás van en dos alternancias: los anclados con ^ (probados
+    solo al inicio de la línea) y el resto.
+    """
+
+    def __init__(self, patrones: List[str]):
+        por_literal = {}
+        anclados = []
+        libres = []
+        for patron in patrones:
+            literales = _literales_obligatorios(patron)
+            if literales:
+                por_literal.setdefault(tuple(literales), []).append(patron)
+            elif patron.startswith('^') and '|' not in patron:
+                anclados.append(patron[1:])
+            else:
+                libres.append(patron)
+
+        self._anclados = _compilar_alternativa(anclados)
+        self._libres = _compilar_alternativa(libres)
+        self._con_literal = []  # (literal, alternancia de los patrones que lo exigen)
+        for literales, grupo in por_literal.items():
+            regex = _compilar_alternativa(grupo)
+            self._con_literal.extend((literal, regex) for literal in literales)
+
+    def buscar(self, linea: str, linea_plegada: str) -> bool:
+        """True si algún patrón encuentra coincidencia en la línea"""
+        if self._anclados and self._anclados.match(linea):
+            return True
+        if self._libres and self._libres.search(linea):
+            return True
+        return any(regex.search(linea) for literal, regex in self._con_literal if literal in linea_plegada)
+
+
+def _es_patron_toda_pagina(patron: str) -> bool:
+    """Patrones de texto fragmentado (cintas laterales) que se verifican en TODA la página"""
+    return patron.startswith(r'^[A-ZÁÉÍÓÚÑ]') or r'CC\s+OO' in patron or 'CONSTITUCIÓN' in patron or 'LIBRE' in patron
+
+
+class FiltroEncabezadosPies:
+    """Clasifica cada línea de una página en una sola pasada
+
+    Los patrones fijos se preparan una sola vez por proceso en dos conjuntos:
+    el de toda la página (texto fragmentado) y el de las primeras y últimas
+    líneas (todos los patrones). Los encabezados, pies y márgenes detectados en
+    el documento se compilan en alternancias de literales.
+    """
+
+    LINEAS_ZONA = 10  # Primeras/últimas líneas de la página donde se buscan encabezados y pies
+
+    _patrones_toda_pagina = _PatronesCombinados([p for p in PATRONES_ENCABEZADO_PIE if _es_patron_toda_pagina(p)])
+    _patrones_bordes = _PatronesCombinados(PATRONES_ENCABEZADO_PIE)
+
+    def __init__(self, encabezados: List[str], pies: List[str], margenes_laterales: List[str]):
+        self._encabezados = _compilar_literales(encabezados)
+        self._pies = _compilar_literales(pies)
+        self._margenes = _compilar_literales(margenes_laterales)
+
+    def limpiar_pagina(self, pagina: str) -> str:
+        """Devuelve la página sin las líneas de encabezado, pie o margen"""
         lineas = pagina.split('\n')
+        inicio_pie = len(lineas) - self.LINEAS_ZONA
         lineas_mantener = []
 
         for i, linea in enumerate(lineas):
@@ -1026,67 +1761,93 @@ def eliminar_encabezados_pies_contextual(paginas_texto: List[str], encabezados:
             if not linea_stripped:
                 continue
 
-            es_eliminar = False
+            en_encabezado = i < self.LINEAS_ZONA
+            en_pie = i >= inicio_pie
+            linea_plegada = _plegar(linea_stripped)
 
-            # PRIMERO: Verificar patrones de texto fragmentado EN TODA LA PÁGINA
-            # (no solo en encabezado/pie, porque las cintas laterales están en todo el margen)
-            for patron in patrones_eliminar:
-                # Patrones de texto fragmentado se verifican en TODA la página
-                if patron.startswith(r'^[A-ZÁÉÍÓÚÑ]') or r'CC\s+OO' in patron or 'CONSTITUCIÓN' in patron or 'LIBRE' in patron:
-                    if re.search(patron, linea_stripped, re.IGNORECASE):
-                        es_eliminar = True
-                        break
+            # En las primeras/últimas líneas aplican todos los patrones
+            # (incluidos los de toda la página); en el resto solo los de texto fragmentado
+            if en_encabezado or en_pie:
+                if self._patrones_bordes.buscar(linea_stripped, linea_plegada):
+                    continue
+            elif self._patrones_toda_pagina.buscar(linea_stripped, linea_plegada):
+                continue
 
-            # Si ya se marcó para eliminar, pasar a la siguiente línea
-            if es_eliminar:
+            # Encabezados y pies detectados automáticamente (contención incluye igualdad)
+            if en_encabezado and self._encabezados and self._encabezados.search(linea_stripped):
+                continue
+            if en_pie and self._pies and self._pies.search(linea_stripped):
                 continue
 
-            # Verificar patrones agresivos en las primeras 10 líneas
-            if i < 10:
-                for patron in patrones_eliminar:
-                    if re.search(patron, linea_stripped, re.IGNORECASE):
-                        es_eliminar = True
-                        break
+            # Márgenes laterales detectados
+            if self._margenes and self._margenes.search(linea_stripped):
+                continue
 
-            # Verificar patrones agresivos en las últimas 10 líneas
-            if i >= len(lineas) - 10:
-                for patron in patrones_eliminar:
-                    if re.search(patron, linea_stripped, re.IGNORECASE):
-                        es_eliminar = True
-                        break
+            lineas_mantener.append(linea)
 
-            # Verificar encabezados detectados automáticamente (primeras 10 líneas)
-            if i < 10:
-                for encabezado in encabezados:
-                    # Comparación exacta o similitud alta
-                    if linea_stripped == encabezado or encabezado in linea_stripped:
-                        es_eliminar = True
-                        break
+        # Reconstruir la página sin encabezados/pies/márgenes
+        return '\n'.join(lineas_mantener)
 
-            # Verificar pies detectados automáticamente (últimas 10 líneas)
-            if i >= len(lineas) - 10:
-                for pie in pies:
-                    if linea_stripped == pie or pie in linea_stripped:
-                        es_eliminar = True
-                        break
 
-            # Verificar márgenes laterales detectados
-            if margenes_laterales:
-                for margen in margenes_laterales:
-                    if margen in linea_stripped:
-                        es_eliminar = True
-                        break
+def eliminar_encabezados_pies_contextual(paginas_texto: List[str], encabezados: List[str], pies: List[str], margenes_laterales: List[str] = None) -> List[str]:
+    """Elimina encabezados, pies de página y márgenes laterales de forma AGRESIVA
 
-            # Mantener la línea solo si NO debe eliminarse
-            if not es_eliminar:
-                lineas_mantener.append(linea)
+    Elimina:
+    - Encabezados detectados automáticamente
+    - Pies de página detectados automáticamente
+    - Márgenes laterales y cintas identificativas
+    - Patrones comunes: DIARIO OFICIAL, fechas, números de página, instituciones, etc.
+    """
+    filtro = FiltroEncabezadosPies(encabezados, pies, margenes_laterales or [])
+    return [filtro.limpiar_pagina(pagina) for pagina in paginas_texto]
 
-        # Reconstruir la página sin encabezados/pies/márgenes
-        paginas_limpiadas.append('\n'.join(lineas_mantener))
+class _IndiceBordes:
+    """Bordes de una página ordenados una sola vez para validar todas sus tablas
 
-    return paginas_limpiadas
+    Las líneas horizontales significativas (más de 50 pt) se guardan ordenadas
+    por su y, y las verticales (más de 20 pt) por su x. Así cada tabla solo
+    recorre las líneas de su franja (búsqueda binaria) en vez de filtrar todos
+    los bordes de la página, y las intersecciones se cuentan recorriendo, para
+    cada horizontal, solo las verticales que caen dentro de su rango de x.
+    """
 
-def _tiene_cuadricula_completa(page, table_bbox) -> bool:
+    def __init__(self, edges):
+        self.total = len(edges) if edges else 0
+        horizontales = []
+        verticales = []
+        for e in edges or []:
+            orientacion = e.get('orientation')
+            if orientacion == 'h':
+                h_x0, h_x1 = e.get('x0', 0), e.get('x1', 0)
+                if (h_x1 - h_x0) > 50:  # Líneas significativas
+                    horizontales.append((e.get('y0', 0), h_x0, h_x1))
+            elif orientacion == 'v':
+                v_y0, v_y1 = e.get('y0', 0), e.get('y1', 0)
+                if (v_y1 - v_y0) > 20:  # Líneas significativas
+                    verticales.append((e.get('x0', 0), v_y0, v_y1))
+        horizontales.sort()
+        verticales.sort()
+        self.horizontales = horizontales
+        self.verticales = verticales
+        self._y_horizontales = [h[0] for h in horizontales]
+        self._x_verticales = [v[0] for v in verticales]
+
+    def horizontales_en(self, x0: float, top: float, x1: float, bottom: float) -> List[Tuple]:
+        """Horizontales (y, x0, x1) con y dentro de [top, bottom] y extremos dentro del bbox (±10)"""
+        inicio = bisect_left(self._y_horizontales, top)
+        fin = bisect_right(self._y_horizontales, bottom)
+        return [h for h in self.horizontales[inicio:fin]
+                if h[1] >= x0 - 10 and h[2] <= x1 + 10]
+
+    def verticales_en(self, x0: float, top: float, x1: float, bottom: float) -> List[Tuple]:
+        """Verticales (x, y0, y1) con x dentro del bbox (±10) y extremos dentro de [top-10, bottom+10]"""
+        inicio = bisect_left(self._x_verticales, x0 - 10)
+        fin = bisect_right(self._x_verticales, x1 + 10)
+        return [v for v in self.verticales[inicio:fin]
+                if v[1] >= top - 10 and v[2] <= bottom + 10]
+
+
+def _tiene_cuadricula_completa(page, table_bbox, indice_bordes: Optional[_IndiceBordes] = None) -> bool:
     """
     Verifica que haya una cuadrícula COMPLETA y CERRADA dentro del bbox de la tabla.
     Rechaza texto alineado, firmas, y líneas decorativas.
@@ -1094,6 +1855,8 @@ def _tiene_cuadricula_completa(page, table_bbox) -> bool:
     Args:
         page: Objeto página de pdfplumber
         table_bbox: Bounding box de la tabla (x0, top, x1, bottom)
+        indice_bordes: Bordes de la página ya indexados (se construye si es None);
+            compartirlo evita reordenar los bordes para cada tabla de la página
 
     Returns:
         True si hay cuadrícula real, False si es texto alineado
@@ -1102,26 +1865,14 @@ def _tiene_cuadricula_completa(page, table_bbox) -> bool:
         x0, top, x1, bottom = table_bbox
 
         # Obtener líneas dentro del área de la tabla
-        edges = page.edges
-        if not edges or len(edges) < 8:
+        if indice_bordes is None:
+            indice_bordes = _IndiceBordes(page.edges)
+        if indice_bordes.total < 8:
             return False
 
         # Filtrar líneas que están dentro del bbox de la tabla
-        h_lines = [e for e in edges
-                  if e.get('orientation') == 'h'
-                  and e.get('y0', 0) >= top
-                  and e.get('y0', 0) <= bottom
-                  and e.get('x0', 0) >= x0 - 10
-                  and e.get('x1', 0) <= x1 + 10
-                  and (e.get('x1', 0) - e.get('x0', 0)) > 50]  # Líneas significativas
-
-        v_lines = [e for e in edges
-                  if e.get('orientation') == 'v'
-                  and e.get('x0', 0) >= x0 - 10
-                  and e.get('x0', 0) <= x1 + 10
-                  and e.get('y0', 0) >= top - 10
-                  and e.get('y1', 0) <= bottom + 10
-                  and (e.get('y1', 0) - e.get('y0', 0)) > 20]  # Líneas significativas
+        h_lines = indice_bordes.horizontales_en(x0, top, x1, bottom)
+        v_lines = indice_bordes.verticales_en(x0, top, x1, bottom)
 
         # CRÍTICO: Debe tener líneas verticales Y horizontales
         if len(v_lines) < 2:  # Al menos 2 verticales (inicio y fin de columnas)
@@ -1135,30 +1886,30 @@ def _tiene_cuadricula_completa(page, table_bbox) -> bool:
         if ratio > 6.0 or ratio < 0.15:  # Muy desbalanceado = líneas decorativas
             return False
 
-        # Verificar intersecciones (cuadrícula real)
+        # Verificar intersecciones (cuadrícula real): para cada horizontal, solo las
+        # verticales cuya x cae en su rango (v_lines ya está ordenada por x)
         intersections = 0
         tolerance = 15
+        v_xs = [v[0] for v in v_lines]
 
-        for h in h_lines:
-            for v in v_lines:
-                h_x0, h_x1, h_y = h.get('x0', 0), h.get('x1', 0), h.get('y0', 0)
-                v_x, v_y0, v_y1 = v.get('x0', 0), v.get('y0', 0), v.get('y1', 0)
-
-                if (h_x0 - tolerance <= v_x <= h_x1 + tolerance and
-                    v_y0 - tolerance <= h_y <= v_y1 + tolerance):
+        for h_y, h_x0, h_x1 in h_lines:
+            inicio = bisect_left(v_xs, h_x0 - tolerance)
+            fin = bisect_right(v_xs, h_x1 + tolerance)
+            for _, v_y0, v_y1 in v_lines[inicio:fin]:
+                if v_y0 - tolerance <= h_y <= v_y1 + tolerance:
                     intersections += 1
+                    # Requiere al menos 4 intersecciones (mínimo 2x2)
+                    if intersections >= 4:
+                        return True
 
-        # Requiere al menos 4 intersecciones (mínimo 2x2)
-        if intersections < 4:
-            return False
-
-        return True
+        return False
 
     except Exception as e:
         return False
 
 
-def _es_tabla_real(tabla_data: List[List], page, table_bbox) -> bool:
+def _es_tabla_real(tabla_data: List[List], page, table_bbox,
+                   indice_bordes: Optional[_IndiceBordes] = None) -> bool:
     """
     Valida que sea una tabla REAL con datos tabulares.
     Rechaza:
@@ -1171,6 +1922,7 @@ def _es_tabla_real(tabla_data: List[List], page, table_bbox) -> bool:
         tabla_data: Datos extraídos de la tabla
         page: Página de pdfplumber
         table_bbox: Bounding box de la tabla
+        indice_bordes: Bordes de la página ya indexados (ver _IndiceBordes)
 
     Returns:
         True si es tabla real, False si es texto formateado
@@ -1179,7 +1931,7 @@ def _es_tabla_real(tabla_data: List[List], page, table_bbox) -> bool:
         return False
 
     # PASO 1: Verificar cuadrícula física
-    if not _tiene_cuadricula_completa(page, table_bbox):
+    if not _tiene_cuadricula_completa(page, table_bbox, indice_bordes):
         return False
 
     # PASO 2: Verificar estructura mínima
@@ -1255,9 +2007,426 @@ def _es_tabla_real(tabla_data: List[List], page, table_bbox) -> bool:
     return True
 
 
-def extraer_contenido_pdf(ruta_pdf: str) -> Dict[str, str]:
+SIMILITUD_MINIMA_FILA = 0.7  # Índice de Jaccard (sobre palabras) a partir del cual una línea es una fila de la tabla
+LONGITUD_MINIMA_CELDA = 5  # Textos de celda más cortos no cuentan como coincidencia parcial
+
+
+def _asignar_lineas_a_tablas(lineas: List[str], tablas_info: List[Dict]) -> None:
+    """Determina primera_linea y ultima_linea de cada tabla dentro del texto de la página
+
+    Una línea pertenece a una tabla si:
+    1. Es igual a una de sus filas completas, o (con más de 10 caracteres) comparte
+       con alguna más del 70% de las palabras (índice de Jaccard)
+    2. Contiene 2+ textos de celda de la tabla, o uno que ocupa al menos el 60% de la línea
+    3. Es exactamente el texto de una de sus celdas
+
+    En lugar de comparar cada línea con cada fila y cada celda de cada tabla, las
+    palabras de las filas se indexan una vez por página (solo las más raras de cada
+    fila, lo que basta para no perder ningún par que supere el umbral) y cada texto
+    de celda se busca una sola vez en todo el texto de la página.
+    """
+    lineas_stripped = [linea.strip() for linea in lineas]
+    pertenencias = set()  # (número de línea, índice de tabla)
+
+    # --- 1. Filas completas: coincidencia exacta y similitud de palabras ---
+    filas_exactas = {}  # Texto de fila -> tablas que la contienen
+    filas_palabras = []  # (índice de tabla, palabras de la fila), sin repetir dentro de una tabla
+    for t, tabla_info in enumerate(tablas_info):
+        vistas = set()
+        for fila_completa in tabla_info['filas_completas']:
+            filas_exactas.setdefault(fila_completa, set()).add(t)
+            palabras = frozenset(fila_completa.split())
+            if palabras and palabras not in vistas:
+                vistas.add(palabras)
+                filas_palabras.append((t, palabras))
+
+    # Orden global de palabras de la más rara a la más común: si dos conjuntos superan
+    # el umbral, comparten al menos una palabra dentro de sus respectivos prefijos
+    frecuencia = {}
+    for _, palabras in filas_palabras:
+        for palabra in palabras:
+            frecuencia[palabra] = frecuencia.get(palabra, 0) + 1
+
+    def prefijo(palabras) -> List[str]:
+        ordenadas = sorted(palabras, key=lambda palabra: (frecuencia.get(palabra, 0), palabra))
+        return ordenadas[:len(ordenadas) - int(SIMILITUD_MINIMA_FILA * len(ordenadas)) + 1]
+
+    indice_palabras = {}  # Palabra del prefijo -> filas (posición en filas_palabras)
+    for f, (_, palabras) in enumerate(filas_palabras):
+        for palabra in prefijo(palabras):
+            indice_palabras.setdefault(palabra, []).append(f)
+
+    for i, linea_stripped in enumerate(lineas_stripped):
+        if not linea_stripped:
+            continue
+        for t in filas_exactas.get(linea_stripped, ()):
+            pertenencias.add((i, t))
+        if len(linea_stripped) <= 10:
+            continue
+        palabras_linea = set(linea_stripped.split())
+        candidatas = set()
+        for palabra in prefijo(palabras_linea):
+            candidatas.update(indice_palabras.get(palabra, ()))
+        for f in candidatas:
+            t, palabras_fila = filas_palabras[f]
+            if (i, t) in pertenencias:
+                continue
+            comunes = len(palabras_linea & palabras_fila)
+            if comunes / (len(palabras_linea) + len(palabras_fila) - comunes) > SIMILITUD_MINIMA_FILA:
+                pertenencias.add((i, t))
+
+    # --- 2 y 3. Textos de celdas ---
+    celdas_tablas = {}  # Texto de celda -> tablas que lo contienen
+    for t, tabla_info in enumerate(tablas_info):
+        for texto_celda in tabla_info['textos_celdas']:
+            celdas_tablas.setdefault(texto_celda, set()).add(t)
+
+    for i, linea_stripped in enumerate(lineas_stripped):
+        if linea_stripped:
+            for t in celdas_tablas.get(linea_stripped, ()):
+                pertenencias.add((i, t))
+
+    # Los textos de celda no contienen saltos de línea, así que cada aparición en el
+    # texto unido cae dentro de una sola línea
+    texto_unido = '\n'.join(lineas_stripped)
+    inicios_lineas = []
+    inicio = 0
+    for linea_stripped in lineas_stripped:
+        inicios_lineas.append(inicio)
+        inicio += len(linea_stripped) + 1
+
+    celdas_por_linea = {}  # (línea, tabla) -> longitudes de los textos de celda encontrados
+    for texto_celda, tablas in celdas_tablas.items():
+        if len(texto_celda) < LONGITUD_MINIMA_CELDA:
+            continue
+        posicion = texto_unido.find(texto_celda)
+        while posicion != -1:
+            i = bisect_right(inicios_lineas, posicion) - 1
+            for t in tablas:
+                celdas_por_linea.setdefault((i, t), []).append(len(texto_celda))
+            if i + 1 >= len(inicios_lineas):
+                break
+            posicion = texto_unido.find(texto_celda, inicios_lineas[i + 1])
+
+    for (i, t), longitudes in celdas_por_linea.items():
+        # 2+ elementos de esta tabla, o uno que es >=60% de la línea
+        if len(longitudes) >= 2 or longitudes[0] >= len(lineas_stripped[i]) * 0.6:
+            pertenencias.add((i, t))
+
+    # Posiciones de cada tabla: primera y última línea que le pertenecen
+    for i, t in pertenencias:
+        tabla_info = tablas_info[t]
+        if tabla_info['primera_linea'] is None or i < tabla_info['primera_linea']:
+            tabla_info['primera_linea'] = i
+        if tabla_info['ultima_linea'] is None or i > tabla_info['ultima_linea']:
+            tabla_info['ultima_linea'] = i
+
+
+def _extraer_pagina_digital(pagina, num_pagina: int, contador_tablas: int,
+                            texto_pagina: Optional[str] = None) -> Dict:
+    """Extrae el texto de una página digital con sus tablas embebidas como JSON
+
+    Args:
+        pagina: Página de pdfplumber
+        num_pagina: Índice de la página (base 0), solo para los mensajes
+        contador_tablas: Tablas validadas en las páginas anteriores; las de esta
+            página se numeran a partir de contador_tablas + 1
+        texto_pagina: Texto de la página si ya se extrajo (p. ej. al detectar
+            si el PDF es escaneado); si es None se extrae aquí
+
+    Returns:
+        Diccionario con:
+        contenido: Texto de la página o None si no tiene contenido
+        margenes: Textos rotados detectados en los márgenes laterales
+        tablas_json: JSON de las tablas insertadas en el contenido, en orden
+        tablas_validadas: Tablas reales validadas (incluye las que no se insertaron)
+    """
+    contenido_pagina_partes = []
+    tablas_json = []  # Tablas insertadas en el contenido de la página
+    tablas_validadas = 0
+
+    if texto_pagina is None:
+        texto_pagina = pagina.extract_text()
+
+    # Detectar texto rotado en márgenes laterales
+    margenes_pagina = detectar_texto_rotado_margenes(pagina)
+
+    # Detectar tablas con configuración optimizada para máxima precisión
+    tablas_encontradas = pagina.find_tables(table_settings={
+        "vertical_strategy": "lines",
+        "horizontal_strategy": "lines",
+        "explicit_vertical_lines": pagina.curves + pagina.edges,
+        "explicit_horizontal_lines": pagina.curves + pagina.edges,
+        "snap_tolerance": 3,
+        "join_tolerance": 3,
+        "edge_min_length": 3,
+        "min_words_vertical": 3,
+        "min_words_horizontal": 1,
+        "intersection_tolerance": 3,
+        "text_tolerance": 3,
+        "text_x_tolerance": 2,
+        "text_y_tolerance": 2,
+    })
+
+    if tablas_encontradas:
+        # Si hay tablas, procesarlas y eliminar su texto del contenido
+
+        # Primero, extraer y procesar todas las tablas con su información de posición
+        tablas_info = []  # Lista con toda la información de las tablas
+        textos_celdas_tabla = set()  # Usar set para evitar duplicados
+        lineas_tabla_completas = []  # Guardar líneas completas de tabla para mejor detección
+        indice_bordes = _IndiceBordes(pagina.edges)  # Bordes ordenados una vez para todas las tablas
+
+        for table_obj in tablas_encontradas:
+            # Extraer con configuración mejorada que preserva TODO el contenido
+            tabla_data = table_obj.extract(
+                x_tolerance=2,
+                y_tolerance=2,
+            )
+            if tabla_data and len(tabla_data) > 0:
+                # VALIDACIÓN ESTRICTA: Verificar que sea una tabla real
+                table_bbox = table_obj.bbox if hasattr(table_obj, 'bbox') else None
+                if not table_bbox or not _es_tabla_real(tabla_data, pagina, table_bbox, indice_bordes):
+                    # No es una tabla real, saltar esta detección
+                    print(f"    ⚠ Falso positivo detectado en página {num_pagina+1} - Ignorando (probablemente texto alineado/firmas)")
+                    continue
+
+                tablas_validadas += 1
+                print(f"    ✓ Tabla real validada en página {num_pagina+1}")
+                tabla_json = convertir_tabla_a_json_string(tabla_data, contador_tablas + tablas_validadas)
+                if tabla_json:
+                    # Guardar información de la tabla incluyendo su posición
+                    tabla_info = {
+                        'json': tabla_json,
+                        'bbox': table_obj.bbox if hasattr(table_obj, 'bbox') else None,
+                        'primera_linea': None,  # Se determinará después
+                        'ultima_linea': None,    # Se determinará después
+                        'textos_celdas': set(),
+                        'filas_completas': []
+                    }
+
+                    # Recopilar TODOS los textos de las celdas, INCLUYENDO ENCABEZADOS
+                    for i, fila in enumerate(tabla_data):
+                        if fila:
+                            fila_textos = []
+                            for celda in fila:
+                                if celda is not None and str(celda).strip():
+                                    texto_celda = str(celda).strip()
+                                    fila_textos.append(texto_celda)
+
+                                    # Si la celda tiene saltos de línea, dividirla
+                                    if '\n' in texto_celda:
+                                        # Cada línea dentro de la celda es un texto a buscar
+                                        for linea_celda in texto_celda.split('\n'):
+                                            if linea_celda.strip():
+                                                textos_celdas_tabla.add(linea_celda.strip())
+                                                tabla_info['textos_celdas'].add(linea_celda.strip())
+                                    else:
+                                        textos_celdas_tabla.add(texto_celda)
+                                        tabla_info['textos_celdas'].add(texto_celda)
+
+                            # Guardar combinaciones de celdas de la misma fila
+                            if len(fila_textos) > 1:
+                                # Diferentes formas en que podría aparecer la fila
+                                fila_espacios = ' '.join(fila_textos)
+                                fila_tabs = '\t'.join(fila_textos)
+                                lineas_tabla_completas.append(fila_espacios)
+                                lineas_tabla_completas.append(fila_tabs)
+                                tabla_info['filas_completas'].append(fila_espacios)
+                                tabla_info['filas_completas'].append(fila_tabs)
+
+                    tablas_info.append(tabla_info)
+
+        # Obtener el texto completo de la página
+        texto_completo_pagina = texto_pagina or ""
+
+        # Procesar líneas e identificar dónde están las tablas
+        lineas_originales = texto_completo_pagina.split('\n')
+
+        # Primera pasada: identificar qué líneas pertenecen a cada tabla
+        _asignar_lineas_a_tablas(lineas_originales, tablas_info)
+
+        # Segunda pasada: reconstruir el contenido con las tablas en su posición
+        contenido_final_partes = []
+        i = 0
+
+        while i < len(lineas_originales):
+            # Verificar si alguna tabla comienza en esta línea
+            tabla_aqui = None
+            for tabla_info in tablas_info:
+                if tabla_info['primera_linea'] == i:
+                    tabla_aqui = tabla_info
+                    break
+
+            if tabla_aqui:
+                # Insertar el JSON de la tabla en lugar del texto original
+                contenido_final_partes.append(tabla_aqui['json'])
+                tablas_json.append(tabla_aqui['json'])
+                # Saltar todas las líneas de esta tabla
+                if tabla_aqui['ultima_linea'] is not None:
+                    i = tabla_aqui['ultima_linea'] + 1
+                else:
+                    i += 1
+            else:
+                # Verificar si esta línea NO pertenece a ninguna tabla
+                es_parte_de_alguna_tabla = False
+                for tabla_info in tablas_info:
+                    if (tabla_info['primera_linea'] is not None and
+                        tabla_info['ultima_linea'] is not None and
+                        tabla_info['primera_linea'] <= i <= tabla_info['ultima_linea']):
+                        es_parte_de_alguna_tabla = True
+                        break
+
+                if not es_parte_de_alguna_tabla:
+                    # Esta línea es texto normal, agregarla
+                    contenido_final_partes.append(lineas_originales[i])
+
+                i += 1
+
+        # Unir todo el contenido
+        contenido_pagina = '\n'.join(contenido_final_partes)
+
+        # Limpiar líneas vacías excesivas
+        contenido_pagina = re.sub(r'\n{3,}', '\n\n', contenido_pagina)
+
+        if contenido_pagina.strip():
+            contenido_pagina_partes.append(contenido_pagina.strip())
+
+    else:
+        # No hay tablas, extraer texto normalmente
+        if texto_pagina:
+            contenido_pagina_partes.append(texto_pagina)
+
+    # Unir las partes de esta página
+    contenido_pagina = ' '.join(contenido_pagina_partes) if contenido_pagina_partes else None
+
+    return {
+        'contenido': contenido_pagina,
+        'margenes': margenes_pagina,
+        'tablas_json': tablas_json,
+        'tablas_validadas': tablas_validadas
+    }
+
+
+PAGINAS_MINIMAS_PARALELO = 40  # Por debajo de esto no compensa repartir páginas entre procesos
+
+
+def _resultado_pagina_ocr(texto_pagina: str, tablas: List[List], contador_tablas: int,
+                         repetida: bool = False) -> Dict:
+    """Arma con el OCR de una página el mismo diccionario que devuelve _extraer_pagina_digital
+
+    Las tablas se numeran a partir de contador_tablas + 1 y se insertan al final
+    del texto, igual que en extraer_texto_con_ocr. La clave 'ocr' marca la página
+    para registrarla en "paginas_ocr", y 'dpi_alto' si se repitió a DPI_OCR.
+    """
+    tablas_json = []
+    for k, tabla in enumerate(tablas, 1):
+        tabla_json = convertir_tabla_a_json_string(tabla, contador_tablas + k)
+        if tabla_json:
+            texto_pagina += f" {tabla_json} "
+            tablas_json.append(tabla_json)
+    return {
+        'contenido': texto_pagina if texto_pagina.strip() else None,
+        'margenes': [],
+        'tablas_json': tablas_json,
+        'tablas_validadas': len(tablas),
+        'ocr': True,
+        'dpi_alto': repetida
+    }
+
+
+def _extraer_rango_paginas(ruta_pdf: str, inicio: int, fin: int) -> List[Dict]:
+    """Extrae las páginas [inicio, fin) de un PDF digital (se ejecuta en un proceso aparte)
+
+    Cada proceso abre su propia copia del PDF; las tablas se numeran desde 1
+    dentro del rango y se renumeran al unir los rangos. Las páginas sin capa de
+    texto se procesan con OCR en el mismo proceso.
+    """
+    resultados = []
+    contador_tablas = 0
+    with pdfplumber.open(ruta_pdf) as pdf:
+        for num_pagina in range(inicio, fin):
+            pagina = pdf.pages[num_pagina]
+            texto_pagina = pagina.extract_text()
+            resultado = None
+            escaneada = _es_pagina_escaneada(pagina, texto_pagina)
+            if OCR_DISPONIBLE and escaneada:
+                try:
+                    texto_ocr, tablas_ocr, repetida = _ocr_pagina_en_proceso(ruta_pdf, num_pagina + 1,
+                                                                             DPI_OCR_INICIAL)
+                    resultado = _resultado_pagina_ocr(texto_ocr, tablas_ocr, contador_tablas, repetida)
+                except Exception as e:
+                    print(f"    ⚠ No se pudo aplicar OCR a la página {num_pagina + 1}: {str(e)}")
+            if resultado is None:
+                resultado = _extraer_pagina_digital(pagina, num_pagina, contador_tablas, texto_pagina)
+                # Página escaneada sin OCR (no disponible o fallido): solo su texto digital
+                resultado['sin_ocr'] = escaneada
+            contador_tablas += resultado['tablas_validadas']
+            resultados.append(resultado)
+    return resultados
+
+
+def _renumerar_tablas_pagina(resultado: Dict, desplazamiento: int) -> None:
+    """Suma desplazamiento al número de cada tabla JSON embebida en la página"""
+    if not desplazamiento or not resultado['tablas_json']:
+        return
+    contenido = resultado['contenido']
+    partes = []
+    tablas_renumeradas = []
+    posicion = 0
+    # Las tablas están en el mismo orden en que aparecen en el contenido
+    for tabla_json in resultado['tablas_json']:
+        inicio = contenido.index(tabla_json, posicion)
+        match = re.match(r'\{"tabla_(\d+)":', tabla_json)
+        nuevo_json = f'{{"tabla_{int(match.group(1)) + desplazamiento}":' + tabla_json[match.end():]
+        partes.append(contenido[posicion:inicio])
+        partes.append(nuevo_json)
+        tablas_renumeradas.append(nuevo_json)
+        posicion = inicio + len(tabla_json)
+    partes.append(contenido[posicion:])
+    resultado['contenido'] = ''.join(partes)
+    resultado['tablas_json'] = tablas_renumeradas
+
+
+def _extraer_paginas_en_paralelo(ruta_pdf: str, total_paginas: int, workers: int) -> Optional[List[Dict]]:
+    """Reparte las páginas de un PDF digital grande entre varios procesos
+
+    Las páginas se dividen en rangos contiguos y se devuelven en su orden
+    original, con las tablas numeradas igual que en la extracción secuencial.
+
+    Returns:
+        Lista de resultados por página, o None si la extracción en paralelo falló
+    """
+    num_rangos = min(total_paginas, workers * 4)
+    limites = [total_paginas * k // num_rangos for k in range(num_rangos + 1)]
+    print(f"  ⚙ Extracción por páginas en paralelo: {total_paginas} páginas, {workers} procesos")
+
+    try:
+        with _crear_pool_procesos(workers) as executor:
+            futuros = [executor.submit(_extraer_rango_paginas, ruta_pdf, limites[k], limites[k + 1])
+                       for k in range(num_rangos)]
+            rangos = [futuro.result() for futuro in futuros]
+    except Exception as e:
+        print(f"  ⚠ Falló la extracción en paralelo ({e}), se procesará secuencialmente")
+        return None
+
+    # Unir los rangos en orden, renumerando las tablas de forma global
+    resultados = []
+    contador_tablas = 0
+    for rango in rangos:
+        desplazamiento = contador_tablas
+        for resultado in rango:
+            _renumerar_tablas_pagina(resultado, desplazamiento)
+            contador_tablas += resultado['tablas_validadas']
+            resultados.append(resultado)
+    return resultados
+
+
+def extraer_contenido_pdf(ruta_pdf: str, workers_paginas: int = 1) -> Dict[str, str]:
     """Extrae el contenido de un PDF incluyendo tablas como JSON embebido en el texto.
     Detecta automáticamente si el PDF es escaneado y aplica OCR si es necesario.
+    Con workers_paginas > 1, los PDFs digitales grandes se extraen por rangos de
+    páginas en varios procesos.
     """
 
     # Limpiar el título del PDF (quitar prefijos numéricos)
@@ -1265,255 +2434,93 @@ def extraer_contenido_pdf(ruta_pdf: str) -> Dict[str, str]:
     contenido_completo = []
     es_escaneado = False
     contador_tablas_global = 0
+    paginas_ocr = []  # Páginas (desde 1) que pasaron por OCR, para auditar la extracción
+    paginas_dpi_alto = []  # De esas, las que se repitieron a DPI_OCR por baja confianza
+    paginas_sin_ocr = []  # Páginas escaneadas que se quedaron sin OCR: el resultado no va a la caché
     todos_margenes_laterales = []  # Lista para acumular márgenes laterales detectados
 
-    # Primero verificar si es un PDF escaneado
-    if es_pdf_escaneado(ruta_pdf):
-        es_escaneado = True
-        print(f"  📸 Tipo: PDF escaneado")
-
-        # Usar OCR para extraer el texto (ya incluye detección de tablas)
-        texto_ocr = extraer_texto_con_ocr(ruta_pdf)
-
-        if texto_ocr.startswith("Error"):
-            return {
-                "Titulo": titulo,
-                "contenido": texto_ocr
-            }
-
-        # El texto OCR ya contiene las tablas embebidas como JSON
-        contenido_completo.append(texto_ocr)
+    # Abrir el PDF una sola vez: la detección de escaneado y la extracción
+    # digital comparten el documento y el texto de las páginas ya leídas
+    documento = DocumentoPDF(ruta_pdf)
 
+    # Las primeras páginas solo deciden qué se informa: cada página se clasifica
+    # al extraerla y las que no tienen capa de texto pasan por OCR (ver más abajo)
+    if documento.es_escaneado():
+        es_escaneado = True
+        print(f"  📸 Tipo: PDF escaneado (OCR en las páginas sin capa de texto)")
+        if not OCR_DISPONIBLE:
+            print(f"  ⚠ OCR no disponible: las páginas escaneadas quedarán sin texto")
     else:
         print(f"  📄 Tipo: PDF con texto digital")
 
-        try:
-            with pdfplumber.open(ruta_pdf) as pdf:
-                # Procesar cada página
-                for num_pagina, pagina in enumerate(pdf.pages):
-                    contenido_pagina_partes = []
-
-                    # Detectar texto rotado en márgenes laterales
-                    margenes_pagina = detectar_texto_rotado_margenes(pagina)
-                    if margenes_pagina:
-                        todos_margenes_laterales.extend(margenes_pagina)
-
-                    # Detectar tablas con configuración optimizada para máxima precisión
-                    tablas_encontradas = pagina.find_tables(table_settings={
-                        "vertical_strategy": "lines",
-                        "horizontal_strategy": "lines",
-                        "explicit_vertical_lines": pagina.curves + pagina.edges,
-                        "explicit_horizontal_lines": pagina.curves + pagina.edges,
-                        "snap_tolerance": 3,
-                        "join_tolerance": 3,
-                        "edge_min_length": 3,
-                        "min_words_vertical": 3,
-                        "min_words_horizontal": 1,
-                        "intersection_tolerance": 3,
-                        "text_tolerance": 3,
-                        "text_x_tolerance": 2,
-                        "text_y_tolerance": 2,
-                    })
-
-                    if tablas_encontradas:
-                        # Si hay tablas, procesarlas y eliminar su texto del contenido
-
-                        # Primero, extraer y procesar todas las tablas con su información de posición
-                        tablas_info = []  # Lista con toda la información de las tablas
-                        textos_celdas_tabla = set()  # Usar set para evitar duplicados
-                        lineas_tabla_completas = []  # Guardar líneas completas de tabla para mejor detección
-
-                        for table_obj in tablas_encontradas:
-                            # Extraer con configuración mejorada que preserva TODO el contenido
-                            tabla_data = table_obj.extract(
-                                x_tolerance=2,
-                                y_tolerance=2,
-                            )
-                            if tabla_data and len(tabla_data) > 0:
-                                # VALIDACIÓN ESTRICTA: Verificar que sea una tabla real
-                                table_bbox = table_obj.bbox if hasattr(table_obj, 'bbox') else None
-                                if not table_bbox or not _es_tabla_real(tabla_data, pagina, table_bbox):
-                                    # No es una tabla real, saltar esta detección
-                                    print(f"    ⚠ Falso positivo detectado en página {num_pagina+1} - Ignorando (probablemente texto alineado/firmas)")
-                                    continue
-
-                                contador_tablas_global += 1
-                                print(f"    ✓ Tabla real validada en página {num_pagina+1}")
-                                tabla_json = convertir_tabla_a_json_string(tabla_data, contador_tablas_global)
-                                if tabla_json:
-                                    # Guardar información de la tabla incluyendo su posición
-                                    tabla_info = {
-                                        'json': tabla_json,
-                                        'bbox': table_obj.bbox if hasattr(table_obj, 'bbox') else None,
-                                        'primera_linea': None,  # Se determinará después
-                                        'ultima_linea': None,    # Se determinará después
-                                        'textos_celdas': set(),
-                                        'filas_completas': []
-                                    }
-
-                                    # Recopilar TODOS los textos de las celdas, INCLUYENDO ENCABEZADOS
-                                    for i, fila in enumerate(tabla_data):
-                                        if fila:
-                                            fila_textos = []
-                                            for celda in fila:
-                                                if celda is not None and str(celda).strip():
-                                                    texto_celda = str(celda).strip()
-                                                    fila_textos.append(texto_celda)
-
-                                                    # Si la celda tiene saltos de línea, dividirla
-                                                    if '\n' in texto_celda:
-                                                        # Cada línea dentro de la celda es un texto a buscar
-                                                        for linea_celda in texto_celda.split('\n'):
-                                                            if linea_celda.strip():
-                                                                textos_celdas_tabla.add(linea_celda.strip())
-                                                                tabla_info['textos_celdas'].add(linea_celda.strip())
-                                                    else:
-                                                        textos_celdas_tabla.add(texto_celda)
-                                                        tabla_info['textos_celdas'].add(texto_celda)
-
-                                            # Guardar combinaciones de celdas de la misma fila
-                                            if len(fila_textos) > 1:
-                                                # Diferentes formas en que podría aparecer la fila
-                                                fila_espacios = ' '.join(fila_textos)
-                                                fila_tabs = '\t'.join(fila_textos)
-                                                lineas_tabla_completas.append(fila_espacios)
-                                                lineas_tabla_completas.append(fila_tabs)
-                                                tabla_info['filas_completas'].append(fila_espacios)
-                                                tabla_info['filas_completas'].append(fila_tabs)
-
-                                    tablas_info.append(tabla_info)
-
-                        # Obtener el texto completo de la página
-                        texto_completo_pagina = pagina.extract_text() or ""
-
-                        # Procesar líneas e identificar dónde están las tablas
-                        lineas_originales = texto_completo_pagina.split('\n')
-
-                        # Primera pasada: identificar qué líneas pertenecen a cada tabla
-                        for i, linea in enumerate(lineas_originales):
-                            linea_stripped = linea.strip()
-
-                            if linea_stripped:
-                                # Verificar a qué tabla pertenece esta línea (si es que pertenece a alguna)
-                                for tabla_info in tablas_info:
-                                    es_de_esta_tabla = False
-
-                                    # Verificar si la línea es parte de esta tabla específica
-                                    # 1. Verificar filas completas
-                                    for fila_completa in tabla_info['filas_completas']:
-                                        if linea_stripped == fila_completa:
-                                            es_de_esta_tabla = True
-                                            break
-                                        # Verificar similitud
-                                        if len(linea_stripped) > 10:
-                                            palabras_linea = set(linea_stripped.split())
-                                            palabras_tabla = set(fila_completa.split())
-                                            if palabras_linea and palabras_tabla:
-                                                coincidencia = len(palabras_linea & palabras_tabla) / len(palabras_linea | palabras_tabla)
-                                                if coincidencia > 0.7:
-                                                    es_de_esta_tabla = True
-                                                    break
-
-                                    # 2. Verificar celdas individuales
-                                    if not es_de_esta_tabla:
-                                        elementos_encontrados = []
-                                        for texto_celda in tabla_info['textos_celdas']:
-                                            if len(texto_celda) > 4 and texto_celda in linea_stripped:
-                                                elementos_encontrados.append(texto_celda)
-
-                                        # Si tiene 2+ elementos de esta tabla específica
-                                        if len(elementos_encontrados) >= 2:
-                                            es_de_esta_tabla = True
-                                        # O si un elemento es >60% de la línea
-                                        elif len(elementos_encontrados) == 1:
-                                            if len(elementos_encontrados[0]) >= len(linea_stripped) * 0.6:
-                                                es_de_esta_tabla = True
-
-                                        # Verificación exacta
-                                        if linea_stripped in tabla_info['textos_celdas']:
-                                            es_de_esta_tabla = True
-
-                                    # Si esta línea pertenece a esta tabla, actualizar posiciones
-                                    if es_de_esta_tabla:
-                                        if tabla_info['primera_linea'] is None:
-                                            tabla_info['primera_linea'] = i
-                                        tabla_info['ultima_linea'] = i
-
-                        # Segunda pasada: reconstruir el contenido con las tablas en su posición
-                        contenido_final_partes = []
-                        i = 0
-
-                        while i < len(lineas_originales):
-                            # Verificar si alguna tabla comienza en esta línea
-                            tabla_aqui = None
-                            for tabla_info in tablas_info:
-                                if tabla_info['primera_linea'] == i:
-                                    tabla_aqui = tabla_info
-                                    break
-
-                            if tabla_aqui:
-                                # Insertar el JSON de la tabla en lugar del texto original
-                                contenido_final_partes.append(tabla_aqui['json'])
-                                # Saltar todas las líneas de esta tabla
-                                if tabla_aqui['ultima_linea'] is not None:
-                                    i = tabla_aqui['ultima_linea'] + 1
-                                else:
-                                    i += 1
-                            else:
-                                # Verificar si esta línea NO pertenece a ninguna tabla
-                                es_parte_de_alguna_tabla = False
-                                for tabla_info in tablas_info:
-                                    if (tabla_info['primera_linea'] is not None and
-                                        tabla_info['ultima_linea'] is not None and
-                                        tabla_info['primera_linea'] <= i <= tabla_info['ultima_linea']):
-                                        es_parte_de_alguna_tabla = True
-                                        break
-
-                                if not es_parte_de_alguna_tabla:
-                                    # Esta línea es texto normal, agregarla
-                                    contenido_final_partes.append(lineas_originales[i])
-
-                                i += 1
-
-                        # Unir todo el contenido
-                        contenido_pagina = '\n'.join(contenido_final_partes)
-
-                        # Limpiar líneas vacías excesivas
-                        contenido_pagina = re.sub(r'\n{3,}', '\n\n', contenido_pagina)
-
-                        if contenido_pagina.strip():
-                            contenido_pagina_partes.append(contenido_pagina.strip())
+    try:
+        with documento:
+            pdf = documento.pdf
+            resultados_paginas = None
+            if workers_paginas > 1 and len(pdf.pages) >= PAGINAS_MINIMAS_PARALELO:
+                resultados_paginas = _extraer_paginas_en_paralelo(ruta_pdf, len(pdf.pages), workers_paginas)
+
+            if resultados_paginas is None:
+                resultados_paginas = []
+                total_paginas = len(pdf.pages)
+                ocr_fallido = False
+                # Las páginas sin capa de texto (escaneadas) pasan por OCR; el resto
+                # conserva su texto digital
+                for num_pagina, pagina, texto_pagina, ocr in _clasificar_paginas(documento, ruta_pdf):
+                    resultado = None
+                    if ocr is not None and not ocr_fallido:
+                        try:
+                            texto_ocr, tablas_ocr, repetida = ocr()
+                            print(f"    OCR: Página {num_pagina + 1}/{total_paginas}..."
+                                  + (f" (repetida a {DPI_OCR} DPI)" if repetida else ""))
+                            resultado = _resultado_pagina_ocr(texto_ocr, tablas_ocr, contador_tablas_global,
+                                                              repetida)
+                        except Exception as e:
+                            print(f"    ⚠ OCR no disponible para las páginas escaneadas ({str(e)}), se usa su texto digital")
+                            ocr_fallido = True
+                    if resultado is None:
+                        resultado = _extraer_pagina_digital(pagina, num_pagina, contador_tablas_global,
+                                                            texto_pagina)
+                        # Página escaneada sin OCR (no disponible o fallido): solo su texto digital
+                        resultado['sin_ocr'] = ocr is not None or (
+                            not OCR_DISPONIBLE and _es_pagina_escaneada(pagina, texto_pagina))
+                    contador_tablas_global += resultado['tablas_validadas']
+                    resultados_paginas.append(resultado)
+
+            # Unir las páginas en orden
+            for num_pagina, resultado in enumerate(resultados_paginas, 1):
+                if resultado.get('ocr'):
+                    paginas_ocr.append(num_pagina)
+                if resultado.get('dpi_alto'):
+                    paginas_dpi_alto.append(num_pagina)
+                if resultado.get('sin_ocr'):
+                    paginas_sin_ocr.append(num_pagina)
+                if resultado['margenes']:
+                    todos_margenes_laterales.extend(resultado['margenes'])
+                if resultado['contenido'] is not None:
+                    contenido_completo.append(resultado['contenido'])
+            if paginas_sin_ocr:
+                print(f"  ⚠ {len(paginas_sin_ocr)} página(s) escaneada(s) sin OCR: el resultado no se guarda en caché")
 
-                    else:
-                        # No hay tablas, extraer texto normalmente
-                        texto = pagina.extract_text()
-                        if texto:
-                            contenido_pagina_partes.append(texto)
-
-                    # Unir las partes de esta página
-                    if contenido_pagina_partes:
-                        contenido_pagina = ' '.join(contenido_pagina_partes)
-                        contenido_completo.append(contenido_pagina)
-
-        except Exception as e:
-            print(f"  ⚠ Error procesando PDF digital: {str(e)}")
-            # Intentar con OCR como respaldo
-            if OCR_DISPONIBLE:
-                print("  🔄 Intentando con OCR como respaldo...")
-                texto_ocr = extraer_texto_con_ocr(ruta_pdf)
-                if not texto_ocr.startswith("Error"):
-                    contenido_completo.append(texto_ocr)
-                    es_escaneado = True
-                else:
-                    return {
-                        "Titulo": titulo,
-                        "contenido": f"Error al procesar: {str(e)}"
-                    }
+    except Exception as e:
+        print(f"  ⚠ Error procesando PDF digital: {str(e)}")
+        # Intentar con OCR como respaldo
+        if OCR_DISPONIBLE:
+            print("  🔄 Intentando con OCR como respaldo...")
+            texto_ocr = extraer_texto_con_ocr(ruta_pdf, paginas_ocr, paginas_dpi_alto)
+            if not texto_ocr.startswith("Error"):
+                contenido_completo.append(texto_ocr)
+                es_escaneado = True
             else:
                 return {
                     "Titulo": titulo,
                     "contenido": f"Error al procesar: {str(e)}"
                 }
+        else:
+            return {
+                "Titulo": titulo,
+                "contenido": f"Error al procesar: {str(e)}"
+            }
 
     # Procesar el texto extraído
     if contenido_completo:
@@ -1542,24 +2549,13 @@ def extraer_contenido_pdf(ruta_pdf: str) -> Dict[str, str]:
         contenido_final = detectar_y_eliminar_texto_fragmentado(contenido_final)
 
         # Proteger las tablas JSON durante la corrección de saltos
-        tablas_encontradas = []
-        marcador_base = "TABLA_PLACEHOLDER"
-
-        # Encontrar y reemplazar temporalmente todas las tablas
-        patron_tabla = r'\{"tabla_\d+":.*?\}\}'
-        for match in re.finditer(patron_tabla, contenido_final):
-            tabla_json = match.group()
-            marcador = f"{marcador_base}{len(tablas_encontradas)}_"
-            tablas_encontradas.append(tabla_json)
-            contenido_final = contenido_final.replace(tabla_json, marcador, 1)
+        contenido_final, tablas_encontradas = proteger_tablas_json(contenido_final)
 
         # Aplicar corrección de saltos de línea
         contenido_final = corregir_saltos_linea(contenido_final)
 
         # Restaurar las tablas JSON
-        for i, tabla_json in enumerate(tablas_encontradas):
-            marcador = f"{marcador_base}{i}_"
-            contenido_final = contenido_final.replace(marcador, tabla_json)
+        contenido_final = restaurar_tablas_json(contenido_final, tablas_encontradas)
 
         # Limpieza final de espacios
         contenido_final = re.sub(r'[ \t]+', ' ', contenido_final)
@@ -1567,7 +2563,10 @@ def extraer_contenido_pdf(ruta_pdf: str) -> Dict[str, str]:
 
         return {
             "Titulo": titulo,
-            "contenido": contenido_final
+            "contenido": contenido_final,
+            "paginas_ocr": paginas_ocr,
+            "paginas_ocr_dpi_alto": paginas_dpi_alto,
+            "paginas_sin_ocr": paginas_sin_ocr
         }
 
     else:
@@ -1576,8 +2575,383 @@ def extraer_contenido_pdf(ruta_pdf: str) -> Dict[str, str]:
             "contenido": "No se pudo extraer contenido del PDF"
         }
 
-def procesar_carpeta_pdfs(ruta_carpeta: str, archivo_salida: str = "pdfs_extraidos.json"):
-    """Procesa todos los archivos PDF en una carpeta y guarda el resultado en JSON"""
+VERSION_EXTRACTOR = "6"  # Cambiarla al modificar la extracción, incluido el texto del OCR: invalida los resultados en caché
+
+
+class CacheExtraccion:
+    """Caché en disco de resultados de extracción, indexada por el contenido del PDF
+
+    La clave es el SHA-256 de los bytes del PDF junto con VERSION_EXTRACTOR: un PDF
+    que no cambió (aunque se haya renombrado o movido) no se vuelve a extraer, y
+    subir la versión invalida todo lo guardado antes. Cada resultado ocupa su propio
+    archivo (<directorio>/<versión>/<sha[:2]>/<sha>.json) escrito de forma atómica,
+    así que varios procesos pueden compartir la caché. Los resultados con error, o
+    con páginas escaneadas que se quedaron sin OCR (paginas_sin_ocr: OCR no
+    disponible o fallido), no se guardan, para reintentarlos en la siguiente corrida.
+    """
+
+    def __init__(self, directorio, version: str = VERSION_EXTRACTOR):
+        self.directorio = Path(directorio) / version
+
+    @staticmethod
+    def hash_archivo(ruta) -> str:
+        """SHA-256 de los bytes del archivo, leído por bloques"""
+        sha = hashlib.sha256()
+        with open(ruta, 'rb') as f:
+            for bloque in iter(lambda: f.read(1 << 20), b''):
+                sha.update(bloque)
+        return sha.hexdigest()
+
+    def _ruta(self, clave: str) -> Path:
+        return self.directorio / clave[:2] / f"{clave}.json"
+
+    def obtener(self, clave: str) -> Optional[Dict[str, str]]:
+        try:
+            with open(self._ruta(clave), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def guardar(self, clave: str, resultado: Dict[str, str]):
+        contenido = resultado.get("contenido", "")
+        if contenido.startswith("Error") or contenido.startswith("No se pudo extraer"):
+            return
+        if resultado.get("paginas_sin_ocr"):
+            return
+        ruta = self._ruta(clave)
+        temporal = ruta.with_name(f"{ruta.name}.{os.getpid()}.tmp")
+        try:
+            ruta.parent.mkdir(parents=True, exist_ok=True)
+            with open(temporal, 'w', encoding='utf-8') as f:
+                json.dump(resultado, f, ensure_ascii=False)
+            os.replace(temporal, ruta)
+        except OSError as e:
+            print(f"  ⚠ No se pudo guardar en caché: {str(e)}")
+
+
+def _extraer_documento_aislado(ruta_pdf: str, workers_paginas: int = 1,
+                               dir_cache: Optional[str] = None) -> Dict[str, str]:
+    """Extrae un PDF convirtiendo cualquier excepción en un resultado con error
+
+    Así un documento defectuoso queda registrado en el JSON de salida
+    en lugar de detener el procesamiento de toda la carpeta.
+    Con dir_cache, un PDF cuyo contenido ya se extrajo con esta misma
+    VERSION_EXTRACTOR se toma de la caché (ver CacheExtraccion).
+    """
+    try:
+        if not dir_cache:
+            return extraer_contenido_pdf(ruta_pdf, workers_paginas)
+
+        cache = CacheExtraccion(dir_cache)
+        clave = cache.hash_archivo(ruta_pdf)
+        resultado = cache.obtener(clave)
+        if resultado is not None:
+            print(f"  ⚡ Sin cambios desde la última extracción (caché): {Path(ruta_pdf).name}")
+            # El título sale del nombre actual del archivo, que pudo cambiar
+            resultado["Titulo"] = limpiar_titulo_archivo(Path(ruta_pdf).stem)
+            return resultado
+
+        resultado = extraer_contenido_pdf(ruta_pdf, workers_paginas)
+        cache.guardar(clave, resultado)
+        return resultado
+    except Exception as e:
+        print(f"  ❌ Error inesperado en {Path(ruta_pdf).name}: {str(e)}")
+        return {
+            "Titulo": limpiar_titulo_archivo(Path(ruta_pdf).stem),
+            "contenido": f"Error al procesar: {str(e)}"
+        }
+
+def _extraer_en_proceso_unico(ruta_pdf: str, dir_cache: Optional[str] = None) -> Dict[str, str]:
+    """Reintenta un PDF en un proceso propio para aislar caídas del intérprete
+
+    Se usa cuando un proceso del pool muere (p. ej. un fallo nativo de la
+    librería de PDF): si el documento vuelve a tumbar su proceso, es el
+    responsable y se registra como error.
+    """
+    with _crear_pool_procesos(1) as pool:
+        try:
+            return pool.submit(_extraer_documento_aislado, ruta_pdf, 1, dir_cache).result()
+        except BrokenProcessPool:
+            print(f"  ❌ El proceso de extracción terminó inesperadamente: {Path(ruta_pdf).name}")
+            return {
+                "Titulo": limpiar_titulo_archivo(Path(ruta_pdf).stem),
+                "contenido": "Error al procesar: el proceso de extracción terminó inesperadamente"
+            }
+
+def _procesar_en_paralelo(archivos: List[Path], workers: int,
+                          dir_cache: Optional[str] = None) -> Iterator[Tuple[int, Dict[str, str]]]:
+    """Reparte los PDFs entre un pool de procesos y entrega (índice, resultado) en el orden de entrada
+
+    Solo se mantienen `workers` documentos en vuelo a la vez, de modo que si
+    el pool se rompe se sabe exactamente qué documentos estaban en curso;
+    esos se reintentan uno por uno en procesos aislados y el resto del lote continúa.
+
+    Cada resultado se entrega en cuanto están listos todos los anteriores, así el
+    llamador puede ir guardándolos sin esperar a que termine la carpeta completa.
+    """
+    listos = {}  # Resultados que llegaron antes que alguno de los anteriores
+    siguiente = 0  # Índice del próximo resultado a entregar
+    pendientes = list(range(len(archivos)))
+    completados = 0
+    pool = _crear_pool_procesos(workers)
+
+    def registrar(idx: int, resultado: Dict[str, str]):
+        nonlocal completados
+        listos[idx] = resultado
+        completados += 1
+        progreso = (completados / len(archivos)) * 100
+        print(f"  ✅ [{completados}/{len(archivos)}] {archivos[idx].name} - Progreso total: {progreso:.2f}%")
+
+    def entregar_en_orden():
+        nonlocal siguiente
+        while siguiente in listos:
+            yield siguiente, listos.pop(siguiente)
+            siguiente += 1
+
+    try:
+        en_vuelo = {}
+        while pendientes or en_vuelo:
+            while pendientes and len(en_vuelo) < workers:
+                idx = pendientes.pop(0)
+                en_vuelo[pool.submit(_extraer_documento_aislado, str(archivos[idx]), 1, dir_cache)] = idx
+
+            terminados, _ = wait(en_vuelo, return_when=FIRST_COMPLETED)
+            if any(isinstance(futuro.exception(), BrokenProcessPool) for futuro in terminados):
+                # El pool quedó inutilizable: recoger lo que alcanzó a terminar
+                # y reintentar aisladamente los documentos que estaban en curso
+                wait(en_vuelo)
+                caidos = []
+                for futuro, idx in en_vuelo.items():
+                    if isinstance(futuro.exception(), BrokenProcessPool):
+                        caidos.append(idx)
+                    else:
+                        registrar(idx, futuro.result())
+                en_vuelo = {}
+                pool.shutdown(wait=True)
+                print(f"  ⚠ Un proceso de extracción se detuvo, reintentando {len(caidos)} documento(s) por separado...")
+                for idx in sorted(caidos):
+                    registrar(idx, _extraer_en_proceso_unico(str(archivos[idx]), dir_cache))
+                pool = _crear_pool_procesos(workers)
+                yield from entregar_en_orden()
+                continue
+
+            for futuro in terminados:
+                registrar(en_vuelo.pop(futuro), futuro.result())
+            yield from entregar_en_orden()
+    finally:
+        pool.shutdown(wait=True)
+
+def _escribir_json_contenido(resultados: Iterable[Dict[str, str]], archivo_json: Path) -> int:
+    """Escribe los documentos en el JSON (arreglo) que lee la etapa de metadatos
+
+    Cada documento ocupa un objeto con "Titulo" y "contenido", este último en una
+    sola línea física. Acepta cualquier iterable, así que los documentos se pueden
+    ir leyendo de un .jsonl sin cargarlos todos en memoria.
+
+    Returns:
+        Número de documentos escritos
+    """
+    total = 0
+    with open(archivo_json, 'w', encoding='utf-8') as f:
+        # Escribir el JSON manualmente para controlar el formato exacto
+        f.write('[\n')
+        for resultado in resultados:
+            if total > 0:
+                f.write('  },\n')
+            f.write('  {\n')
+            f.write(f'    "Titulo": {json.dumps(resultado["Titulo"], ensure_ascii=False)},\n')
+            # El contenido se escribe en una sola línea con saltos de línea escapados
+            # y ahora incluye las tablas embebidas como JSON strings
+            f.write(f'    "contenido": {json.dumps(resultado["contenido"], ensure_ascii=False)}')
+            if "paginas_ocr" in resultado:
+                # Páginas que pasaron por OCR (desde 1): registro de la decisión por página
+                f.write(f',\n    "paginas_ocr": {json.dumps(resultado["paginas_ocr"])}')
+            f.write('\n')
+            total += 1
+        if total > 0:
+            f.write('  }\n')
+        f.write(']')
+    return total
+
+
+def _es_resultado_con_error(resultado: Dict[str, str]) -> bool:
+    """True si la extracción falló ("Error al procesar: ..."), incluido un proceso que terminó inesperadamente"""
+    return (resultado.get("contenido") or "").startswith("Error al procesar")
+
+
+def _leer_indice_jsonl(ruta_jsonl: Path) -> Dict[str, Tuple[int, int, bool]]:
+    """Lee el índice de un .jsonl: nombre del PDF -> (offset, longitud, error) de su último registro
+
+    La lectura se detiene en la primera entrada a medio escribir o que apunta más
+    allá del final del .jsonl: lo que sigue no es fiable.
+    """
+    registros = {}
+    ruta_indice = ruta_jsonl.with_name(ruta_jsonl.name + '.idx')
+    if not ruta_indice.exists():
+        return registros
+    tamano = ruta_jsonl.stat().st_size
+    with open(ruta_indice, 'rb') as f:
+        for linea in f:
+            try:
+                entrada = json.loads(linea)
+            except ValueError:
+                break
+            if entrada['offset'] + entrada['longitud'] > tamano:
+                break
+            registros[entrada['archivo']] = (entrada['offset'], entrada['longitud'], entrada.get('error', False))
+    return registros
+
+
+def _leer_registros_jsonl(ruta_jsonl: Path, posiciones: List[Tuple[int, int]]) -> Iterator[Dict[str, str]]:
+    """Recorre uno por uno los documentos de un .jsonl en las posiciones (offset, longitud) dadas"""
+    with open(ruta_jsonl, 'rb') as f:
+        for offset, longitud in posiciones:
+            f.seek(offset)
+            yield json.loads(f.read(longitud))
+
+
+def convertir_jsonl_a_json(ruta_jsonl, archivo_json, archivos: Optional[List[str]] = None) -> int:
+    """Convierte la salida .jsonl al JSON (arreglo) de siempre, leyendo un documento a la vez
+
+    El arreglo sigue el orden de archivos (nombres de PDF; por defecto los del
+    índice ordenados con obtener_clave_orden) y no el del .jsonl, donde tras
+    reanudar los PDFs nuevos y los reintentos quedan al final. Cada documento se
+    lee por su offset en el índice; los PDFs sin registro se omiten.
+    """
+    ruta_jsonl = Path(ruta_jsonl)
+    registros = _leer_indice_jsonl(ruta_jsonl)
+    if archivos is None:
+        archivos = sorted(registros, key=lambda nombre: obtener_clave_orden(Path(nombre)))
+    posiciones = [registros[nombre][:2] for nombre in archivos if nombre in registros]
+    return _escribir_json_contenido(_leer_registros_jsonl(ruta_jsonl, posiciones), Path(archivo_json))
+
+
+class SalidaJSONL:
+    """Salida incremental en JSON Lines: un documento por línea, guardado al terminarlo
+
+    Cada documento se añade al .jsonl y se sincroniza con el disco en cuanto se
+    extrae, así que una caída a mitad de carpeta no pierde lo ya procesado y la
+    memoria no crece con el número de documentos.
+
+    Junto al .jsonl se mantiene un índice (<archivo>.jsonl.idx, también JSONL) con
+    el nombre del PDF, el offset en bytes, la longitud de cada registro y si la
+    extracción terminó con error. El índice se escribe después del registro: al
+    reanudar, lo que quedó en el .jsonl sin entrada en el índice (un registro a
+    medio escribir) se descarta y ese PDF se vuelve a procesar, igual que los PDFs
+    cuyo registro es un error (p. ej. el de un proceso que terminó inesperadamente).
+    """
+
+    def __init__(self, ruta_jsonl, reanudar: bool = False):
+        self.ruta = Path(ruta_jsonl)
+        self.ruta_indice = self.ruta.with_name(self.ruta.name + '.idx')
+        self.registros = {}  # Nombre del PDF -> (offset, longitud, error) de su último registro
+        self.procesados = set()  # PDFs extraídos sin error: no se vuelven a procesar al reanudar
+
+        if reanudar and self.ruta.exists():
+            self._recuperar()
+        else:
+            # Empezar de cero
+            open(self.ruta, 'wb').close()
+            open(self.ruta_indice, 'wb').close()
+
+        self._datos = open(self.ruta, 'ab')
+        self._indice = open(self.ruta_indice, 'ab')
+
+    def _recuperar(self):
+        """Carga el índice y recorta el .jsonl al último registro indexado completo"""
+        self.registros = _leer_indice_jsonl(self.ruta)
+        self.procesados = {archivo for archivo, (_, _, error) in self.registros.items() if not error}
+
+        fin = max((offset + longitud for offset, longitud, _ in self.registros.values()), default=0)
+        if self.ruta.stat().st_size > fin:
+            with open(self.ruta, 'r+b') as f:
+                f.truncate(fin)
+
+        # Reescribir el índice solo con las entradas válidas
+        with open(self.ruta_indice, 'wb') as f:
+            for archivo, (offset, longitud, error) in self.registros.items():
+                f.write(self._entrada_indice(archivo, offset, longitud, error))
+
+    @staticmethod
+    def _entrada_indice(archivo: str, offset: int, longitud: int, error: bool) -> bytes:
+        entrada = {"archivo": archivo, "offset": offset, "longitud": longitud, "error": error}
+        return (json.dumps(entrada, ensure_ascii=False) + '\n').encode('utf-8')
+
+    def escribir(self, archivo: str, resultado: Dict[str, str]):
+        """Añade un documento y lo registra en el índice con el nombre de su PDF
+
+        Un registro nuevo de un PDF reemplaza al anterior (el de un intento con error).
+        """
+        error = _es_resultado_con_error(resultado)
+        registro = {"Titulo": resultado["Titulo"], "contenido": resultado["contenido"]}
+        if "paginas_ocr" in resultado:
+            registro["paginas_ocr"] = resultado["paginas_ocr"]
+        linea = (json.dumps(registro, ensure_ascii=False) + '\n').encode('utf-8')
+        offset = self._datos.tell()
+        self._datos.write(linea)
+        self._datos.flush()
+        os.fsync(self._datos.fileno())
+
+        self._indice.write(self._entrada_indice(archivo, offset, len(linea), error))
+        self._indice.flush()
+        os.fsync(self._indice.fileno())
+        self.registros[archivo] = (offset, len(linea), error)
+        if error:
+            self.procesados.discard(archivo)
+        else:
+            self.procesados.add(archivo)
+
+    def cerrar(self):
+        self._datos.close()
+        self._indice.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+        return False
+
+
+def obtener_clave_orden(archivo_path):
+    """Extrae clave de ordenamiento del nombre del archivo"""
+    nombre = archivo_path.name
+
+    # Buscar número al inicio del nombre
+    match = re.match(r'^(\d+)', nombre)
+
+    if match:
+        # Si tiene número al inicio, usar el número para ordenar
+        numero = int(match.group(1))
+        return (0, numero, nombre.lower())
+    else:
+        # Si no tiene número, ordenar alfabéticamente después de los numerados
+        return (1, 0, nombre.lower())
+
+
+def procesar_carpeta_pdfs(ruta_carpeta: str, archivo_salida: str = "pdfs_extraidos.json", workers: int = 1,
+                          workers_paginas: int = 1, jsonl: bool = False, reanudar: bool = False,
+                          dir_cache: Optional[str] = None, workers_ocr: int = 1):
+    """Procesa todos los archivos PDF en una carpeta y guarda el resultado en JSON
+
+    Con workers > 1 los documentos se extraen en paralelo en un pool de
+    procesos; el JSON conserva el mismo orden que el modo secuencial.
+    Con workers_paginas > 1 (solo en modo secuencial) las páginas de cada PDF
+    digital grande se reparten entre procesos.
+
+    Con jsonl=True cada documento se guarda en <salida>.jsonl en cuanto termina
+    (ver SalidaJSONL) y al final se genera el JSON de siempre a partir de ese
+    archivo. Con reanudar=True se conserva lo que ya estaba en el .jsonl y solo
+    se procesan los PDFs que faltan o que terminaron con error; el JSON final
+    sigue el orden de la carpeta, no el del .jsonl.
+
+    Con dir_cache, los PDFs cuyo contenido no cambió desde una corrida anterior
+    se toman de la caché de extracción en lugar de volver a extraerse.
+
+    Con workers_ocr > 1 (solo en modo secuencial) las páginas de los PDFs
+    escaneados se reparten entre un pool de procesos de OCR que se comparte
+    entre todos los documentos de la carpeta.
+    """
 
     # Convertir a Path para manejo más fácil
     carpeta = Path(ruta_carpeta)
@@ -1604,24 +2978,21 @@ def procesar_carpeta_pdfs(ruta_carpeta: str, archivo_salida: str = "pdfs_extraid
         return
 
     # ORDENAR ARCHIVOS: primero por número si tienen prefijo numérico, luego alfabéticamente
-    def obtener_clave_orden(archivo_path):
-        """Extrae clave de ordenamiento del nombre del archivo"""
-        nombre = archivo_path.name
-
-        # Buscar número al inicio del nombre
-        match = re.match(r'^(\d+)', nombre)
-
-        if match:
-            # Si tiene número al inicio, usar el número para ordenar
-            numero = int(match.group(1))
-            return (0, numero, nombre.lower())
-        else:
-            # Si no tiene número, ordenar alfabéticamente después de los numerados
-            return (1, 0, nombre.lower())
-
-    # Ordenar los archivos usando la función de clave
     todos_archivos = sorted(todos_archivos, key=obtener_clave_orden)
 
+    salida_jsonl = None
+    if jsonl or reanudar:
+        salida_jsonl = SalidaJSONL(Path(archivo_salida).with_suffix('.jsonl'), reanudar=reanudar)
+        # El JSON final se arma en este orden aunque se reanude con PDFs nuevos
+        orden_carpeta = [a.name for a in todos_archivos]
+        if salida_jsonl.registros:
+            faltantes = [a for a in todos_archivos if a.name not in salida_jsonl.procesados]
+            reintentos = sum(1 for a in faltantes if a.name in salida_jsonl.registros)
+            print(f"↻ Reanudando: {len(todos_archivos) - len(faltantes)} archivo(s) ya están en {salida_jsonl.ruta.name}")
+            if reintentos:
+                print(f"↻ Se reintentan {reintentos} archivo(s) que terminaron con error")
+            todos_archivos = faltantes
+
     print(f"📁 Carpeta: {ruta_carpeta}")
     print(f"📊 Total de archivos PDF encontrados: {len(todos_archivos)}")
     print(f"📋 Orden de procesamiento:")
@@ -1632,56 +3003,124 @@ def procesar_carpeta_pdfs(ruta_carpeta: str, archivo_salida: str = "pdfs_extraid
     if len(todos_archivos) > 10:
         print(f"   ... y {len(todos_archivos) - 10} archivos más")
 
+    if dir_cache:
+        print(f"🗄 Caché de extracción: {dir_cache}")
+    if _cache_ocr is not None:
+        print(f"🗄 Caché de OCR: {_cache_ocr.directorio_base}")
+
     print("-" * 50)
 
     resultados = []
+    paginas_con_ocr = 0  # Para el resumen del OCR adaptativo
+    paginas_dpi_alto = 0
+
+    def guardar(archivo: Path, resultado: Dict[str, str]):
+        """Añade el documento al .jsonl (modo jsonl) o a la lista en memoria"""
+        nonlocal paginas_con_ocr, paginas_dpi_alto
+        paginas_con_ocr += len(resultado.get("paginas_ocr", []))
+        paginas_dpi_alto += len(resultado.get("paginas_ocr_dpi_alto", []))
+        if salida_jsonl is not None:
+            salida_jsonl.escribir(archivo.name, resultado)
+        else:
+            resultados.append(resultado)
 
-    for i, archivo_path in enumerate(todos_archivos, 1):
-        print(f"📄 [{i}/{len(todos_archivos)}] Procesando: {archivo_path.name}")
-
-        # Procesar el PDF
-        resultado = extraer_contenido_pdf(str(archivo_path))
+    if workers > 1:
+        print(f"⚙ Modo paralelo: {workers} procesos")
+        if workers_paginas > 1:
+            print(f"  ⚠ --workers-paginas se ignora cuando los documentos ya se procesan en paralelo")
+        if workers_ocr > 1:
+            print(f"  ⚠ --workers-ocr se ignora cuando los documentos ya se procesan en paralelo")
+        for idx, resultado in _procesar_en_paralelo(todos_archivos, workers, dir_cache):
+            if resultado:
+                guardar(todos_archivos[idx], resultado)
+    else:
+        # Un solo pool de OCR para las páginas escaneadas de todos los documentos
+        configurar_pool_ocr(workers_ocr)
+        if workers_ocr > 1:
+            print(f"⚙ OCR en paralelo: {workers_ocr} procesos")
+        for i, archivo_path in enumerate(todos_archivos, 1):
+            print(f"📄 [{i}/{len(todos_archivos)}] Procesando: {archivo_path.name}")
+
+            # Procesar el PDF
+            resultado = _extraer_documento_aislado(str(archivo_path), workers_paginas, dir_cache)
+
+            if resultado:
+                guardar(archivo_path, resultado)
+            else:
+                print(f"  ❌ No se pudo procesar el archivo")
+                continue
 
-        if resultado:
-            resultados.append(resultado)
-        else:
-            print(f"  ❌ No se pudo procesar el archivo")
-            continue
+            # Mostrar progreso
+            progreso = (i / len(todos_archivos)) * 100
+            print(f"  ✅ Completado - Progreso total: {progreso:.2f}%")
+            print()
 
-        # Mostrar progreso
-        progreso = (i / len(todos_archivos)) * 100
-        print(f"  ✅ Completado - Progreso total: {progreso:.2f}%")
-        print()
+    # Liberar los procesos de OCR
+    cerrar_pool_ocr()
 
     # Guardar resultados en JSON con contenido en una sola línea física
     archivo_json = Path(archivo_salida)
-    with open(archivo_json, 'w', encoding='utf-8') as f:
-        # Escribir el JSON manualmente para controlar el formato exacto
-        f.write('[\n')
-        for i, resultado in enumerate(resultados):
-            f.write('  {\n')
-            f.write(f'    "Titulo": {json.dumps(resultado["Titulo"], ensure_ascii=False)},\n')
-            # El contenido se escribe en una sola línea con saltos de línea escapados
-            # y ahora incluye las tablas embebidas como JSON strings
-            f.write(f'    "contenido": {json.dumps(resultado["contenido"], ensure_ascii=False)}\n')
-            if i < len(resultados) - 1:
-                f.write('  },\n')
-            else:
-                f.write('  }\n')
-        f.write(']')
+    if salida_jsonl is not None:
+        salida_jsonl.cerrar()
+        total = convertir_jsonl_a_json(salida_jsonl.ruta, archivo_json, orden_carpeta)
+    else:
+        total = _escribir_json_contenido(resultados, archivo_json)
 
     print("-" * 50)
     print(f"✅ Proceso completado")
+    if salida_jsonl is not None:
+        print(f"📝 JSONL: {salida_jsonl.ruta.absolute()}")
     print(f"📝 Resultados guardados en: {archivo_json.absolute()}")
-    print(f"📊 Total de archivos procesados: {len(resultados)}")
+    print(f"📊 Total de archivos procesados: {total}")
+    if paginas_con_ocr:
+        print(f"🔍 Páginas con OCR: {paginas_con_ocr} - repetidas a {DPI_OCR} DPI por baja confianza: "
+              f"{paginas_dpi_alto} ({paginas_dpi_alto / paginas_con_ocr * 100:.1f}%)")
 
 def main():
+    parser = argparse.ArgumentParser(description="Extracción de contenido de PDFs a JSON")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Procesos para extraer documentos en paralelo (1 = secuencial, 0 = todos los núcleos)")
+    parser.add_argument("--workers-paginas", type=int, default=1,
+                        help=f"Procesos para repartir las páginas de PDFs digitales de {PAGINAS_MINIMAS_PARALELO}+ páginas "
+                             "(1 = secuencial, 0 = todos los núcleos)")
+    parser.add_argument("--workers-ocr", type=int, default=1,
+                        help="Procesos para aplicar OCR en paralelo a las páginas de PDFs escaneados "
+                             "(1 = secuencial, 0 = todos los núcleos)")
+    parser.add_argument("--jsonl", action="store_true",
+                        help="Guardar cada documento al terminarlo en <salida>.jsonl (con índice) y generar el JSON al final")
+    parser.add_argument("--resume", action="store_true",
+                        help="Reanudar desde el .jsonl existente procesando solo los PDFs que faltan (implica --jsonl)")
+    parser.add_argument("--convertir-jsonl", action="store_true",
+                        help="Solo convertir el .jsonl existente al JSON de salida, sin procesar PDFs")
+    parser.add_argument("--dir-cache", default=None,
+                        help="Carpeta de la caché de extracción (por defecto <salida>.cache junto al JSON)")
+    parser.add_argument("--sin-cache", action="store_true",
+                        help="Extraer todos los PDFs sin leer ni guardar las cachés de extracción y de OCR")
+    parser.add_argument("--dir-cache-ocr", default=DIR_CACHE_OCR,
+                        help="Carpeta de la caché de OCR por página, compartida con los scripts de metadatos "
+                             f"(por defecto {DIR_CACHE_OCR})")
+    parser.add_argument("--cache-ocr-mb", type=int, default=TAMANO_MAXIMO_CACHE_OCR_MB,
+                        help="Tamaño máximo de la caché de OCR en MB; al superarlo se borran las páginas usadas hace más tiempo")
+    args = parser.parse_args()
+    workers = args.workers if args.workers > 0 else (os.cpu_count() or 1)
+    workers_paginas = args.workers_paginas if args.workers_paginas > 0 else (os.cpu_count() or 1)
+    workers_ocr = args.workers_ocr if args.workers_ocr > 0 else (os.cpu_count() or 1)
+
     # Ruta de la carpeta con archivos
     ruta_carpeta = r"C:\Users\julii\Documents\AGUASCALIENTES DOF\Código"
 
     # Nombre del archivo JSON de salida
     archivo_salida = r"C:\Users\julii\Documents\Practicas\drive\AGUAS\contenido\Código\Código-contenido.json"
 
+    if args.convertir_jsonl:
+        ruta_jsonl = Path(archivo_salida).with_suffix('.jsonl')
+        if not ruta_jsonl.exists():
+            print(f"❌ No existe {ruta_jsonl}")
+            return
+        total = convertir_jsonl_a_json(ruta_jsonl, archivo_salida)
+        print(f"✅ {total} documento(s) de {ruta_jsonl} convertidos a {archivo_salida}")
+        return
+
     print("🚀 Iniciando extracción de archivos PDF")
     print("   MODO: Extracción exhaustiva de PDFs")
     print("=" * 70)
@@ -1691,6 +3130,11 @@ def main():
 
     if OCR_DISPONIBLE:
         print("✅ OCR (Tesseract): Disponible - PDFs escaneados")
+        if TESSEROCR_DISPONIBLE:
+            print("   Motor: tesserocr (idioma cargado una sola vez por proceso)")
+        else:
+            print("   Motor: pytesseract (instala tesserocr para un OCR más rápido)")
+        print(f"   Resolución: {DPI_OCR_INICIAL} DPI; {DPI_OCR} DPI para las páginas con confianza menor a {CONFIANZA_MINIMA_OCR}")
     else:
         print("⚠️  OCR: NO disponible - Solo PDFs con texto digital")
 
@@ -1704,7 +3148,13 @@ def main():
     print("=" * 70)
     print()
 
-    procesar_carpeta_pdfs(ruta_carpeta, archivo_salida)
+    # La caché de extracción vive junto al JSON de salida salvo que se indique otra carpeta
+    dir_cache = None if args.sin_cache else (args.dir_cache or str(Path(archivo_salida).with_suffix('.cache')))
+    # La caché de OCR por página es una sola para todos los scripts
+    configurar_cache_ocr(None if args.sin_cache else args.dir_cache_ocr, args.cache_ocr_mb)
+
+    procesar_carpeta_pdfs(ruta_carpeta, archivo_salida, workers=workers, workers_paginas=workers_paginas,
+                          jsonl=args.jsonl, reanudar=args.resume, dir_cache=dir_cache, workers_ocr=workers_ocr)
 
 if __name__ == "__main__":
     main() 
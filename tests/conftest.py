@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""
+Utilidades comunes de las pruebas.
+
+Los scripts no forman un paquete (sus nombres llevan espacios y acentos) y cada
+tipo de documento tiene su propia copia del código, así que las pruebas cargan
+los scripts desde su ruta y se repiten sobre todas las copias.
+"""
+
+import importlib.util
+import sys
+from pathlib import Path
+
+import pytest
+
+RAIZ = Path(__file__).resolve().parent.parent
+
+_scripts_cargados = {}
+
+
+def scripts_con(texto: str):
+    """Scripts del repositorio cuyo código contiene `texto` (p. ej. "class SalidaJSONL")"""
+    return sorted(ruta for ruta in RAIZ.glob('**/*.py')
+                  if 'tests' not in ruta.relative_to(RAIZ).parts
+                  and texto in ruta.read_text(encoding='utf-8'))
+
+
+def parametrizar_scripts(texto: str):
+    """Marca de pytest que repite la prueba con cada script que contiene `texto`"""
+    scripts = scripts_con(texto)
+    return pytest.mark.parametrize('ruta_script', scripts,
+                                   ids=[ruta.relative_to(RAIZ).as_posix() for ruta in scripts])
+
+
+def cargar_script(ruta: Path):
+    """
+    Carga un script desde su ruta, una vez por sesión. Si falta alguna de sus
+    dependencias (pdfplumber, easyocr, ...) la prueba se omite.
+    """
+    if ruta in _scripts_cargados:
+        return _scripts_cargados[ruta]
+
+    nombre = f"script_{len(_scripts_cargados)}"
+    spec = importlib.util.spec_from_file_location(nombre, ruta)
+    modulo = importlib.util.module_from_spec(spec)
+    # Los scripts de extracción cambian sys.stdout por un TextIOWrapper propio al importarse
+    stdout = sys.stdout
+    sys.modules[nombre] = modulo
+    try:
+        spec.loader.exec_module(modulo)
+    except ModuleNotFoundError as e:
+        del sys.modules[nombre]
+        pytest.skip(f"Falta la dependencia {e.name}")
+    finally:
+        if sys.stdout is not stdout:
+            # Soltar el buffer sin cerrarlo: es el de la salida que captura pytest
+            sys.stdout.detach()
+            sys.stdout = stdout
+
+    _scripts_cargados[ruta] = modulo
+    return modulo
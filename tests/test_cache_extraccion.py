@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""
+Caché de resultados de la extracción (CacheExtraccion): un documento cuyas
+páginas escaneadas se quedaron sin OCR no se guarda, para extraerlo de nuevo
+cuando el OCR funcione.
+"""
+
+import pytest
+
+from conftest import cargar_script, parametrizar_scripts
+
+parametrizar = parametrizar_scripts('class CacheExtraccion')
+
+TEXTO_DIGITAL = 'Articulo 1. Esta pagina tiene capa de texto suficiente para no tratarse como escaneada.'
+
+
+def _pdf(ruta, paginas):
+    """
+    Escribe un PDF mínimo: 'texto' es una página con capa de texto y 'imagen'
+    una página escaneada (solo una imagen, sin texto)
+    """
+    objetos = ['<< /Type /Catalog /Pages 2 0 R >>', None,
+               '<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>',
+               '<< /Type /XObject /Subtype /Image /Width 1 /Height 1 /ColorSpace /DeviceGray '
+               '/BitsPerComponent 8 /Length 1 >>\nstream\n\x80\nendstream']
+    hojas = []
+    for tipo in paginas:
+        if tipo == 'texto':
+            flujo = f'BT /F1 10 Tf 50 750 Td ({TEXTO_DIGITAL}) Tj ET'
+        else:
+            flujo = 'q 500 0 0 700 50 50 cm /Im1 Do Q'
+        objetos.append(f'<< /Length {len(flujo)} >>\nstream\n{flujo}\nendstream')
+        objetos.append(f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents {len(objetos)} 0 R '
+                       '/Resources << /Font << /F1 3 0 R >> /XObject << /Im1 4 0 R >> >> >>')
+        hojas.append(f'{len(objetos)} 0 R')
+    objetos[1] = f'<< /Type /Pages /Kids [{" ".join(hojas)}] /Count {len(hojas)} >>'
+
+    datos = b'%PDF-1.4\n'
+    offsets = []
+    for numero, objeto in enumerate(objetos, 1):
+        offsets.append(len(datos))
+        datos += f'{numero} 0 obj\n{objeto}\nendobj\n'.encode('latin-1')
+    inicio_xref = len(datos)
+    datos += f'xref\n0 {len(objetos) + 1}\n0000000000 65535 f \n'.encode('latin-1')
+    for offset in offsets:
+        datos += f'{offset:010d} 00000 n \n'.encode('latin-1')
+    datos += (f'trailer\n<< /Size {len(objetos) + 1} /Root 1 0 R >>\n'
+              f'startxref\n{inicio_xref}\n%%EOF\n').encode('latin-1')
+    ruta.write_bytes(datos)
+    return str(ruta)
+
+
+def _ocr_que_falla(ruta_pdf, num_pagina, dpi):
+    raise RuntimeError('tesseract is not installed or it is not in your PATH')
+
+
+def _ocr_correcto(ruta_pdf, num_pagina, dpi):
+    return f'Texto reconocido por OCR en la pagina {num_pagina} del documento escaneado.', [], False
+
+
+@pytest.fixture
+def modulo(ruta_script, monkeypatch):
+    modulo = cargar_script(ruta_script)
+    monkeypatch.setattr(modulo, '_pool_ocr', None)
+    monkeypatch.setattr(modulo, '_workers_ocr', 1)
+    return modulo
+
+
+@parametrizar
+@pytest.mark.parametrize('ocr_disponible, ocr', [(False, None), (True, _ocr_que_falla)],
+                         ids=['sin-ocr', 'ocr-fallido'])
+def test_paginas_escaneadas_sin_ocr_no_se_guardan(modulo, ocr_disponible, ocr, tmp_path, monkeypatch):
+    monkeypatch.setattr(modulo, 'OCR_DISPONIBLE', ocr_disponible)
+    if ocr is not None:
+        monkeypatch.setattr(modulo, '_ocr_pagina_en_proceso', ocr)
+    ruta_pdf = _pdf(tmp_path / 'doc.pdf', ['texto', 'imagen', 'texto', 'imagen'])
+    dir_cache = tmp_path / 'cache'
+
+    resultado = modulo._extraer_documento_aislado(ruta_pdf, dir_cache=str(dir_cache))
+
+    assert 'Articulo 1' in resultado['contenido']
+    assert resultado['paginas_sin_ocr'] == [2, 4]
+    assert not dir_cache.exists() or not any(p.is_file() for p in dir_cache.rglob('*'))
+
+
+@parametrizar
+def test_paginas_escaneadas_con_ocr_se_guardan(modulo, tmp_path, monkeypatch):
+    monkeypatch.setattr(modulo, 'OCR_DISPONIBLE', True)
+    monkeypatch.setattr(modulo, '_ocr_pagina_en_proceso', _ocr_correcto)
+    ruta_pdf = _pdf(tmp_path / 'doc.pdf', ['texto', 'imagen'])
+    dir_cache = str(tmp_path / 'cache')
+
+    resultado = modulo._extraer_documento_aislado(ruta_pdf, dir_cache=dir_cache)
+    assert resultado['paginas_ocr'] == [2] and resultado['paginas_sin_ocr'] == []
+
+    # La segunda vez sale de la caché, sin volver a pasar por OCR
+    monkeypatch.setattr(modulo, '_ocr_pagina_en_proceso', _ocr_que_falla)
+    assert modulo._extraer_documento_aislado(ruta_pdf, dir_cache=dir_cache)['contenido'] == resultado['contenido']
+
+
+@parametrizar
+def test_rango_de_paginas_marca_las_escaneadas_sin_ocr(modulo, tmp_path, monkeypatch):
+    monkeypatch.setattr(modulo, 'OCR_DISPONIBLE', False)
+    ruta_pdf = _pdf(tmp_path / 'doc.pdf', ['texto', 'imagen', 'texto'])
+
+    resultados = modulo._extraer_rango_paginas(ruta_pdf, 0, 3)
+
+    assert [bool(r.get('sin_ocr')) for r in resultados] == [False, True, False]
+
+
+@parametrizar
+def test_guardar_omite_resultados_incompletos(modulo, tmp_path):
+    cache = modulo.CacheExtraccion(tmp_path)
+    cache.guardar('aa11', {"Titulo": "a", "contenido": "texto", "paginas_ocr": [], "paginas_sin_ocr": [3]})
+    cache.guardar('bb22', {"Titulo": "b", "contenido": "Error al procesar: x"})
+    cache.guardar('cc33', {"Titulo": "c", "contenido": "texto", "paginas_ocr": [1], "paginas_sin_ocr": []})
+
+    assert cache.obtener('aa11') is None and cache.obtener('bb22') is None
+    assert cache.obtener('cc33')['paginas_ocr'] == [1]
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""
+ejecutar_metadatos.py: los scripts que carga pueden repartir trabajo en procesos
+(el OCR con OCR_WORKERS > 1), un sys.exit() solo termina ese script y sys.argv
+queda como estaba.
+"""
+
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+from conftest import cargar_script, parametrizar_scripts
+
+parametrizar = parametrizar_scripts('class _BuscadorScripts')
+
+# Script de metadatos mínimo: como ocr_pages_parallel, envía una función del
+# propio módulo a un pool de procesos
+SCRIPT_CON_PROCESOS = '''
+import multiprocessing
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+OCR_READERS = {{}}
+
+
+def _cuadrado(x):
+    return x * x
+
+
+def main():
+    contexto = multiprocessing.get_context({contexto!r})
+    with ProcessPoolExecutor(max_workers=2, mp_context=contexto) as pool:
+        resultado = list(pool.map(_cuadrado, [1, 2, 3]))
+    Path(__file__).with_suffix('.txt').write_text(f"{{resultado}} {{sys.argv}}", encoding='utf-8')
+'''
+
+SCRIPT_CON_EXIT = '''
+import sys
+
+OCR_READERS = {}
+
+
+def main():
+    sys.exit(2)
+'''
+
+
+@pytest.fixture
+def carpeta(ruta_script, tmp_path, monkeypatch):
+    """Copia del ejecutor en una carpeta temporal, sin dejar rastro en sys.meta_path ni sys.modules"""
+    monkeypatch.setattr(sys, 'meta_path', list(sys.meta_path))
+    shutil.copy(ruta_script, tmp_path / 'ejecutar_metadatos.py')
+    yield tmp_path
+    for nombre in [nombre for nombre in sys.modules if nombre.startswith('metadatos_')]:
+        del sys.modules[nombre]
+
+
+@parametrizar
+def test_scripts_con_procesos_y_sys_exit(carpeta, monkeypatch, capsys):
+    if 'fork' not in __import__('multiprocessing').get_all_start_methods():
+        pytest.skip('Sin fork en esta plataforma')
+    (carpeta / 'uno.py').write_text(SCRIPT_CON_PROCESOS.format(contexto='fork'), encoding='utf-8')
+    (carpeta / 'dos.py').write_text(SCRIPT_CON_EXIT, encoding='utf-8')
+    ejecutor = cargar_script(carpeta / 'ejecutar_metadatos.py')
+    argv = ['ejecutar_metadatos.py', 'uno.py', 'dos.py']
+    monkeypatch.setattr(sys, 'argv', argv)
+
+    ejecutor.main()
+
+    assert sys.argv is argv
+    assert (carpeta / 'uno.txt').read_text(encoding='utf-8') == "[1, 4, 9] ['uno.py']"
+    salida = capsys.readouterr().out
+    assert 'ERROR en dos.py: terminó con sys.exit(2)' in salida
+    assert 'Scripts ejecutados: 1/2' in salida
+    assert sys.modules['metadatos_uno'].OCR_READERS is sys.modules['metadatos_dos'].OCR_READERS
+
+
+@parametrizar
+def test_procesos_que_arrancan_de_cero(carpeta):
+    # Como en Windows (spawn): el proceso hijo importa el ejecutor y luego el script
+    (carpeta / 'uno.py').write_text(SCRIPT_CON_PROCESOS.format(contexto='spawn'), encoding='utf-8')
+
+    proceso = subprocess.run([sys.executable, 'ejecutar_metadatos.py', 'uno.py'], cwd=carpeta,
+                             capture_output=True, text=True, encoding='utf-8', timeout=120)
+
+    assert proceso.returncode == 0, proceso.stdout + proceso.stderr
+    assert 'Scripts ejecutados: 1/1' in proceso.stdout
+    assert (carpeta / 'uno.txt').read_text(encoding='utf-8') == "[1, 4, 9] ['uno.py']"
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""
+Extracción por rangos de páginas en paralelo (_extraer_paginas_en_paralelo):
+las tablas deben quedar numeradas igual que en la extracción secuencial.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+from conftest import cargar_script, parametrizar_scripts
+
+# Tablas de cada página del documento sintético
+TABLAS_POR_PAGINA = [0, 2, 1, 0, 0, 3, 1, 0, 2, 0, 1, 1, 0]
+
+
+def _tablas(num_pagina: int):
+    return [[['Concepto', 'Monto'], [f'Página {num_pagina} fila {k}', str(k)]]
+            for k in range(TABLAS_POR_PAGINA[num_pagina])]
+
+
+def _extraer_pagina(modulo, num_pagina: int, contador_tablas: int):
+    return modulo._resultado_pagina_ocr(f'Texto de la página {num_pagina}', _tablas(num_pagina), contador_tablas)
+
+
+def _extraer_rango(modulo, ruta_pdf, inicio, fin):
+    """Lo que devuelve cada proceso: las tablas de su rango numeradas desde 1"""
+    resultados = []
+    contador_tablas = 0
+    for num_pagina in range(inicio, fin):
+        resultados.append(_extraer_pagina(modulo, num_pagina, contador_tablas))
+        contador_tablas += resultados[-1]['tablas_validadas']
+    return resultados
+
+
+@parametrizar_scripts('def _extraer_paginas_en_paralelo')
+def test_tablas_numeradas_como_en_secuencial(ruta_script, monkeypatch):
+    modulo = cargar_script(ruta_script)
+    total = len(TABLAS_POR_PAGINA)
+
+    secuencial = _extraer_rango(modulo, 'doc.pdf', 0, total)
+
+    monkeypatch.setattr(modulo, '_crear_pool_procesos', ThreadPoolExecutor)
+    monkeypatch.setattr(modulo, '_extraer_rango_paginas',
+                        lambda ruta_pdf, inicio, fin: _extraer_rango(modulo, ruta_pdf, inicio, fin))
+    # 2 procesos: 8 rangos de 1 o 2 páginas
+    paralelo = modulo._extraer_paginas_en_paralelo('doc.pdf', total, 2)
+
+    assert [r['contenido'] for r in paralelo] == [r['contenido'] for r in secuencial]
+    assert [r['tablas_json'] for r in paralelo] == [r['tablas_json'] for r in secuencial]
+    numeros = [tabla.split(':', 1)[0] for r in paralelo for tabla in r['tablas_json']]
+    assert numeros == [f'{{"tabla_{k}"' for k in range(1, sum(TABLAS_POR_PAGINA) + 1)]
+
+
+@parametrizar_scripts('def _renumerar_tablas_pagina')
+def test_renumerar_solo_toca_las_tablas(ruta_script):
+    modulo = cargar_script(ruta_script)
+    resultado = modulo._resultado_pagina_ocr('tabla_1 en el texto', _tablas(5), 0)
+    original = resultado['contenido']
+
+    modulo._renumerar_tablas_pagina(resultado, 4)
+
+    assert resultado['contenido'].startswith('tabla_1 en el texto')
+    assert [tabla.split(':', 1)[0] for tabla in resultado['tablas_json']] == ['{"tabla_5"', '{"tabla_6"', '{"tabla_7"']
+    assert resultado['contenido'] == original.replace('"tabla_3"', '"tabla_7"').replace(
+        '"tabla_2"', '"tabla_6"').replace('"tabla_1"', '"tabla_5"')
@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+"""
+Matching uno a uno de los PDFs con los registros de los JSON (TitleIndex.assign,
+ReglamentoProcessor.match_titles) y el reporte matching.csv.
+"""
+
+import csv
+import random
+from difflib import SequenceMatcher
+
+import pytest
+
+from conftest import cargar_script, parametrizar_scripts
+
+parametrizar = parametrizar_scripts('class TitleIndex')
+
+BASE = 'reglamento de la ley de transito y vialidad del estado'
+LARGO = 'reglamento interior de la secretaria de salud del estado de aguascalientes'
+
+# (caso, títulos de los registros, títulos de los PDFs en orden,
+#  {título del PDF: posición del registro asignado o None})
+CASOS_ASSIGN = [
+    ('mismo normalizado, un registro',
+     ['Ley de Aguas del Estado'],
+     ['Ley de Aguas del Estado', 'LEY DE AGUAS DEL ESTADO'],
+     {'Ley de Aguas del Estado': 0, 'LEY DE AGUAS DEL ESTADO': None}),
+    ('mismo normalizado, dos registros',
+     ['Ley de Aguas del Estado', 'LEY DE AGUAS DEL ESTADO'],
+     ['LEY DE AGUAS DEL ESTADO', 'Ley de Águas del Estado'],
+     {'LEY DE AGUAS DEL ESTADO': 0, 'Ley de Águas del Estado': 1}),
+    ('idéntico antes que parecido',
+     [BASE, BASE + 's'],
+     [BASE + 'x', BASE],
+     {BASE + 'x': 1, BASE: 0}),
+    ('empate: gana el primer PDF',
+     [BASE],
+     [BASE + 'x', BASE + 'y'],
+     {BASE + 'x': 0, BASE + 'y': None}),
+    ('empate: primero el primer registro, el siguiente PDF toma el otro',
+     [BASE + 'x', BASE + 'y'],
+     [BASE + 'z', BASE + 'w'],
+     {BASE + 'z': 0, BASE + 'w': 1}),
+    ('mayor similitud primero',
+     [BASE, BASE + ' del sur'],
+     [BASE + ' de', BASE + 'x'],
+     {BASE + 'x': 0, BASE + ' de': 1}),
+    ('palabras de versión solo en el registro',
+     [LARGO + ' parte 2'],
+     [LARGO],
+     {LARGO: None}),
+    ('palabras de versión solo en el PDF',
+     [LARGO],
+     [LARGO + ' tomo ii'],
+     {LARGO + ' tomo ii': None}),
+    ('palabras de versión en los dos',
+     [LARGO + ' parte 1'],
+     [LARGO + ' parte 2'],
+     {LARGO + ' parte 2': 0}),
+    ('sin registro parecido',
+     [BASE],
+     ['codigo civil'],
+     {'codigo civil': None}),
+]
+
+
+def _normalizar(modulo):
+    return modulo.ReglamentoProcessor.normalize_text.__get__(modulo.ReglamentoProcessor.__new__(modulo.ReglamentoProcessor))
+
+
+def _indice(modulo, titulos):
+    return modulo.TitleIndex([{'Titulo': titulo, 'contenido': f'Contenido de {titulo}'} for titulo in titulos],
+                             lambda item: item.get('Titulo'), _normalizar(modulo))
+
+
+@parametrizar
+@pytest.mark.parametrize('caso, registros, pdfs, esperado', CASOS_ASSIGN, ids=[caso[0] for caso in CASOS_ASSIGN])
+def test_assign(ruta_script, caso, registros, pdfs, esperado):
+    modulo = cargar_script(ruta_script)
+    normalizar = _normalizar(modulo)
+    indice = _indice(modulo, registros)
+
+    asignados = indice.assign({pdf: normalizar(pdf) for pdf in pdfs})
+
+    assert {pdf: match and match[0] for pdf, match in asignados.items()} == esperado
+    # Cada PDF busca con su título y obtiene su propia asignación
+    for pdf, pos in esperado.items():
+        normalizado = normalizar(pdf)
+        encontrado = indice.find_exact(normalizado, pdf) or (indice.best_match(normalizado, pdf) or [None])[0]
+        assert encontrado == (indice.entries[pos][0] if pos is not None else None)
+
+
+def _assign_lineal(modulo, registros, pdfs):
+    """Referencia: todos los pares posibles comparando cada PDF con cada registro, y el mismo reparto"""
+    pares = []
+    for orden, normalizado in enumerate(pdfs.values()):
+        identicos = [pos for pos, registro in enumerate(registros) if registro == normalizado]
+        if identicos:
+            pares.extend((0, -1.0, orden, pos) for pos in identicos)
+            continue
+        for pos, registro in enumerate(registros):
+            if abs(len(normalizado) - len(registro)) / max(len(normalizado), len(registro)) > modulo.TITLE_MAX_LENGTH_DIFF:
+                continue
+            ratio = SequenceMatcher(None, normalizado, registro).ratio()
+            if (ratio > modulo.TITLE_MATCH_THRESHOLD
+                    and modulo._has_version_words(registro) == modulo._has_version_words(normalizado)):
+                pares.append((1, -ratio, orden, pos))
+    titulos = list(pdfs)
+    asignados = dict.fromkeys(titulos)
+    tomados = set()
+    for _, menos_ratio, orden, pos in sorted(pares):
+        if asignados[titulos[orden]] is None and pos not in tomados:
+            asignados[titulos[orden]] = (pos, -menos_ratio)
+            tomados.add(pos)
+    return asignados
+
+
+def _variante(generador, titulo):
+    """Título con algunos caracteres cambiados, mayúsculas o una palabra de versión"""
+    letras = list(titulo)
+    for _ in range(generador.randrange(4)):
+        k = generador.randrange(len(letras))
+        operacion = generador.randrange(3)
+        if operacion == 0:
+            del letras[k]
+        elif operacion == 1:
+            letras.insert(k, generador.choice('aeiosrn '))
+        else:
+            letras[k] = generador.choice('aeiosrn')
+    titulo = ''.join(letras)
+    if generador.random() < 0.2:
+        titulo = titulo.upper()
+    if generador.random() < 0.15:
+        titulo += generador.choice([' parte 2', ' tomo i', ' libro 3'])
+    return titulo
+
+
+@parametrizar
+@pytest.mark.parametrize('semilla', range(5))
+def test_assign_igual_que_la_comparacion_lineal(ruta_script, semilla):
+    modulo = cargar_script(ruta_script)
+    normalizar = _normalizar(modulo)
+    generador = random.Random(semilla)
+    bases = [BASE, LARGO, 'ley de ingresos del municipio de aguascalientes para el ejercicio fiscal',
+             'codigo de procedimientos civiles para el estado libre y soberano', 'ley de aguas del estado']
+    registros = [_variante(generador, generador.choice(bases)) for _ in range(30)]
+    pdfs = {}
+    for _ in range(30):
+        pdfs.setdefault(_variante(generador, generador.choice(bases)), None)
+    pdfs = {pdf: normalizar(pdf) for pdf in pdfs}
+    indice = _indice(modulo, registros)
+
+    esperado = _assign_lineal(modulo, [entrada[2] for entrada in indice.entries], pdfs)
+    asignados = indice.assign(pdfs)
+
+    assert {pdf: match and match[0] for pdf, match in asignados.items()} == \
+        {pdf: match and match[0] for pdf, match in esperado.items()}
+
+
+def _procesador(modulo, carpeta, registros):
+    procesador = modulo.ReglamentoProcessor.__new__(modulo.ReglamentoProcessor)
+    procesador.output_folder = carpeta
+    procesador.contenido_matches = {}
+    procesador.contenido_index = _indice(modulo, registros)
+    procesador.url_index = None
+    procesador.metadatos_index = None
+    return procesador
+
+
+@parametrizar
+def test_reporte_de_matching(ruta_script, tmp_path):
+    modulo = cargar_script(ruta_script)
+    procesador = _procesador(modulo, tmp_path, ['Ley de Aguas del Estado', BASE, 'Reglamento sin PDF alguno'])
+
+    procesador.match_titles(['Ley de Aguas del Estado', 'LEY DE AGUAS DEL ESTADO', 'Ley de Aguas del Estado',
+                             BASE + 'x', 'Codigo Civil'])
+
+    with open(tmp_path / modulo.MATCH_REPORT_NAME, encoding='utf-8-sig', newline='') as f:
+        filas = [(fila['fuente'], fila['tipo'], fila['titulo'], fila['registro']) for fila in csv.DictReader(f)]
+    assert filas == [
+        ('contenido', 'exacto', 'Ley de Aguas del Estado', 'Ley de Aguas del Estado'),
+        ('contenido', 'duplicado', 'LEY DE AGUAS DEL ESTADO', ''),
+        ('contenido', 'duplicado', 'Ley de Aguas del Estado', ''),
+        ('contenido', 'parecido', BASE + 'x', BASE),
+        ('contenido', 'sin match', 'Codigo Civil', ''),
+        ('contenido', 'registro sin PDF', '', 'Reglamento sin PDF alguno'),
+    ]
+
+
+@parametrizar
+def test_cada_pdf_recibe_su_contenido(ruta_script, tmp_path):
+    modulo = cargar_script(ruta_script)
+    procesador = _procesador(modulo, tmp_path, ['Ley de Aguas del Estado', 'LEY DE AGUAS DEL ESTADO'])
+
+    procesador.match_titles(['LEY DE AGUAS DEL ESTADO', 'Ley de Águas del Estado'])
+
+    assert procesador.find_matching_contenido('LEY DE AGUAS DEL ESTADO') == 'Contenido de Ley de Aguas del Estado'
+    assert procesador.find_matching_contenido('Ley de Águas del Estado') == 'Contenido de LEY DE AGUAS DEL ESTADO'
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""
+Salida incremental .jsonl de la extracción (SalidaJSONL, _leer_indice_jsonl,
+convertir_jsonl_a_json): reanudar tras una caída, reintentar los errores y
+conservar el orden de la carpeta en el JSON final.
+"""
+
+import json
+
+from conftest import cargar_script, parametrizar_scripts
+
+parametrizar = parametrizar_scripts('class SalidaJSONL')
+
+
+def _resultado(titulo, contenido=None):
+    return {"Titulo": titulo, "contenido": contenido or f"Contenido de {titulo}", "paginas_ocr": []}
+
+
+def _titulos(archivo_json):
+    with open(archivo_json, encoding='utf-8') as f:
+        return [documento["Titulo"] for documento in json.load(f)]
+
+
+@parametrizar
+def test_reanudar_descarta_la_cola_a_medio_escribir(ruta_script, tmp_path):
+    modulo = cargar_script(ruta_script)
+    ruta = tmp_path / 'salida.jsonl'
+    with modulo.SalidaJSONL(ruta) as salida:
+        salida.escribir('1_a.pdf', _resultado('a'))
+        salida.escribir('2_b.pdf', _resultado('b'))
+    tamano = ruta.stat().st_size
+
+    # Caída a mitad de un registro: parte de la línea en el .jsonl y una entrada
+    # del índice cortada
+    with open(ruta, 'ab') as f:
+        f.write(b'{"Titulo": "c", "conten')
+    with open(ruta.with_name(ruta.name + '.idx'), 'ab') as f:
+        f.write(b'{"archivo": "3_c.pdf", "offs')
+
+    with modulo.SalidaJSONL(ruta, reanudar=True) as salida:
+        assert salida.procesados == {'1_a.pdf', '2_b.pdf'}
+        assert ruta.stat().st_size == tamano
+        salida.escribir('3_c.pdf', _resultado('c'))
+
+    assert set(modulo._leer_indice_jsonl(ruta)) == {'1_a.pdf', '2_b.pdf', '3_c.pdf'}
+    with open(ruta, encoding='utf-8') as f:
+        assert [json.loads(linea)["Titulo"] for linea in f] == ['a', 'b', 'c']
+
+
+@parametrizar
+def test_indice_se_detiene_en_entradas_fuera_del_jsonl(ruta_script, tmp_path):
+    modulo = cargar_script(ruta_script)
+    ruta = tmp_path / 'salida.jsonl'
+    with modulo.SalidaJSONL(ruta) as salida:
+        salida.escribir('1_a.pdf', _resultado('a'))
+        salida.escribir('2_b.pdf', _resultado('b'))
+        salida.escribir('3_c.pdf', _resultado('c'))
+    offset_b = modulo._leer_indice_jsonl(ruta)['2_b.pdf'][0]
+
+    # El .jsonl perdió el final del registro de b: ni b ni lo que sigue son fiables
+    with open(ruta, 'r+b') as f:
+        f.truncate(offset_b + 5)
+
+    assert set(modulo._leer_indice_jsonl(ruta)) == {'1_a.pdf'}
+    with modulo.SalidaJSONL(ruta, reanudar=True) as salida:
+        assert salida.procesados == {'1_a.pdf'}
+    assert ruta.stat().st_size == offset_b
+
+
+@parametrizar
+def test_reanudar_reintenta_los_errores(ruta_script, tmp_path):
+    modulo = cargar_script(ruta_script)
+    ruta = tmp_path / 'salida.jsonl'
+    with modulo.SalidaJSONL(ruta) as salida:
+        salida.escribir('1_a.pdf', _resultado('a'))
+        salida.escribir('2_b.pdf', _resultado('b', 'Error al procesar: el proceso terminó inesperadamente'))
+
+    assert modulo._leer_indice_jsonl(ruta)['2_b.pdf'][2] is True
+    with modulo.SalidaJSONL(ruta, reanudar=True) as salida:
+        # b se vuelve a procesar y su nuevo registro reemplaza al del error
+        assert salida.procesados == {'1_a.pdf'}
+        salida.escribir('2_b.pdf', _resultado('b'))
+        assert salida.procesados == {'1_a.pdf', '2_b.pdf'}
+
+    archivo_json = tmp_path / 'salida.json'
+    assert modulo.convertir_jsonl_a_json(ruta, archivo_json) == 2
+    with open(archivo_json, encoding='utf-8') as f:
+        assert [documento["contenido"] for documento in json.load(f)] == ['Contenido de a', 'Contenido de b']
+
+
+@parametrizar
+def test_convertir_conserva_el_orden_de_la_carpeta(ruta_script, tmp_path):
+    modulo = cargar_script(ruta_script)
+    ruta = tmp_path / 'salida.jsonl'
+    # Orden del .jsonl tras reanudar: los reintentos y los PDFs nuevos quedan al final
+    with modulo.SalidaJSONL(ruta) as salida:
+        salida.escribir('10_d.pdf', _resultado('d'))
+        salida.escribir('2_b.pdf', _resultado('b'))
+        salida.escribir('e.pdf', _resultado('e'))
+        salida.escribir('1_a.pdf', _resultado('a'))
+
+    # Por defecto, el orden de obtener_clave_orden: numerados primero, por número
+    archivo_json = tmp_path / 'salida.json'
+    assert modulo.convertir_jsonl_a_json(ruta, archivo_json) == 4
+    assert _titulos(archivo_json) == ['a', 'b', 'd', 'e']
+
+    # Con la lista de la carpeta, su orden; los PDFs sin registro se omiten
+    archivos = ['e.pdf', '2_b.pdf', '3_c.pdf', '1_a.pdf', '10_d.pdf']
+    assert modulo.convertir_jsonl_a_json(ruta, archivo_json, archivos) == 4
+    assert _titulos(archivo_json) == ['e', 'b', 'a', 'd']